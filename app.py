@@ -1,5 +1,6 @@
 import tkinter as tk          # Основной модуль tkinter (базовые виджеты)
 from tkinter import ttk       # Подмодуль ttk (современные themed виджеты)
+import multiprocessing
 import sys
 import os
 import logging
@@ -72,4 +73,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Нужно для пула процессов equity в собранном .exe
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,225 @@
+# сравнение профилей распознавания на папке сохраненных скриншотов:
+# задержка каждого профиля и согласие его детекций и результата парсинга с эталонным профилем
+#
+# запуск: python -m src.cv.benchmark screenshots/ --profiles fast balanced accurate --reference accurate
+
+import argparse
+import glob
+import logging
+import os
+import time
+
+import numpy as np
+
+from .profiles import PROFILES, DEFAULT_PROFILE, get_profile
+from .ocr_strategy import OcrStrategy
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+# Детекции считаются совпавшими, если класс один и IoU не меньше порога (как в mAP@0.5)
+IOU_THRESHOLD = 0.5
+
+# Поля результата парсинга, по которым сравниваются профили
+PARSE_FIELDS = ('size', 'active', 'pot', 'to_call', 'hero_pos', 'hero_stack', 'hero_cards', 'board_cards', 'street')
+
+# Объекты стола, для которых parse_image запускает детектор карт
+CARD_REGIONS = ('hero_card', 'board_card')
+
+# Форматы скриншотов в папке
+IMAGE_PATTERNS = ('*.png', '*.jpg', '*.jpeg')
+
+
+def box_iou(box_a, box_b) -> float:
+    '''
+    Пересечение над объединением двух прямоугольников
+    :param box_a: (x1, y1, x2, y2)
+    :param box_b: (x1, y1, x2, y2)
+    :return: IoU от 0 до 1
+    '''
+    ax1, ay1, ax2, ay2 = box_a
+    bx1, by1, bx2, by2 = box_b
+    inter_w = max(0, min(ax2, bx2) - max(ax1, bx1))
+    inter_h = max(0, min(ay2, by2) - max(ay1, by1))
+    inter = inter_w * inter_h
+    union = (ax2 - ax1) * (ay2 - ay1) + (bx2 - bx1) * (by2 - by1) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_detections(detections: list[dict], reference: list[dict], iou_threshold: float = IOU_THRESHOLD) -> tuple[int, int, int]:
+    '''
+    Жадно сопоставляет детекции с эталонными (по убыванию уверенности, как при расчете mAP)
+    :param detections: детекции проверяемого профиля
+    :param reference: детекции эталонного профиля
+    :param iou_threshold: минимальный IoU для совпадения
+    :return: (совпавшие, лишние, пропущенные)
+    '''
+    unmatched = list(reference)
+    matched = 0
+    for det in sorted(detections, key=lambda d: d['conf'], reverse=True):
+        best_iou, best_idx = iou_threshold, None
+        for idx, ref in enumerate(unmatched):
+            if ref['name'] != det['name']:
+                continue
+            iou = box_iou(det['bbox'], ref['bbox'])
+            if iou >= best_iou:
+                best_iou, best_idx = iou, idx
+        if best_idx is not None:
+            unmatched.pop(best_idx)
+            matched += 1
+    return matched, len(detections) - matched, len(unmatched)
+
+
+def detection_f1(matched: int, extra: int, missed: int) -> float:
+    '''
+    F1 согласия детекций с эталоном - упрощенная замена mAP без разметки
+    :param matched: совпавшие детекции
+    :param extra: лишние детекции
+    :param missed: пропущенные детекции
+    :return: F1 от 0 до 1 (1, если обе стороны пустые)
+    '''
+    if matched + extra + missed == 0:
+        return 1.0
+    return 2 * matched / (2 * matched + extra + missed)
+
+
+def parse_agreement(result: dict, reference: dict) -> float:
+    '''
+    Доля полей результата парсинга, совпавших с эталоном (карты сравниваются без учета порядка)
+    :param result: результат parse_image проверяемого профиля
+    :param reference: результат parse_image эталонного профиля
+    :return: доля совпавших полей от 0 до 1
+    '''
+    if not reference or not result:
+        return float(not reference and not result)
+
+    same = 0
+    for field in PARSE_FIELDS:
+        value, expected = result.get(field), reference.get(field)
+        if isinstance(expected, list):
+            same += sorted(value or []) == sorted(expected)
+        else:
+            same += value == expected
+    return same / len(PARSE_FIELDS)
+
+
+def find_screenshots(folder: str) -> list[str]:
+    '''
+    Список скриншотов в папке
+    :param folder: путь к папке
+    :return: отсортированный список путей
+    '''
+    paths = []
+    for pattern in IMAGE_PATTERNS:
+        paths.extend(glob.glob(os.path.join(folder, pattern)))
+    return sorted(paths)
+
+
+def run_profile(frame: np.ndarray, profile: str, strategy: OcrStrategy | None = None) -> tuple[list[dict], dict, float]:
+    '''
+    Полный разбор кадра в заданном профиле с замером времени.
+    Карты детектируются, только если на кадре есть области карт - как в parse_image
+    :param frame: кадр BGR
+    :param profile: название профиля
+    :param strategy: статистика OCR этого профиля (None - общая OCR_STRATEGY)
+    :return: (детекции стола и карт, результат парсинга, время в секундах)
+    '''
+    # детекторы загружаются только при реальном прогоне
+    from . import ocr
+    from .detect import detect_image, detect_all_cards
+    from .parser import parse_image
+
+    settings = get_profile(profile)
+    shared_strategy = ocr.OCR_STRATEGY
+    if strategy is not None:
+        ocr.OCR_STRATEGY = strategy
+    try:
+        start = time.perf_counter()
+        detections = detect_image(frame, conf=settings['table_conf'], imgsz=settings['imgsz'])
+        card_detections = []
+        if any(det['name'] in CARD_REGIONS for det in detections):
+            card_detections = detect_all_cards(frame, conf=settings['card_conf'], imgsz=settings['imgsz'])
+        result = parse_image(frame, detections=detections, card_detections=card_detections, profile=profile)
+        elapsed = time.perf_counter() - start
+    finally:
+        ocr.OCR_STRATEGY = shared_strategy
+
+    return detections + card_detections, result, elapsed
+
+
+def run_benchmark(folder: str, profiles: list[str], reference: str = DEFAULT_PROFILE) -> dict[str, dict]:
+    '''
+    Прогоняет все скриншоты папки через каждый профиль и сравнивает с эталонным профилем
+    :param folder: папка со скриншотами
+    :param profiles: названия профилей
+    :param reference: эталонный профиль
+    :return: словарь профиль -> {'frames', 'latency_mean', 'latency_p95', 'detection_f1', 'parse_agreement'}
+    '''
+    from .detect import warm_up_models
+    from .ocr import load_image
+
+    paths = find_screenshots(folder)
+    if not paths:
+        raise ValueError(f"в папке {folder} нет скриншотов")
+
+    # первый прогон моделей не должен попадать в замеры
+    warm_up_models()
+
+    names = list(dict.fromkeys([reference, *profiles]))
+    # у каждого профиля своя статистика OCR в памяти: порядок попыток одного профиля
+    # не влияет на замеры другого, а файл статистики пользователя не меняется
+    strategies = {name: OcrStrategy(path=None) for name in names}
+    latencies = {name: [] for name in names}
+    counts = {name: [0, 0, 0] for name in names}
+    agreements = {name: [] for name in names}
+
+    for path in paths:
+        frame = load_image(path)
+        if frame is None:
+            continue
+
+        runs = {name: run_profile(frame, name, strategies[name]) for name in names}
+        reference_detections, reference_result, _ = runs[reference]
+        for name, (detections, result, elapsed) in runs.items():
+            latencies[name].append(elapsed)
+            for i, value in enumerate(match_detections(detections, reference_detections)):
+                counts[name][i] += value
+            agreements[name].append(parse_agreement(result, reference_result))
+
+    report = {}
+    for name in profiles:
+        report[name] = {
+            'frames': len(latencies[name]),
+            'latency_mean': float(np.mean(latencies[name])),
+            'latency_p95': float(np.percentile(latencies[name], 95)),
+            'detection_f1': detection_f1(*counts[name]),
+            'parse_agreement': float(np.mean(agreements[name])),
+        }
+    return report
+
+
+def format_report(report: dict[str, dict], reference: str) -> str:
+    '''
+    Таблица результатов для вывода в консоль
+    :param report: результат run_benchmark
+    :param reference: эталонный профиль
+    :return: текст таблицы
+    '''
+    lines = [f"Эталон: {reference}",
+             f"{'профиль':<10} {'кадры':>6} {'сред, с':>8} {'p95, с':>8} {'F1 детекций':>12} {'парсинг':>8}"]
+    for name, row in report.items():
+        lines.append(f"{name:<10} {row['frames']:>6} {row['latency_mean']:>8.3f} {row['latency_p95']:>8.3f} "
+                     f"{row['detection_f1']:>12.3f} {row['parse_agreement']:>8.3f}")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    arg_parser = argparse.ArgumentParser(description="Сравнение профилей распознавания на папке скриншотов")
+    arg_parser.add_argument("folder", help="папка со скриншотами")
+    arg_parser.add_argument("--profiles", nargs='+', default=list(PROFILES), choices=list(PROFILES))
+    arg_parser.add_argument("--reference", default=DEFAULT_PROFILE, choices=list(PROFILES))
+    args = arg_parser.parse_args()
+
+    print(format_report(run_benchmark(args.folder, args.profiles, args.reference), args.reference))
@@ -1,14 +1,16 @@
 # определяем по картинке объекты: стол, карты, стек, pot, кнопки
 
-from ultralytics import YOLO
-import ultralytics
 import cv2
 import numpy as np
 import os
 import sys
 import logging
+import shutil
+import threading
 from pathlib import Path
 
+from .profiles import PROFILES
+
 # Настройка логгера для этого модуля
 logger = logging.getLogger(__name__)
 
@@ -22,75 +24,304 @@ def get_model_path(model_name):
         # Обычный запуск
         return f"models/{model_name}"
 
-# Загружаем общую модель детекции всего стола
+# Общая модель детекции всего стола
 TOTAL_MODEL_PATH = get_model_path("totalpoker_yolo11n_200_768_40_0005.pt")
-total_model = YOLO(TOTAL_MODEL_PATH, verbose=True)
 
-# Загружаем модель для детекции карт
+# Модель для детекции карт
 CARDS_MODEL_PATH = get_model_path("pokercard_yolo11n_7598_768_80_001.pt")
-cards_model = YOLO(CARDS_MODEL_PATH, verbose=True)
 
+# Размер входа моделей
+IMGSZ = 768
+
+# Максимальное количество кадров в одном прямом проходе модели
+MAX_BATCH_SIZE = 16
+
+# Движок инференса: 'pytorch' - исходные .pt через ultralytics,
+# 'onnx' - экспорт в ONNX (onnxruntime), 'openvino' - экспорт в OpenVINO (быстрее всего на CPU Intel)
+INFERENCE_BACKEND = 'pytorch'
+INFERENCE_BACKENDS = ('pytorch', 'onnx', 'openvino')
+
+# Квантование INT8 при экспорте в OpenVINO (меньше и быстрее, немного теряет в точности)
+EXPORT_INT8 = False
+
+# Данные для калибровки INT8: yaml датасета ultralytics со скриншотами столов
+CALIBRATION_DATA = get_model_path("calibration.yaml")
+
+# Модели загружаются при первом обращении (импорт ultralytics и torch занимает секунды)
+_MODELS = {}
+_MODELS_LOCK = threading.Lock()
 
-def detect_image(image_path: str, conf: float = 0.3, save_img: bool = False) -> list[dict]:
+# Экспорт занимает минуты и идет под своей блокировкой, не мешая загруженным моделям
+_EXPORT_LOCK = threading.Lock()
+
+
+def get_exported_path(model_path: str, backend: str, imgsz: int = IMGSZ) -> str:
     '''
-    Функция для детектирования визуальных объектов на изображении.
-    :param image_path: путь к PNG картинке
-    :param conf: пороговое значение для фильтрации детекций (default=0.3)
-    :param save_img: флаг для сохранения изображения с детекциями (default=False)
-    :return: список словарей [{'name': 'card', 'bbox': (x1, y1, x2, y2), 'conf': 0.93}, ...]
+    Путь к экспортированной модели: для каждого размера входа свой экспорт
+    :param model_path: путь к исходной модели .pt
+    :param backend: движок инференса
+    :param imgsz: размер входа, под который экспортирована модель
+    :return: путь к файлу .onnx или папке *_openvino_model
     '''
+    if backend == 'pytorch':
+        return model_path
+    stem = f"{os.path.splitext(model_path)[0]}_{imgsz}"
+    if backend == 'onnx':
+        return f"{stem}.onnx"
+    if backend == 'openvino':
+        return f"{stem}{'_int8' if EXPORT_INT8 else ''}_openvino_model"
+    raise ValueError(f"неизвестный движок инференса: {backend}")
 
-    results = total_model(image_path, conf=conf, imgsz=768)[0]
-    detections = []
 
-    if save_img:
-        image_path = image_path.replace('.png', '_table.png')
-        cv2.imwrite(image_path, results.plot())
+def export_model(model_path: str, backend: str, imgsz: int = IMGSZ) -> str:
+    '''
+    Экспортирует модель .pt в формат движка под размер входа профиля, если экспорта еще нет
+    :param model_path: путь к исходной модели .pt
+    :param backend: 'onnx' или 'openvino'
+    :param imgsz: размер входа
+    :return: путь к экспортированной модели
+    '''
+    exported_path = get_exported_path(model_path, backend, imgsz)
+    with _EXPORT_LOCK:
+        if os.path.exists(exported_path):
+            return exported_path
+
+        options = {'imgsz': imgsz, 'dynamic': True}   # динамический размер пачки нужен для пакетной детекции
+        if backend == 'openvino' and EXPORT_INT8:
+            # без своих данных ultralytics калибрует INT8 на чужом датасете
+            if not os.path.exists(CALIBRATION_DATA):
+                raise FileNotFoundError(f"нет данных для калибровки INT8: {CALIBRATION_DATA}")
+            options.update(int8=True, data=CALIBRATION_DATA)
+
+        from ultralytics import YOLO
+        logger.info("Экспорт модели %s в %s (imgsz=%s)", model_path, backend, imgsz)
+        result = YOLO(model_path).export(format=backend, **options)
+        # ultralytics пишет экспорт рядом с .pt под одним именем для всех размеров
+        shutil.move(str(result), exported_path)
+    return exported_path
+
+
+def export_models(backend: str, sizes: list[int] | None = None) -> list[str]:
+    '''
+    Экспортирует обе модели (стол и карты) в формат движка для каждого размера входа
+    :param backend: 'onnx' или 'openvino'
+    :param sizes: размеры входа (None - размеры всех профилей распознавания)
+    :return: пути к экспортированным моделям
+    '''
+    sizes = sizes or sorted({profile['imgsz'] for profile in PROFILES.values()})
+    return [export_model(model_path, backend, imgsz)
+            for model_path in (TOTAL_MODEL_PATH, CARDS_MODEL_PATH) for imgsz in sizes]
+
+
+def set_inference_backend(backend: str):
+    '''
+    Переключает движок инференса, загруженные модели сбрасываются и загрузятся заново
+    :param backend: 'pytorch', 'onnx' или 'openvino'
+    '''
+    global INFERENCE_BACKEND
+
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"неизвестный движок инференса: {backend}")
+    with _MODELS_LOCK:
+        INFERENCE_BACKEND = backend
+        _MODELS.clear()
+
+
+def load_model(model_path: str, imgsz: int = IMGSZ):
+    '''
+    Возвращает модель YOLO для текущего движка, при первом обращении загружает ее
+    (и при необходимости экспортирует под размер входа). Безопасно для нескольких потоков.
+    Если экспорт недоступен (нет движка или данных калибровки), используется исходная модель .pt.
+    Экспортированные модели возвращают те же классы и боксы, поэтому формат детекций не меняется.
+    :param model_path: путь к исходной модели .pt
+    :param imgsz: размер входа (для экспортированных моделей)
+    :return: модель YOLO
+    '''
+    backend = INFERENCE_BACKEND
+    key = (model_path, backend, None if backend == 'pytorch' else imgsz)
+    model = _MODELS.get(key)
+    if model is not None:
+        return model
+
+    path = model_path
+    if backend != 'pytorch':
+        try:
+            path = export_model(model_path, backend, imgsz)
+        except Exception as e:
+            logger.warning("Экспорт модели %s в %s недоступен, используется pytorch: %s", model_path, backend, e)
+
+    with _MODELS_LOCK:
+        if key not in _MODELS:
+            from ultralytics import YOLO
+            if path == model_path:
+                _MODELS[key] = YOLO(model_path, verbose=True)
+            else:
+                _MODELS[key] = YOLO(path, task='detect', verbose=True)
+            logger.info("Модель загружена: %s (%s)", path, backend)
+        return _MODELS[key]
+
+
+def get_total_model(imgsz: int = IMGSZ):
+    '''Модель детекции объектов стола'''
+    return load_model(TOTAL_MODEL_PATH, imgsz)
+
 
+def get_cards_model(imgsz: int = IMGSZ):
+    '''Модель детекции карт'''
+    return load_model(CARDS_MODEL_PATH, imgsz)
+
+
+def warm_up_models():
+    '''
+    Прогрев детекторов: загрузка моделей и один прогон на пустом кадре.
+    Вызывается в свободное время (например, из фонового потока GUI), чтобы первый анализ не ждал загрузки.
+    '''
+    frame = np.zeros((IMGSZ, IMGSZ, 3), dtype=np.uint8)
+    for model in (get_total_model(), get_cards_model()):
+        model(frame, imgsz=IMGSZ, verbose=False)
+    logger.info("Детекторы прогреты")
+
+
+def get_debug_path(image: str | np.ndarray, suffix: str) -> str:
+    '''
+    Путь для сохранения изображения с детекциями
+    :param image: путь к PNG картинке или кадр в памяти
+    :param suffix: суффикс имени файла, например '_table'
+    :return: путь к файлу
+    '''
+    if isinstance(image, np.ndarray):
+        return f"frame{suffix}.png"
+    return image.replace('.png', f'{suffix}.png')
+
+def results_to_detections(results, model) -> list[dict]:
+    '''
+    Переводит результат YOLO для одного кадра в список словарей детекций
+    :param results: результат модели для одного кадра
+    :param model: модель, по которой определяются названия классов
+    :return: список словарей [{'name': 'card', 'bbox': [x1, y1, x2, y2], 'conf': 0.93}, ...]
+    '''
+    detections = []
     for box in results.boxes.data.tolist():
         x1, y1, x2, y2, conf, cls = box
-        name = total_model.names[int(cls)]
         detections.append({
-            'name': name,
+            'name': model.names[int(cls)],
             'bbox': [int(x1), int(y1), int(x2), int(y2)],
             'conf': float(conf)
         })
+    return detections
+
 
+def predict_batch(model, images: list, conf: float, imgsz: int = IMGSZ) -> list[list[dict]]:
+    '''
+    Прогоняет список кадров через модель пачками по MAX_BATCH_SIZE кадров за один прямой проход
+    :param model: модель YOLO
+    :param images: список кадров BGR (NumPy массивы) или путей к картинкам
+    :param conf: пороговое значение для фильтрации детекций
+    :param imgsz: размер входа модели
+    :return: список детекций для каждого кадра, в том же порядке
+    '''
+    detections = []
+    for start in range(0, len(images), MAX_BATCH_SIZE):
+        batch = list(images[start:start + MAX_BATCH_SIZE])
+        for results in model(batch, conf=conf, imgsz=imgsz):
+            detections.append(results_to_detections(results, model))
     return detections
 
 
-def detect_cards(image_path: str, bbox: tuple[int, int, int, int], conf: float = 0.3, save_img: bool = False) -> list:
+def detect_image(image_path: str | np.ndarray, conf: float = 0.3, save_img: bool = False, imgsz: int = IMGSZ) -> list[dict]:
     '''
-    Функция детектирует все карты на изображении.
-    :param image_path: путь к PNG картинке
-    :param bbox: координаты бокса (x1, y1, x2, y2)
+    Функция для детектирования визуальных объектов на изображении.
+    :param image_path: кадр BGR (NumPy массив) или путь к PNG картинке
+    :param conf: пороговое значение для фильтрации детекций (default=0.3)
+    :param save_img: флаг для сохранения изображения с детекциями (default=False)
+    :param imgsz: размер входа модели (default=768)
+    :return: список словарей [{'name': 'card', 'bbox': (x1, y1, x2, y2), 'conf': 0.93}, ...]
+    '''
+
+    total_model = get_total_model(imgsz)
+    results = total_model(image_path, conf=conf, imgsz=imgsz)[0]
+
+    if save_img:
+        cv2.imwrite(get_debug_path(image_path, '_table'), results.plot())
+
+    return results_to_detections(results, total_model)
+
+
+def detect_images(images: list, conf: float = 0.3, imgsz: int = IMGSZ) -> list[list[dict]]:
+    '''
+    Пакетная детекция объектов стола для нескольких кадров (разные столы или несколько снимков подряд).
+    :param images: список кадров BGR (NumPy массивы) или путей к картинкам
+    :param conf: пороговое значение для фильтрации детекций (default=0.3)
+    :param imgsz: размер входа модели (default=768)
+    :return: для каждого кадра список словарей в формате detect_image
+    '''
+    return predict_batch(get_total_model(imgsz), images, conf, imgsz)
+
+
+def boxes_intersect(box_a, box_b) -> bool:
+    '''
+    Проверка пересечения двух прямоугольников
+    :param box_a: (x1, y1, x2, y2)
+    :param box_b: (x1, y1, x2, y2)
+    :return: True, если прямоугольники пересекаются или касаются
+    '''
+    ax1, ay1, ax2, ay2 = box_a
+    bx1, by1, bx2, by2 = box_b
+    return not (ax2 < bx1 or ax1 > bx2 or ay2 < by1 or ay1 > by2)
+
+
+def detect_all_cards(image_path: str | np.ndarray, conf: float = 0.3, save_img: bool = False, imgsz: int = IMGSZ) -> list[dict]:
+    '''
+    Функция детектирует все карты на изображении за один проход модели.
+    Результат можно переиспользовать для любого количества областей через cards_in_bbox.
+    :param image_path: кадр BGR (NumPy массив) или путь к PNG картинке
     :param conf: пороговое значение для фильтрации (default=0.3)
     :param save_img: флаг для сохранения изображения с детекциями (default=False)
-    :return: возвращает список карт только тех, что пересекаются с bbox.
+    :param imgsz: размер входа модели (default=768)
+    :return: список словарей [{'name': 'As', 'bbox': [x1, y1, x2, y2], 'conf': 0.93}, ...]
     '''
 
-    results = cards_model(image_path, conf=conf, imgsz=768)[0]
+    cards_model = get_cards_model(imgsz)
+    results = cards_model(image_path, conf=conf, imgsz=imgsz)[0]
 
     if save_img:
-        image_path = image_path.replace('.png', '_cards.png')
-        cv2.imwrite(image_path, results.plot())
+        cv2.imwrite(get_debug_path(image_path, '_cards'), results.plot())
 
-    x1, y1, x2, y2 = bbox
-    detections = []
+    return results_to_detections(results, cards_model)
 
-    def intersects(boxA, boxB):
-        # Проверка пересечения двух прямоугольников
-        ax1, ay1, ax2, ay2 = boxA
-        bx1, by1, bx2, by2 = boxB
-        return not (ax2 < bx1 or ax1 > bx2 or ay2 < by1 or ay1 > by2)
 
-    for box in results.boxes.data.tolist():
-        xx1, yy1, xx2, yy2, _, cls = box
-        if intersects((x1, y1, x2, y2), (xx1, yy1, xx2, yy2)):
-            name = cards_model.names[int(cls)]
-            detections.append(name)
+def detect_all_cards_batch(images: list, conf: float = 0.3, imgsz: int = IMGSZ) -> list[list[dict]]:
+    '''
+    Пакетная детекция карт для нескольких кадров.
+    :param images: список кадров BGR (NumPy массивы) или путей к картинкам
+    :param conf: пороговое значение для фильтрации (default=0.3)
+    :param imgsz: размер входа модели (default=768)
+    :return: для каждого кадра список словарей в формате detect_all_cards
+    '''
+    return predict_batch(get_cards_model(imgsz), images, conf, imgsz)
 
-    return detections
+
+def cards_in_bbox(card_detections: list[dict], bbox: tuple[int, int, int, int]) -> list:
+    '''
+    Функция выбирает из готовых детекций карты, пересекающиеся с bbox.
+    :param card_detections: результат detect_all_cards
+    :param bbox: координаты бокса (x1, y1, x2, y2)
+    :return: список названий карт
+    '''
+    return [card['name'] for card in card_detections if boxes_intersect(bbox, card['bbox'])]
+
+
+def detect_cards(image_path: str | np.ndarray, bbox: tuple[int, int, int, int], conf: float = 0.3, save_img: bool = False) -> list:
+    '''
+    Функция детектирует все карты на изображении.
+    Для нескольких областей одного кадра выгоднее один раз вызвать detect_all_cards и затем cards_in_bbox.
+    :param image_path: кадр BGR (NumPy массив) или путь к PNG картинке
+    :param bbox: координаты бокса (x1, y1, x2, y2)
+    :param conf: пороговое значение для фильтрации (default=0.3)
+    :param save_img: флаг для сохранения изображения с детекциями (default=False)
+    :return: возвращает список карт только тех, что пересекаются с bbox.
+    '''
+    return cards_in_bbox(detect_all_cards(image_path, conf=conf, save_img=save_img), bbox)
 
 
 if __name__ == "__main__":
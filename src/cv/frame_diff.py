@@ -0,0 +1,85 @@
+# дешевая проверка, изменился ли кадр: пока соперник думает, соседние снимки стола одинаковые,
+# и повторять детекцию, OCR и расчет equity для них незачем
+
+import logging
+import threading
+
+import numpy as np
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+# Пиксель считается изменившимся, если хотя бы один канал сдвинулся больше чем на порог (0-255)
+PIXEL_THRESHOLD = 24
+
+# Кадр (или область) считается изменившимся, если изменилось больше пикселей, чем здесь
+# (шум курсора, сглаживание). Считаются пиксели, а не средние яркости, поэтому чувствительность
+# не зависит от размера снимка: смена одной цифры стека - десятки пикселей на любом разрешении
+MIN_CHANGED_PIXELS = 4
+
+
+def changed_mask(prev: np.ndarray, frame: np.ndarray) -> np.ndarray:
+    '''
+    Маска изменившихся пикселей между двумя кадрами одного размера
+    :param prev: прошлый кадр BGR
+    :param frame: новый кадр BGR
+    :return: булев массив (высота, ширина)
+    '''
+    # разность в uint8 без перевода в знаковый тип: max - min не переполняется
+    diff = np.maximum(prev, frame)
+    diff -= np.minimum(prev, frame)
+    if diff.ndim == 3:
+        # попарный максимум каналов в разы быстрее diff.max(axis=2) на кадре 1920x1080
+        diff = np.maximum(np.maximum(diff[..., 0], diff[..., 1]), diff[..., 2])
+    return diff > PIXEL_THRESHOLD
+
+
+def frames_differ(prev: np.ndarray | None, frame: np.ndarray, min_pixels: int = MIN_CHANGED_PIXELS) -> bool:
+    '''
+    Сравнивает два кадра
+    :param prev: прошлый кадр или None
+    :param frame: новый кадр
+    :param min_pixels: сколько пикселей должно измениться
+    :return: True, если кадры различаются (или сравнивать не с чем)
+    '''
+    if prev is None or prev.shape != frame.shape:
+        return True
+    return int(np.count_nonzero(changed_mask(prev, frame))) > min_pixels
+
+
+class FrameChangeDetector:
+    '''
+    Помнит последний кадр, по которому был сделан анализ, и сообщает, отличается ли от него новый.
+    Опорный кадр обновляется только при изменении, поэтому медленный дрейф картинки
+    накапливается и в итоге тоже считается изменением.
+    '''
+
+    def __init__(self, min_pixels: int = MIN_CHANGED_PIXELS):
+        '''
+        :param min_pixels: сколько пикселей должно измениться, чтобы кадр считался новым
+        '''
+        self.min_pixels = min_pixels
+        self.lock = threading.Lock()
+        self.reference = None
+        self.skipped = 0
+
+    def changed(self, frame: np.ndarray) -> bool:
+        '''
+        Проверяет кадр; если он изменился, он становится новым опорным
+        :param frame: кадр BGR
+        :return: True, если кадр нужно анализировать заново
+        '''
+        with self.lock:
+            if frames_differ(self.reference, frame, self.min_pixels):
+                # копия: вызывающий код может переиспользовать буфер кадра
+                self.reference = frame.copy()
+                self.skipped = 0
+                return True
+            self.skipped += 1
+            return False
+
+    def reset(self):
+        '''Забывает опорный кадр (например, после выбора новой области экрана)'''
+        with self.lock:
+            self.reference = None
+            self.skipped = 0
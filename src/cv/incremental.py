@@ -0,0 +1,139 @@
+# инкрементальный парсинг: между соседними кадрами обычно меняется только стек или банк,
+# поэтому раскладка стола (детекции YOLO) берется с прошлого кадра, а заново распознаются
+# только области, пиксели которых изменились. Полная детекция - только при сдвиге раскладки
+
+import logging
+import threading
+
+import numpy as np
+
+from .detect import detect_image, detect_all_cards
+from .frame_diff import changed_mask, MIN_CHANGED_PIXELS
+from .layout import LayoutCache, LAYOUT_CACHE
+from .ocr import OCR_MARGIN
+from .parser import parse_image
+from .profiles import get_profile
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+# Области, распознаваемые OCR: их изменение не меняет раскладку стола
+TEXT_REGIONS = {'player_panel': 'stack', 'action_button': 'button', 'pot_box': 'pot'}
+
+# Для надежности полная детекция выполняется хотя бы раз в столько кадров
+MAX_INCREMENTAL_FRAMES = 20
+
+
+def bbox_changed(mask: np.ndarray, bbox, margin: int = OCR_MARGIN) -> bool:
+    '''
+    Проверяет, изменилась ли область вместе с отступом, который читает ocr_text
+    :param mask: результат changed_mask
+    :param bbox: [x1, y1, x2, y2]
+    :param margin: отступ вокруг bbox (пиксели)
+    :return: True, если изменившихся пикселей больше MIN_CHANGED_PIXELS
+    '''
+    x1, y1, x2, y2 = (int(v) for v in bbox)
+    region = mask[max(0, y1 - margin):y2 + margin, max(0, x1 - margin):x2 + margin]
+    return int(np.count_nonzero(region)) > MIN_CHANGED_PIXELS
+
+def layout_changed(mask: np.ndarray, detections: list[dict]) -> bool:
+    '''
+    Проверяет, сдвинулась ли раскладка стола: изменения вне текстовых областей
+    (новые карты, кнопки, фишка дилера, сброшенные карты) требуют новой детекции.
+    Карты и фишка внутри панели игрока тоже считаются раскладкой.
+    :param mask: результат changed_mask
+    :param detections: детекции объектов стола прошлого кадра
+    :return: True, если нужна полная детекция
+    '''
+    outside = mask.copy()
+    for det in detections:
+        if det['name'] in TEXT_REGIONS:
+            x1, y1, x2, y2 = (int(v) for v in det['bbox'])
+            outside[max(0, y1):y2, max(0, x1):x2] = False
+    for det in detections:
+        if det['name'] not in TEXT_REGIONS:
+            x1, y1, x2, y2 = (int(v) for v in det['bbox'])
+            outside[max(0, y1):y2, max(0, x1):x2] = mask[max(0, y1):y2, max(0, x1):x2]
+    return int(np.count_nonzero(outside)) > MIN_CHANGED_PIXELS
+
+
+class IncrementalParser:
+    '''
+    Парсер последовательных кадров одного стола.
+    Хранит прошлый кадр, его детекции и распознанные значения текстовых областей.
+    '''
+
+    def __init__(self, conf: float | None = None, profile: str | dict | None = None,
+                 layout_cache: LayoutCache | None = LAYOUT_CACHE):
+        '''
+        :param conf: порог уверенности для карт (None - из профиля)
+        :param profile: профиль производительности (None - профиль по умолчанию)
+        :param layout_cache: кэш раскладок мест (None - раскладка считается на каждом кадре)
+        '''
+        self.settings = get_profile(profile)
+        self.conf = conf if conf is not None else self.settings['card_conf']
+        self.layout_cache = layout_cache
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        '''Забывает прошлый кадр: следующий кадр будет разобран полностью'''
+        self.prev_frame = None
+        self.detections = None
+        self.card_detections = None
+        self.region_cache = {}
+        self.incremental_frames = 0
+        self.full_parses = 0
+
+    def detect(self, frame: np.ndarray):
+        '''Полная детекция объектов стола и карт для кадра'''
+        settings = self.settings
+        self.detections = detect_image(image_path=frame, conf=settings['table_conf'], save_img=False, imgsz=settings['imgsz'])
+        if any(det['name'] in ('hero_card', 'board_card') for det in self.detections):
+            self.card_detections = detect_all_cards(image_path=frame, conf=self.conf, save_img=False, imgsz=settings['imgsz'])
+        else:
+            self.card_detections = []
+        self.incremental_frames = 0
+        self.full_parses += 1
+
+    def parse(self, frame: np.ndarray) -> dict:
+        '''
+        Разбирает очередной кадр, переиспользуя все, что не изменилось с прошлого
+        :param frame: кадр BGR
+        :return: словарь parse_image
+        '''
+        with self.lock:
+            prev = self.prev_frame
+            full = (prev is None
+                    or self.detections is None
+                    or prev.shape != frame.shape
+                    or self.incremental_frames >= MAX_INCREMENTAL_FRAMES)
+
+            mask = None
+            if not full:
+                mask = changed_mask(prev, frame)
+                full = layout_changed(mask, self.detections)
+
+            if mask is None:
+                # сравнивать не с чем - все области распознаются заново
+                self.region_cache = {}
+            else:
+                # заново распознаются только изменившиеся текстовые области; рамки панелей привязаны
+                # к раскладке мест, поэтому их значения переживают и полную детекцию
+                for key in list(self.region_cache):
+                    if bbox_changed(mask, key[1:]):
+                        del self.region_cache[key]
+
+            if full:
+                self.detect(frame)
+            else:
+                self.incremental_frames += 1
+
+            self.prev_frame = frame
+            return parse_image(frame,
+                               conf=self.conf,
+                               detections=self.detections,
+                               card_detections=self.card_detections,
+                               profile=self.settings,
+                               region_cache=self.region_cache,
+                               layout_cache=self.layout_cache)
@@ -0,0 +1,124 @@
+# кэш раскладки стола: места игроков при одном размере окна и скине клиента не двигаются,
+# поэтому после первого уверенного разбора их рамки и порядок по часовой стрелке запоминаются,
+# а на следующих кадрах панели просто привязываются к известным местам
+
+import logging
+import math
+import threading
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+# Раскладка запоминается, только если все панели найдены с уверенностью не ниже порога
+LAYOUT_MIN_CONF = 0.6
+
+# Панель относится к месту, если их центры ближе этого расстояния (в пикселях)
+SEAT_MATCH_DIST = 40
+
+# Минимальное расстояние между центрами разных игроков (панели ближе считаются дублями)
+MIN_PANEL_DIST = 100
+
+
+def seat_layout(panels: list[dict], center_img: tuple[int, int]) -> list[dict]:
+    '''
+    Строит раскладку мест по найденным панелям: убирает дубли, считает углы относительно центра
+    кадра и сортирует места по часовой стрелке
+    :param panels: панели игроков с ключами 'bbox' и 'center'
+    :param center_img: центр кадра (x, y)
+    :return: новый список панелей без дублей, с заполненным 'angle', по возрастанию угла
+    '''
+    # Фильтруем дубли player_panel (по близости центров)
+    filtered_panels = []
+    used = set()
+    for i, panel_i in enumerate(panels):
+        if i in used:
+            continue
+        for j, panel_j in enumerate(panels):
+            if i != j and j not in used:
+                dist = math.dist(panel_i['center'], panel_j['center'])
+                if dist < MIN_PANEL_DIST:
+                    used.add(j)
+        filtered_panels.append(panel_i)
+        used.add(i)
+
+    # Считаем углы относительно центра картинки (по часовой стрелке)
+    for panel in filtered_panels:
+        dx = panel['center'][0] - center_img[0]  # смещение по x
+        dy = panel['center'][1] - center_img[1]  # смещение по y
+        panel['angle'] = round(math.atan2(dy, dx), 2)
+
+    # Сортируем по углу (по часовой стрелке)
+    filtered_panels.sort(key=lambda p: p['angle'])
+    return filtered_panels
+
+
+def match_seats(seats: list[dict], panels: list[dict]) -> list[dict] | None:
+    '''
+    Привязывает найденные панели к известным местам
+    :param seats: раскладка из кэша (места с 'bbox', 'center', 'angle' по часовой стрелке)
+    :param panels: панели игроков текущего кадра
+    :return: панели с рамками и углами мест в порядке раскладки (свободные места пропускаются)
+             или None, если какая-то панель не подходит ни к одному месту - раскладка изменилась
+    '''
+    matched = {}
+    for panel in panels:
+        distances = [math.dist(panel['center'], seat['center']) for seat in seats]
+        seat_idx = min(range(len(seats)), key=distances.__getitem__)
+        if distances[seat_idx] > SEAT_MATCH_DIST:
+            return None
+        # дубли одной панели привязываются к одному месту, остается первая
+        matched.setdefault(seat_idx, panel)
+
+    result = []
+    for seat_idx in sorted(matched):
+        seat = seats[seat_idx]
+        panel = matched[seat_idx]
+        panel['bbox'] = list(seat['bbox'])
+        panel['center'] = seat['center']
+        panel['angle'] = seat['angle']
+        result.append(panel)
+    return result
+
+
+class LayoutCache:
+    '''
+    Раскладки мест по ключу (ширина, высота, скин стола)
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.layouts = {}
+
+    def get(self, key: tuple) -> list[dict] | None:
+        '''
+        :param key: (ширина кадра, высота кадра, скин)
+        :return: места по часовой стрелке или None
+        '''
+        with self.lock:
+            return self.layouts.get(key)
+
+    def store(self, key: tuple, panels: list[dict]):
+        '''
+        Запоминает раскладку
+        :param key: (ширина кадра, высота кадра, скин)
+        :param panels: панели после seat_layout
+        '''
+        seats = [{'bbox': tuple(panel['bbox']), 'center': panel['center'], 'angle': panel['angle']}
+                 for panel in panels]
+        with self.lock:
+            self.layouts[key] = seats
+        logger.info("Раскладка стола %s запомнена: %s мест", key, len(seats))
+
+    def forget(self, key: tuple):
+        '''Удаляет раскладку (например, после пересадки или смены стола)'''
+        with self.lock:
+            self.layouts.pop(key, None)
+
+    def clear(self):
+        '''Удаляет все раскладки'''
+        with self.lock:
+            self.layouts.clear()
+
+
+# Общий кэш раскладок для всех кадров
+LAYOUT_CACHE = LayoutCache()
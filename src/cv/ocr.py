@@ -2,6 +2,19 @@ import pytesseract
 import cv2
 import numpy as np
 import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+from .ocr_strategy import OCR_STRATEGY
+
+# tesserocr держит движок Tesseract в памяти, вместо запуска tesseract.exe на каждый вызов
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
 
 # Настройка логгера для этого модуля
 logger = logging.getLogger(__name__)
@@ -9,18 +22,51 @@ logger = logging.getLogger(__name__)
 # Указываем путь к исполняемому файлу Tesseract
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
-def ocr_text(image_path, bbox, lang="rus", config="--psm 6", preprocess=True) -> str:
+# Папка с языковыми моделями для tesserocr (рядом с tesseract.exe)
+TESSDATA_PATH = os.path.join(os.path.dirname(pytesseract.pytesseract.tesseract_cmd), 'tessdata')
+
+# Движок OCR: 'tesserocr' (если установлен) или 'pytesseract'
+OCR_ENGINE = 'tesserocr' if tesserocr is not None else 'pytesseract'
+
+# Отступ вокруг bbox, который ocr_text добавляет к области распознавания (пиксели)
+OCR_MARGIN = 10
+
+# Количество потоков для параллельного OCR областей одного кадра
+OCR_WORKERS = 4
+
+# Пул потоков создается при первом обращении
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+# Экземпляры tesserocr не потокобезопасны, поэтому у каждого потока свои
+_THREAD_LOCAL = threading.local()
+
+def load_image(image: str | np.ndarray) -> np.ndarray | None:
+    '''
+    Функция возвращает кадр в памяти: массив возвращается как есть, путь декодируется с диска
+    :param image: путь к изображению или кадр BGR (NumPy массив)
+    :return: кадр BGR или None, если изображение не удалось загрузить
+    '''
+    if isinstance(image, np.ndarray):
+        return image
+
+    img = cv2.imread(image)
+    if img is None:
+        logger.error("Не удалось загрузить изображение %s", image)
+    return img
+
+def ocr_text(image_path, bbox, lang="rus", config="--psm 6", preprocess=True, scale=2) -> str:
     '''
     Функция для распознавания текста внутри заданного bbox
-    :param image_path: путь к изображению
+    :param image_path: кадр BGR (NumPy массив) или путь к изображению
     :param bbox: [x1, y1, x2, y2]
     :param config: конфигурация для Tesseract, по дефолту config="--psm 6", режим распознавания текста
     :param preprocess: флаг для предварительной обработки изображения, по дефолту preprocess=True
+    :param scale: во сколько раз увеличивать область при предобработке, по дефолту scale=2 (1 - без увеличения)
     :return: строка текста
     '''
-    img = cv2.imread(image_path)
+    img = load_image(image_path)
     if img is None:
-        logger.error("Не удалось загрузить изображение %s", image_path)
         return ""
 
     # Получаем размеры изображения
@@ -33,7 +79,7 @@ def ocr_text(image_path, bbox, lang="rus", config="--psm 6", preprocess=True) ->
         return ""
 
     # Ограничиваем координаты границами изображения с отступами
-    margin = 10
+    margin = OCR_MARGIN
     x1_safe = max(0, x1 - margin)      # Расширяем влево
     y1_safe = max(0, y1 - margin)      # Расширяем вверх
     x2_safe = min(img_width, x2 + margin)   # Расширяем вправо
@@ -44,7 +90,7 @@ def ocr_text(image_path, bbox, lang="rus", config="--psm 6", preprocess=True) ->
         logger.error("Область ROI пуста после коррекции. Исходный bbox: %s, размер изображения: %sx%s", bbox, img_width, img_height)
         return ""
 
-    # Извлекаем ROI
+    # Извлекаем ROI (срез - представление кадра, без копирования)
     roi = img[y1_safe:y2_safe, x1_safe:x2_safe]
 
     # Дополнительная проверка размера ROI
@@ -54,9 +100,9 @@ def ocr_text(image_path, bbox, lang="rus", config="--psm 6", preprocess=True) ->
 
     if preprocess:
         # Увеличиваем изображение для лучшего OCR
-        scale = 2
         try:
-            roi = cv2.resize(roi, (roi.shape[1]*scale, roi.shape[0]*scale), interpolation=cv2.INTER_CUBIC)
+            if scale != 1:
+                roi = cv2.resize(roi, (roi.shape[1]*scale, roi.shape[0]*scale), interpolation=cv2.INTER_CUBIC)
         except Exception as e:
             logger.error("Ошибка изменения размера ROI: %s, размер ROI: %s", e, roi.shape)
             return ""
@@ -73,9 +119,102 @@ def ocr_text(image_path, bbox, lang="rus", config="--psm 6", preprocess=True) ->
         # cv2.imwrite(f'debug_roi_{x1}.png', roi)
         # cv2.imwrite(f'debug_bw_{x1}.png', bw)
 
-        text = pytesseract.image_to_string(bw, lang=lang, config=config)
+        text = image_to_string(bw, lang=lang, config=config)
 
     else:
-        text = pytesseract.image_to_string(roi, lang=lang, config=config)
+        text = image_to_string(roi, lang=lang, config=config)
 
     return text.strip()
+
+def get_tess_api(lang: str, psm: int):
+    '''
+    Возвращает движок tesserocr текущего потока для языка и режима PSM, при первом обращении создает его
+    :param lang: язык
+    :param psm: режим сегментации страницы
+    :return: tesserocr.PyTessBaseAPI
+    '''
+    apis = getattr(_THREAD_LOCAL, 'apis', None)
+    if apis is None:
+        apis = _THREAD_LOCAL.apis = {}
+
+    key = (lang, psm)
+    if key not in apis:
+        if os.path.isdir(TESSDATA_PATH):
+            apis[key] = tesserocr.PyTessBaseAPI(path=TESSDATA_PATH, lang=lang, psm=psm)
+        else:
+            apis[key] = tesserocr.PyTessBaseAPI(lang=lang, psm=psm)
+    return apis[key]
+
+def image_to_string(img: np.ndarray, lang: str, config: str) -> str:
+    '''
+    Распознает текст на готовом изображении выбранным движком
+    :param img: изображение (оттенки серого или BGR)
+    :param lang: язык
+    :param config: конфигурация Tesseract, из нее используется --psm
+    :return: строка текста
+    '''
+    if OCR_ENGINE == 'tesserocr':
+        match = re.search(r'--psm\s+(\d+)', config)
+        psm = int(match.group(1)) if match else 3
+        if img.ndim == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        api = get_tess_api(lang, psm)
+        api.SetImage(Image.fromarray(img))
+        return api.GetUTF8Text()
+
+    return pytesseract.image_to_string(img, lang=lang, config=config)
+
+def get_executor() -> ThreadPoolExecutor:
+    '''Возвращает пул потоков OCR, при первом вызове создает его'''
+    global _EXECUTOR
+
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix='ocr')
+        return _EXECUTOR
+
+def ocr_first_match(image, bbox, attempts: list[dict], accept, region: str | None = None, skin: str = 'default') -> str:
+    '''
+    Распознает область, перебирая настройки OCR, пока текст не подойдет.
+    Если указан тип области, настройки перебираются в порядке их прошлой успешности (OCR_STRATEGY)
+    :param image: кадр BGR (NumPy массив) или путь к изображению
+    :param bbox: [x1, y1, x2, y2]
+    :param attempts: список именованных параметров ocr_text, например [{'lang': 'eng', 'config': '--psm 6'}]
+    :param accept: функция, которая по тексту решает, подходит ли он
+    :param region: тип области для статистики, например 'button' (None - без статистики)
+    :param skin: скин стола
+    :return: первый подходящий текст или текст последней попытки
+    '''
+    if region is not None:
+        attempts = OCR_STRATEGY.order_attempts(region, skin, attempts)
+
+    text = ""
+    results = []
+    for kwargs in attempts:
+        text = ocr_text(image, bbox, **kwargs)
+        success = bool(accept(text))
+        results.append((kwargs, success))
+        if success:
+            break
+
+    if region is not None:
+        OCR_STRATEGY.record(region, skin, results)
+    return text
+
+def ocr_regions(image, regions: list[tuple], skin: str = 'default') -> list[str]:
+    '''
+    Распознает несколько независимых областей одного кадра параллельно.
+    Время OCR кадра определяется самой медленной областью, а не суммой всех.
+    :param image: кадр BGR (NumPy массив), общий для всех потоков
+    :param regions: список (bbox, attempts, accept, region) - аргументы ocr_first_match
+    :param skin: скин стола для статистики OCR
+    :return: тексты областей в том же порядке
+    '''
+    if len(regions) <= 1 or OCR_WORKERS <= 1:
+        return [ocr_first_match(image, bbox, attempts, accept, region, skin)
+                for bbox, attempts, accept, region in regions]
+
+    executor = get_executor()
+    futures = [executor.submit(ocr_first_match, image, bbox, attempts, accept, region, skin)
+               for bbox, attempts, accept, region in regions]
+    return [future.result() for future in futures]
@@ -0,0 +1,162 @@
+# стратегия перебора настроек OCR: для каждого типа области и скина стола запоминаем,
+# какие PSM/язык срабатывали, и пробуем их первыми. Статистика сохраняется между запусками
+
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+
+def get_strategy_file_path():
+    """Получает путь к файлу статистики в зависимости от способа запуска"""
+    if getattr(sys, 'frozen', False):
+        # Запуск из .exe файла - файл рядом с exe
+        exe_dir = Path(sys.executable).parent
+        return str(exe_dir / "ocr_strategy.json")
+    else:
+        # Обычный запуск
+        return "ocr_strategy.json"
+
+STRATEGY_FILE = get_strategy_file_path()
+
+
+def attempt_key(attempt: dict) -> str:
+    '''
+    Строковый ключ настроек OCR, например "config=--psm 7|lang=eng"
+    :param attempt: именованные параметры ocr_text
+    :return: ключ
+    '''
+    return '|'.join(f"{name}={value}" for name, value in sorted(attempt.items()))
+
+
+class OcrStrategy:
+    '''
+    Статистика успешности настроек OCR по типам областей ('pot', 'stack', 'button') и скинам стола.
+    Порядок попыток: сначала настройки с большей долей успехов, неопробованные - в исходном порядке.
+    '''
+
+    def __init__(self, path: str | None = STRATEGY_FILE):
+        '''
+        :param path: путь к файлу статистики (None - только в памяти)
+        '''
+        self.path = path
+        self.lock = threading.Lock()
+        self.loaded = False
+        # (тип области, скин) -> ключ настроек -> [успехи, попытки]
+        self.attempts = {}
+        # (тип области, скин) -> [области, вызовы OCR]
+        self.regions = {}
+
+    def _load(self):
+        '''Читает статистику из файла при первом обращении (вызывается под self.lock)'''
+        if self.loaded:
+            return
+        self.loaded = True
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            for row in data:
+                group = (row['region'], row['skin'])
+                self.attempts[group] = row['attempts']
+                self.regions[group] = row['calls']
+            logger.info("Статистика OCR загружена: %s групп", len(data))
+        except (OSError, ValueError, KeyError) as e:
+            logger.error("Ошибка загрузки статистики OCR: %s", e)
+
+    def order_attempts(self, region: str, skin: str, attempts: list[dict]) -> list[dict]:
+        '''
+        Упорядочивает попытки по доле успехов (оценка (успехи + 1) / (попытки + 2), у неопробованных 0.5)
+        :param region: тип области
+        :param skin: скин стола
+        :param attempts: исходный список параметров ocr_text
+        :return: упорядоченный список
+        '''
+        with self.lock:
+            self._load()
+            stats = self.attempts.get((region, skin), {})
+
+            def score(attempt):
+                successes, tries = stats.get(attempt_key(attempt), (0, 0))
+                return (successes + 1) / (tries + 2)
+
+            return sorted(attempts, key=score, reverse=True)
+
+    def record(self, region: str, skin: str, results: list[tuple[dict, bool]]):
+        '''
+        Записывает результаты попыток распознавания одной области
+        :param region: тип области
+        :param skin: скин стола
+        :param results: список (параметры ocr_text, подошел ли текст)
+        '''
+        with self.lock:
+            self._load()
+            group = (region, skin)
+            stats = self.attempts.setdefault(group, {})
+            for attempt, success in results:
+                counters = stats.setdefault(attempt_key(attempt), [0, 0])
+                counters[0] += int(success)
+                counters[1] += 1
+            calls = self.regions.setdefault(group, [0, 0])
+            calls[0] += 1
+            calls[1] += len(results)
+
+    def calls_per_region(self, region: str, skin: str) -> float:
+        '''
+        Среднее количество вызовов OCR на одну область
+        :param region: тип области
+        :param skin: скин стола
+        :return: среднее или 0, если областей еще не было
+        '''
+        with self.lock:
+            self._load()
+            regions, calls = self.regions.get((region, skin), (0, 0))
+        return calls / regions if regions else 0.0
+
+    def stats(self) -> dict[str, dict]:
+        '''
+        Статистика по группам для логов
+        :return: словарь "тип/скин" -> {'regions', 'calls_per_region', 'attempts'}
+        '''
+        result = {}
+        with self.lock:
+            self._load()
+            for (region, skin), attempts in self.attempts.items():
+                regions, calls = self.regions.get((region, skin), (0, 0))
+                result[f"{region}/{skin}"] = {'regions': regions,
+                                              'calls_per_region': calls / regions if regions else 0.0,
+                                              'attempts': {key: list(counters) for key, counters in attempts.items()}}
+        return result
+
+    def save(self):
+        '''Записывает статистику в файл'''
+        if self.path is None:
+            return
+        with self.lock:
+            if not self.attempts:
+                return
+            data = [{'region': region,
+                     'skin': skin,
+                     'attempts': attempts,
+                     'calls': self.regions.get((region, skin), [0, 0])}
+                    for (region, skin), attempts in self.attempts.items()]
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            logger.info("Статистика OCR сохранена: %s групп", len(data))
+        except OSError as e:
+            logger.error("Ошибка сохранения статистики OCR: %s", e)
+
+
+# Общая стратегия для всех кадров
+OCR_STRATEGY = OcrStrategy()
+
+# Записываем статистику при завершении программы
+atexit.register(OCR_STRATEGY.save)
@@ -1,13 +1,15 @@
 # общий парсинг, сбор и вывод всей необходимой информации для best_action
 
-from .detect import detect_image, detect_cards
-from .ocr import ocr_text
+from .detect import detect_image, detect_images, detect_all_cards, detect_all_cards_batch, cards_in_bbox
+from .ocr import load_image, ocr_regions
+from .templates import recognize_button, recognize_number
+from .profiles import get_profile
+from .layout import LayoutCache, LAYOUT_MIN_CONF, seat_layout, match_seats
 from fuzzywuzzy import fuzz
 
 import sys
 import os
-import cv2
-import math
+import numpy as np
 import logging
 
 # Настройка логгера для этого модуля
@@ -80,23 +82,76 @@ def understand_button(text: str) -> str | None:
 
     return None
 
+def get_table_skin(img: np.ndarray) -> str:
+    '''
+    Функция определяет скин стола по цвету сукна: самый частый цвет центральной части кадра,
+    округленный до 32 уровней на канал. Карты доски и банк занимают меньшую часть центра,
+    поэтому, в отличие от среднего цвета, скин не меняется от улицы к улице
+    :param img: кадр BGR
+    :return: строка вида 'b-g-r', например '32-96-32'
+    '''
+    img_h, img_w = img.shape[:2]
+    # каждый второй пиксель - для частоты цвета этого достаточно
+    center = img[img_h // 3: 2 * img_h // 3: 2, img_w // 3: 2 * img_w // 3: 2, :3]
+    if center.size == 0:
+        return '0-0-0'
+    levels = center.reshape(-1, 3) // 32
+    codes = (levels[:, 0].astype(np.int32) * 8 + levels[:, 1]) * 8 + levels[:, 2]
+    code = int(np.bincount(codes, minlength=512).argmax())
+    return '-'.join(str(level * 32) for level in (code // 64, code // 8 % 8, code % 8))
+
+def region_key(region: str, bbox) -> tuple:
+    '''
+    Ключ области для кэша распознанных значений
+    :param region: тип области ('stack', 'button', 'pot')
+    :param bbox: [x1, y1, x2, y2]
+    :return: (тип, x1, y1, x2, y2)
+    '''
+    return (region, *(int(v) for v in bbox))
+
+def screenshot_to_frame(screenshot) -> np.ndarray:
+    '''
+    Функция переводит снимок экрана PIL (RGB) в кадр BGR для детекторов и OCR без записи на диск
+    :param screenshot: изображение PIL, например результат ImageGrab.grab
+    :return: кадр BGR (NumPy массив)
+    '''
+    rgb = np.asarray(screenshot.convert('RGB'))
+    return np.ascontiguousarray(rgb[:, :, ::-1])
+
 # Самая главная функция обработки изображения
-def parse_image(image_path: str, conf: float = 0.3) -> dict:
+def parse_image(image_path: str | np.ndarray,
+                conf: float | None = None,
+                detections: list[dict] | None = None,
+                card_detections: list[dict] | None = None,
+                profile: str | dict | None = None,
+                region_cache: dict | None = None,
+                layout_cache: LayoutCache | None = None) -> dict:
     '''
     Общий парсинг скриншота, вывод всей возможной информации.
-    :param image_path: путь к изображению
-    :param conf: базовое пороговое значение уверенности для фильтрации (по дефолту 0.3)
+    Изображение декодируется не больше одного раза, дальше детекторы и OCR работают с одним кадром в памяти.
+    :param image_path: кадр BGR (NumPy массив) или путь к изображению
+    :param conf: порог уверенности для карт (по дефолту None - из профиля, 0.3 в профиле accurate)
+    :param detections: готовые детекции объектов стола (None - посчитать для кадра)
+    :param card_detections: готовые детекции карт (None - посчитать для кадра при необходимости)
+    :param profile: профиль производительности 'fast' / 'balanced' / 'accurate' (None - профиль по умолчанию)
+    :param region_cache: распознанные значения областей {region_key: значение} с прошлого кадра;
+                         найденные области не распознаются заново, новые дописываются (None - без кэша)
+    :param layout_cache: кэш раскладок мест по размеру кадра и скину; панели привязываются к известным местам
+                         вместо пересчета углов и дублей (None - раскладка считается на каждом кадре)
     :return: словарь со всеми данными полученными из изображения
     '''
+    settings = get_profile(profile)
+    if conf is None:
+        conf = settings['card_conf']
+
     # Проверяем существование файла
-    if not os.path.exists(image_path):
+    if isinstance(image_path, str) and not os.path.exists(image_path):
         logger.error("Файл %s не существует", image_path)
         return {}
 
-    # Проверяем возможность загрузки изображения
-    img = cv2.imread(image_path)
+    # Загружаем изображение один раз (кадр в памяти используется как есть)
+    img = load_image(image_path)
     if img is None:
-        logger.error("Не удалось загрузить изображение %s", image_path)
         return {}
 
     img_h, img_w = img.shape[:2]
@@ -105,9 +160,9 @@ def parse_image(image_path: str, conf: float = 0.3) -> dict:
         return {}
 
     # список обнаруженных объектов
-    list_detect_images = detect_image(image_path=image_path,
-                                                            conf=0.4,
-                                                            save_img=False)
+    if detections is None:
+        detections = detect_image(image_path=img, conf=settings['table_conf'], save_img=False, imgsz=settings['imgsz'])
+    list_detect_images = detections
 
     # если нет обнаруженных объектов, то возвращаем None
     if len(list_detect_images) == 0:
@@ -132,16 +187,20 @@ def parse_image(image_path: str, conf: float = 0.3) -> dict:
     # размеры и центр изображения
     center_img = (img_w // 2, img_h // 2)
 
-    list_psm = ["--psm 6", "--psm 7", "--psm 8", "--psm 13"]
-    list_lang = ['eng', 'rus']
+    list_psm = settings['psm_configs']
+    list_lang = settings['button_langs']
+    ocr_scale = settings['ocr_scale']
     total_users = 0
     active_users = 0
     dict_active_buttons = {}
     list_player_panels = []
-    pot, pot_conf = 0, 0
+    pot, pot_conf, pot_det = 0, 0, None
+    panel_min_conf = 1.0
+    list_button_dets = []
     dealer_coor, dealer_conf = (0, 0), 0
     hero_coor, hero_card_conf = (0, 0), 0
     hero_card = []
+    # детекции карт считаются один раз на кадр, при первой нужной области
 
 
     # делаем первый цикл - уточнение параметров
@@ -150,12 +209,7 @@ def parse_image(image_path: str, conf: float = 0.3) -> dict:
         # уточняем размер банка - pot
         # если обнаружено несколько банков, то берется максимальный по уверенности
         if det['name'] == 'pot_box' and pot_conf < det['conf']:
-            # проверяем все конфигурации PSM
-            for psm in list_psm:
-                pot_text = ocr_text(image_path, det['bbox'], config=psm, preprocess=True)
-                pot, pot_conf = extract_number(pot_text), det['conf']
-                if pot != 0:
-                    break
+            pot_det, pot_conf = det, det['conf']
 
         # уточняем координаты фишки дилера - dealer
         # если обнаружено несколько фишек дилера, то берется максимальная по уверенности
@@ -169,29 +223,25 @@ def parse_image(image_path: str, conf: float = 0.3) -> dict:
             x1, y1, x2, y2 = det['bbox']
             hero_coor = (x1 + x2) // 2, (y1 + y2) // 2
             hero_card_conf = det['conf']
-            hero_card = detect_cards(image_path=image_path,
-                                                bbox=det['bbox'],
-                                                conf=conf,
-                                                save_img=False)
+            if card_detections is None:
+                card_detections = detect_all_cards(image_path=img, conf=conf, save_img=False, imgsz=settings['imgsz'])
+            hero_card = cards_in_bbox(card_detections, det['bbox'])
 
         # уточняем общее количество игроков - total_users
         if det['name'] == 'player_panel':
             total_users += 1
+            panel_min_conf = min(panel_min_conf, det['conf'])
             name_user = f'user_{total_users}'
             x1, y1, x2, y2 = det['bbox']
             center = ((x1 + x2) // 2, (y1 + y2) // 2)
-            for psm in list_psm:
-                ocr_text_ = ocr_text(image_path, det['bbox'], lang='eng', config=psm)
-                stack = extract_number(ocr_text_)
-                if stack != 0:
-                    break
+            # стек распознается позже, вместе с остальными областями кадра
             dict_player_panels = {
                 'name': name_user,
                 'bbox': det['bbox'],
                 'pos': None,
                 'angle': 0,
                 'center': center,
-                'stack': stack
+                'stack': 0
             }
             list_player_panels.append(dict_player_panels)
 
@@ -199,30 +249,15 @@ def parse_image(image_path: str, conf: float = 0.3) -> dict:
         if det['name'] == 'back_card':
             active_users += 1
 
-        # уточняем активные кнопки - action_button
+        # уточняем активные кнопки - action_button (распознаются позже, вместе с остальными областями)
         if det['name'] == 'action_button':
-            # проверяем все конфигурации PSM
-            for psm in list_psm:
-                for lang in list_lang:
-                    ocr_button = ocr_text(image_path,
-                                                det['bbox'],
-                                                lang=lang,
-                                                config=psm,
-                                                preprocess=False)
-                    action_button = understand_button(ocr_button)
-                    if action_button:
-                        dict_active_buttons[action_button] = det['bbox']
-                        if action_button == 'Call':
-                            to_call = extract_number(ocr_button)
-                            dict_result['to_call'] = to_call
-                        break
+            list_button_dets.append(det)
 
         # уточняем карты стола
         if det['name'] == 'board_card':
-            board_card = detect_cards(image_path=image_path,
-                                                bbox=det['bbox'],
-                                                conf=conf,
-                                                save_img=False)
+            if card_detections is None:
+                card_detections = detect_all_cards(image_path=img, conf=conf, save_img=False, imgsz=settings['imgsz'])
+            board_card = cards_in_bbox(card_detections, det['bbox'])
             dict_result['board_cards'] = list(set(board_card))
 
     # если нет игроков, то возвращаем пустой словарь
@@ -230,6 +265,82 @@ def parse_image(image_path: str, conf: float = 0.3) -> dict:
     if total_users == 0:
         return {}
 
+    # если раскладка этого стола уже известна, панели привязываются к местам:
+    # рамки мест не дрожат от кадра к кадру, а углы и порядок уже посчитаны
+    skin = get_table_skin(img)
+    layout_key = (img_w, img_h, skin)
+    layout_cached = False
+    if layout_cache is not None:
+        seats = layout_cache.get(layout_key)
+        if seats is not None:
+            snapped = match_seats(seats, list_player_panels)
+            if snapped is None:
+                logger.info("Раскладка стола %s изменилась", layout_key)
+                layout_cache.forget(layout_key)
+            else:
+                list_player_panels = snapped
+                layout_cached = True
+
+    # области, пиксели которых не менялись с прошлого кадра, берутся из кэша
+    cache = region_cache if region_cache is not None else {}
+    stack_keys = [region_key('stack', panel['bbox']) for panel in list_player_panels]
+    button_keys = [region_key('button', det['bbox']) for det in list_button_dets]
+    pot_key = region_key('pot', pot_det['bbox']) if pot_det is not None else None
+
+    # быстрый путь: шрифт клиента фиксированный, поэтому сначала пробуем шаблоны (если они обучены),
+    # области, где шаблоны не уверены, распознаются через OCR
+    fast_stacks = [cache[key] if key in cache else recognize_number(img, panel['bbox'])
+                   for key, panel in zip(stack_keys, list_player_panels)]
+    fast_buttons = [cache[key] if key in cache else recognize_button(img, det['bbox'])
+                    for key, det in zip(button_keys, list_button_dets)]
+    fast_pot = None
+    if pot_det is not None:
+        fast_pot = cache[pot_key] if pot_key in cache else recognize_number(img, pot_det['bbox'])
+
+    # OCR оставшихся областей кадра параллельно: банк, стеки игроков, кнопки
+    # в каждой области настройки перебираются, пока текст не подойдет,
+    # первыми пробуются настройки, которые чаще срабатывали для этого типа области и скина
+    def has_number(text):
+        return extract_number(text) != 0
+
+    def has_button(text):
+        return understand_button(text) is not None
+
+    number_attempts = [{'config': psm, 'preprocess': True, 'scale': ocr_scale} for psm in list_psm]
+    stack_attempts = [{'lang': 'eng', 'config': psm, 'scale': ocr_scale} for psm in list_psm]
+    button_attempts = [{'lang': lang, 'config': psm, 'preprocess': False} for psm in list_psm for lang in list_lang]
+
+    regions = [(panel['bbox'], stack_attempts, has_number, 'stack')
+               for panel, stack in zip(list_player_panels, fast_stacks) if stack is None]
+    regions += [(det['bbox'], button_attempts, has_button, 'button')
+                for det, button in zip(list_button_dets, fast_buttons) if button is None]
+    if pot_det is not None and fast_pot is None:
+        regions.append((pot_det['bbox'], number_attempts, has_number, 'pot'))
+    texts = iter(ocr_regions(img, regions, skin=skin) if regions else [])
+
+    for key, panel, stack in zip(stack_keys, list_player_panels, fast_stacks):
+        panel['stack'] = stack if stack is not None else extract_number(next(texts))
+        if region_cache is not None:
+            region_cache[key] = panel['stack']
+
+    for key, det, button in zip(button_keys, list_button_dets, fast_buttons):
+        if button is not None:
+            action_button, amount = button
+        else:
+            text = next(texts)
+            action_button, amount = understand_button(text), extract_number(text)
+        if region_cache is not None:
+            region_cache[key] = (action_button, amount)
+        if action_button:
+            dict_active_buttons[action_button] = det['bbox']
+            if action_button == 'Call':
+                dict_result['to_call'] = amount
+
+    if pot_det is not None:
+        pot = fast_pot if fast_pot is not None else extract_number(next(texts))
+        if region_cache is not None:
+            region_cache[pot_key] = pot
+
 
     dict_result['active'] = active_users
     dict_result['pot'] = pot
@@ -240,34 +351,12 @@ def parse_image(image_path: str, conf: float = 0.3) -> dict:
     board_card = set(dict_result['board_cards']) - set(dict_result['hero_cards'])
     dict_result['board_cards'] = list(board_card)
 
-    # Фильтруем дубли player_panel (по близости центров)
-    filtered_panels = []
-    used = set()
-    min_dist = 100  # минимальное расстояние между центрами для уникальных игроков
-    for i, panel_i in enumerate(list_player_panels):
-        if i in used:
-            continue
-        best_panel = panel_i
-        for j, panel_j in enumerate(list_player_panels):
-            if i != j and j not in used:
-                dist = dist_points(panel_i['center'], panel_j['center']) ** 0.5
-                if dist < min_dist:
-                    best_panel = panel_i
-                    used.add(j)
-                    total_users -= 1
-        filtered_panels.append(best_panel)
-        used.add(i)
-    list_player_panels = filtered_panels
-
-    # Считаем углы относительно центра картинки (по часовой стрелке)
-    for panel in list_player_panels:
-        dx = panel['center'][0] - center_img[0]  # смещение по x
-        dy = panel['center'][1] - center_img[1]  # смещение по y
-        angle = math.atan2(dy, dx)             # угол в радианах
-        panel['angle'] = round(angle, 2)
-
-    # Сортируем по углу (по часовой стрелке)
-    list_player_panels.sort(key=lambda p: p['angle'])
+    # Убираем дубли панелей, считаем углы и порядок мест, если раскладка еще не известна
+    if not layout_cached:
+        list_player_panels = seat_layout(list_player_panels, center_img)
+        if layout_cache is not None and panel_min_conf >= LAYOUT_MIN_CONF:
+            layout_cache.store(layout_key, list_player_panels)
+    total_users = len(list_player_panels)
 
     # Находим индекс игрока BTN (дилера)
     distances = list(map(lambda panel: dist_points(panel['center'], dealer_coor), list_player_panels))
@@ -307,3 +396,50 @@ def parse_image(image_path: str, conf: float = 0.3) -> dict:
 
 
     return dict_result
+
+
+def parse_images(images: list, conf: float | None = None, profile: str | dict | None = None) -> list[dict]:
+    '''
+    Парсинг нескольких кадров (разные столы или несколько снимков подряд).
+    Каждая модель делает один пакетный проход по всем кадрам, дальше кадры разбираются по отдельности.
+    :param images: список кадров BGR (NumPy массивов) или путей к изображениям
+    :param conf: порог уверенности для карт (по дефолту None - из профиля)
+    :param profile: профиль производительности (None - профиль по умолчанию)
+    :return: список словарей parse_image в том же порядке, что и кадры
+    '''
+    settings = get_profile(profile)
+    if conf is None:
+        conf = settings['card_conf']
+
+    frames = []
+    for image in images:
+        if isinstance(image, str) and not os.path.exists(image):
+            logger.error("Файл %s не существует", image)
+            frames.append(None)
+        else:
+            frames.append(load_image(image))
+
+    # Один пакетный проход модели стола по всем кадрам
+    loaded = [i for i, frame in enumerate(frames) if frame is not None and frame.size > 0]
+    table_detections = dict(zip(loaded, detect_images([frames[i] for i in loaded],
+                                                                conf=settings['table_conf'],
+                                                                imgsz=settings['imgsz'])))
+
+    # Один пакетный проход модели карт только по кадрам, где есть области карт
+    with_cards = [i for i in loaded
+                  if any(det['name'] in ('hero_card', 'board_card') for det in table_detections[i])]
+    card_detections = dict(zip(with_cards, detect_all_cards_batch([frames[i] for i in with_cards],
+                                                                           conf=conf,
+                                                                           imgsz=settings['imgsz'])))
+
+    results = []
+    for i, frame in enumerate(frames):
+        if i not in table_detections:
+            results.append({})
+            continue
+        results.append(parse_image(frame,
+                                   conf=conf,
+                                   detections=table_detections[i],
+                                   card_detections=card_detections.get(i, []),
+                                   profile=settings))
+    return results
@@ -0,0 +1,59 @@
+# профили производительности распознавания: размер входа детекторов, пороги уверенности и объем OCR
+# fast - минимальная задержка, accurate - исходные настройки парсера
+
+import logging
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+# Параметры профиля:
+# imgsz - размер входа моделей YOLO
+# table_conf - порог уверенности для объектов стола
+# card_conf - порог уверенности для карт
+# psm_configs - режимы Tesseract, которые перебираются, пока не найдется число/кнопка
+# button_langs - языки OCR для кнопок
+# ocr_scale - увеличение области перед OCR
+PROFILES = {
+    'fast': {
+        'imgsz': 512,
+        'table_conf': 0.4,
+        'card_conf': 0.35,
+        'psm_configs': ["--psm 7", "--psm 6"],
+        'button_langs': ['eng'],
+        'ocr_scale': 1,
+    },
+    'balanced': {
+        'imgsz': 640,
+        'table_conf': 0.4,
+        'card_conf': 0.3,
+        'psm_configs': ["--psm 6", "--psm 7", "--psm 13"],
+        'button_langs': ['eng', 'rus'],
+        'ocr_scale': 2,
+    },
+    'accurate': {
+        'imgsz': 768,
+        'table_conf': 0.4,
+        'card_conf': 0.3,
+        'psm_configs': ["--psm 6", "--psm 7", "--psm 8", "--psm 13"],
+        'button_langs': ['eng', 'rus'],
+        'ocr_scale': 2,
+    },
+}
+
+# Профиль по умолчанию совпадает с прежними настройками парсера
+DEFAULT_PROFILE = 'accurate'
+
+
+def get_profile(profile: str | dict | None = None) -> dict:
+    '''
+    Возвращает параметры профиля
+    :param profile: название профиля, готовый словарь параметров или None - профиль по умолчанию
+    :return: словарь параметров профиля
+    '''
+    if profile is None:
+        profile = DEFAULT_PROFILE
+    if isinstance(profile, dict):
+        return {**PROFILES[DEFAULT_PROFILE], **profile}
+    if profile not in PROFILES:
+        raise ValueError(f"неизвестный профиль распознавания: {profile}")
+    return PROFILES[profile]
@@ -0,0 +1,322 @@
+# быстрое распознавание кнопок и чисел шаблонами: шрифт у покерного клиента фиксированный,
+# поэтому слова на кнопках и цифры находятся сопоставлением с образцами быстрее, чем через Tesseract.
+# шаблоны обучаются один раз по размеченным вырезкам:
+#   python -m src.cv.templates data/templates
+# где data/templates/buttons/<Название>/*.png - вырезки слов на кнопках, название как в understand_button
+#                                                 ('/' заменяется на '_': Check_Fold -> 'Check / Fold'),
+#     data/templates/digits/<цифра>/*.png    - вырезки отдельных цифр (точка находится по высоте символа)
+# при низкой уверенности парсер возвращается к ocr_text
+
+import glob
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+# Размер, к которому приводится каждая цифра перед сравнением (высота, ширина)
+GLYPH_SIZE = (20, 14)
+
+# Минимальная корреляция для уверенного распознавания
+MIN_BUTTON_SCORE = 0.8
+MIN_DIGIT_SCORE = 0.75
+
+# Символы ниже этой доли от высоты цифр считаются десятичной точкой
+DOT_HEIGHT_RATIO = 0.35
+
+# Шум: компоненты меньше этого количества пикселей пропускаются
+MIN_GLYPH_AREA = 4
+
+def get_templates_file_path():
+    """Получает путь к файлу шаблонов в зависимости от способа запуска"""
+    if getattr(sys, 'frozen', False):
+        # Запуск из .exe файла
+        base_path = Path(sys._MEIPASS)
+        return str(base_path / "data" / "ocr_templates.npz")
+    else:
+        # Обычный запуск
+        return "data/ocr_templates.npz"
+
+TEMPLATES_FILE = get_templates_file_path()
+
+# Шаблоны загружаются при первом обращении
+_TEMPLATES = None
+_TEMPLATES_LOADED = False
+_TEMPLATES_LOCK = threading.Lock()
+
+
+def to_gray(img: np.ndarray) -> np.ndarray:
+    '''Переводит изображение BGR в оттенки серого (серое возвращается как есть)'''
+    if img.ndim == 3:
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return img
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    '''
+    Бинаризация Otsu, текст всегда белый на черном фоне
+    :param gray: изображение в оттенках серого
+    :return: бинарное изображение 0/255
+    '''
+    _, bw = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # фона больше, чем текста: если белого больше половины, значит текст темный
+    if np.count_nonzero(bw) > bw.size // 2:
+        bw = 255 - bw
+    return bw
+
+def normalize_glyph(glyph: np.ndarray) -> np.ndarray:
+    '''
+    Приводит вырезку символа к GLYPH_SIZE и нулевому среднему с единичной нормой
+    :param glyph: бинарная вырезка символа
+    :return: вектор признаков
+    '''
+    resized = cv2.resize(glyph, (GLYPH_SIZE[1], GLYPH_SIZE[0]), interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+    resized -= resized.mean()
+    norm = np.linalg.norm(resized)
+    return resized / norm if norm > 0 else resized
+
+def tight_crop(bw: np.ndarray) -> np.ndarray:
+    '''Обрезает бинарную вырезку по белым пикселям (символ - как после segment_lines, слово - без полей)'''
+    ys, xs = np.nonzero(bw)
+    if len(ys) == 0:
+        return bw
+    return bw[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+
+def crop_bbox(img: np.ndarray, bbox) -> np.ndarray:
+    '''Вырезка области кадра без копирования, с ограничением по границам'''
+    img_h, img_w = img.shape[:2]
+    x1, y1, x2, y2 = bbox
+    return img[max(0, y1):min(img_h, y2), max(0, x1):min(img_w, x2)]
+
+def segment_lines(bw: np.ndarray) -> list[list[tuple[int, np.ndarray, bool]]]:
+    '''
+    Делит бинарное изображение на строки текста, а строки - на символы слева направо.
+    Символ относится к строке, если перекрывается с ней по вертикали больше чем наполовину своей высоты
+    (точка целиком лежит внутри строки цифр)
+    :param bw: бинарное изображение, текст белый
+    :return: строки сверху вниз, в каждой - список (x, вырезка символа, похож ли на точку)
+    '''
+    n_labels, _, stats, _ = cv2.connectedComponentsWithStats(bw, connectivity=8)
+    components = [stats[i] for i in range(1, n_labels) if stats[i][cv2.CC_STAT_AREA] >= MIN_GLYPH_AREA]
+
+    # строки: [верх, низ, компоненты], компоненты перебираются от самых высоких, чтобы строку задавали цифры
+    lines = []
+    for component in sorted(components, key=lambda c: -c[cv2.CC_STAT_HEIGHT]):
+        top, height = component[cv2.CC_STAT_TOP], component[cv2.CC_STAT_HEIGHT]
+        for line in lines:
+            overlap = min(line[1], top + height) - max(line[0], top)
+            if overlap * 2 > height:
+                line[0], line[1] = min(line[0], top), max(line[1], top + height)
+                line[2].append(component)
+                break
+        else:
+            lines.append([top, top + height, [component]])
+
+    result = []
+    for _, _, line_components in sorted(lines, key=lambda line: line[0]):
+        max_height = max(c[cv2.CC_STAT_HEIGHT] for c in line_components)
+        glyphs = [(x, bw[y:y + h, x:x + w], h < DOT_HEIGHT_RATIO * max_height)
+                  for x, y, w, h, _ in line_components]
+        glyphs.sort(key=lambda glyph: glyph[0])
+        result.append(glyphs)
+    return result
+
+def train_templates(folder: str) -> dict[str, dict[str, list[np.ndarray]]]:
+    '''
+    Собирает шаблоны из папки с размеченными вырезками
+    :param folder: папка с подпапками buttons/<название> и digits/<символ>
+    :return: {'buttons': {название: [бинарные вырезки]}, 'digits': {символ: [векторы признаков]}}
+    '''
+    templates = {'buttons': {}, 'digits': {}}
+    for kind in templates:
+        for label_dir in sorted(glob.glob(os.path.join(folder, kind, '*'))):
+            label = os.path.basename(label_dir)
+            if kind == 'buttons':
+                label = label.replace('_', ' / ')
+            for path in sorted(glob.glob(os.path.join(label_dir, '*.png'))):
+                img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+                if img is None:
+                    logger.error("Не удалось загрузить шаблон %s", path)
+                    continue
+                # вырезка обрезается по тексту: поля вокруг слова не должны сдвигать правый край слова
+                bw = tight_crop(binarize(img))
+                sample = normalize_glyph(bw) if kind == 'digits' else bw
+                templates[kind].setdefault(label, []).append(sample)
+    return templates
+
+def save_templates(templates: dict, path: str = TEMPLATES_FILE):
+    '''
+    Сохраняет шаблоны в один файл .npz
+    :param templates: результат train_templates
+    :param path: путь к файлу
+    '''
+    arrays = {f"{kind}:{label}:{i}": sample
+              for kind, labels in templates.items()
+              for label, samples in labels.items()
+              for i, sample in enumerate(samples)}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    np.savez_compressed(path, **arrays)
+    logger.info("Шаблоны сохранены: %s (%s вырезок)", path, len(arrays))
+
+def load_templates(path: str = TEMPLATES_FILE) -> dict | None:
+    '''
+    Загружает шаблоны из файла
+    :param path: путь к файлу
+    :return: шаблоны или None, если файла нет (быстрый путь выключен)
+    '''
+    if not os.path.exists(path):
+        logger.info("Шаблоны не найдены: %s", path)
+        return None
+
+    templates = {'buttons': {}, 'digits': {}}
+    with np.load(path) as data:
+        for key in data.files:
+            kind, label, _ = key.split(':')
+            templates[kind].setdefault(label, []).append(data[key])
+    logger.info("Шаблоны загружены: %s", path)
+    return templates
+
+def get_templates() -> dict | None:
+    '''Возвращает шаблоны, при первом обращении загружает их'''
+    global _TEMPLATES, _TEMPLATES_LOADED
+
+    if not _TEMPLATES_LOADED:
+        with _TEMPLATES_LOCK:
+            if not _TEMPLATES_LOADED:
+                _TEMPLATES = load_templates()
+                _TEMPLATES_LOADED = True
+    return _TEMPLATES
+
+
+def match_button(img: np.ndarray, bbox, templates: dict | None = None) -> tuple[str | None, float, int]:
+    '''
+    Ищет на кнопке слово из шаблонов (cv2.matchTemplate, TM_CCOEFF_NORMED)
+    :param img: кадр BGR
+    :param bbox: [x1, y1, x2, y2] кнопки
+    :param templates: шаблоны (None - загруженные по умолчанию)
+    :return: (название или None, корреляция, x правого края найденного слова внутри кнопки)
+    '''
+    templates = templates if templates is not None else get_templates()
+    if not templates or not templates['buttons']:
+        return None, 0.0, 0
+
+    roi = crop_bbox(img, bbox)
+    if roi.size == 0:
+        return None, 0.0, 0
+    bw = binarize(to_gray(roi))
+
+    best_label, best_score, best_end = None, 0.0, 0
+    for label, samples in templates['buttons'].items():
+        for sample in samples:
+            if sample.shape[0] > bw.shape[0] or sample.shape[1] > bw.shape[1]:
+                continue
+            result = cv2.matchTemplate(bw, sample, cv2.TM_CCOEFF_NORMED)
+            _, score, _, location = cv2.minMaxLoc(result)
+            if score > best_score:
+                best_label, best_score, best_end = label, float(score), location[0] + sample.shape[1]
+    return best_label, best_score, best_end
+
+def read_line(glyphs: list[tuple[int, np.ndarray, bool]], labels: list[str], matrix: np.ndarray) -> tuple[str, float]:
+    '''
+    Читает одну строку символов
+    :param glyphs: результат segment_lines для одной строки
+    :param labels: символы шаблонов
+    :param matrix: векторы признаков шаблонов (строка на шаблон)
+    :return: (строка из цифр и точек, минимальная корреляция по символам; 0 - не удалось)
+    '''
+    text, min_score = "", 1.0
+    for _, glyph, is_dot in glyphs:
+        if is_dot:
+            text += '.'
+            continue
+        scores = matrix @ normalize_glyph(glyph)
+        best = int(np.argmax(scores))
+        text += labels[best]
+        min_score = min(min_score, float(scores[best]))
+
+    if not text.strip('.'):
+        return "", 0.0
+    return text, min_score
+
+def read_digits(img: np.ndarray, bbox, templates: dict | None = None) -> tuple[str, float]:
+    '''
+    Читает число посимвольно: каждый символ сравнивается с шаблонами цифр по корреляции.
+    В области может быть несколько строк (имя игрока над стеком): читается только нижняя строка,
+    как и extract_number берет число с конца текста. Символы других строк в число не попадают
+    :param img: кадр BGR или уже вырезанная область (тогда bbox = None)
+    :param bbox: [x1, y1, x2, y2] или None
+    :param templates: шаблоны (None - загруженные по умолчанию)
+    :return: (строка из цифр и точек, минимальная корреляция по символам; 0 - не удалось)
+    '''
+    templates = templates if templates is not None else get_templates()
+    if not templates or not templates['digits']:
+        return "", 0.0
+
+    roi = crop_bbox(img, bbox) if bbox is not None else img
+    if roi.size == 0:
+        return "", 0.0
+
+    # матрица шаблонов: строка - вырезка, метка - символ
+    labels, vectors = [], []
+    for label, samples in templates['digits'].items():
+        for sample in samples:
+            labels.append(label)
+            vectors.append(sample)
+    if not vectors:
+        return "", 0.0
+    matrix = np.stack(vectors)
+
+    lines = segment_lines(binarize(to_gray(roi)))
+    if not lines:
+        return "", 0.0
+    return read_line(lines[-1], labels, matrix)
+
+def recognize_number(img: np.ndarray, bbox) -> float | None:
+    '''
+    Быстрое чтение числа шаблонами
+    :param img: кадр BGR
+    :param bbox: [x1, y1, x2, y2]
+    :return: число или None, если уверенности не хватает (тогда нужен OCR)
+    '''
+    text, score = read_digits(img, bbox)
+    if score < MIN_DIGIT_SCORE or text.count('.') > 1:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def recognize_button(img: np.ndarray, bbox) -> tuple[str, float] | None:
+    '''
+    Быстрое распознавание кнопки шаблонами: название и сумма справа от слова (если есть)
+    :param img: кадр BGR
+    :param bbox: [x1, y1, x2, y2]
+    :return: (название, сумма или 0.0) или None, если уверенности не хватает (тогда нужен OCR)
+    '''
+    label, score, word_end = match_button(img, bbox)
+    if label is None or score < MIN_BUTTON_SCORE:
+        return None
+
+    x1, y1, x2, y2 = bbox
+    amount = 0.0
+    if x1 + word_end < x2:
+        text, digit_score = read_digits(img, [x1 + word_end, y1, x2, y2])
+        if text:
+            if digit_score < MIN_DIGIT_SCORE:
+                return None
+            try:
+                amount = float(text)
+            except ValueError:
+                return None
+    return label, amount
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    folder = sys.argv[1] if len(sys.argv) > 1 else "data/templates"
+    save_templates(train_templates(folder))
@@ -33,11 +33,26 @@ import threading                   # Для асинхронных операц
 import queue                       # Для безопасной передачи данных между потоками
 import glob                        # Для поиска файлов по маске
 
-from src.cv.parser import parse_image
-from src.pokerlogic.best_action import best_action
+from src.cv.parser import screenshot_to_frame
+from src.cv.incremental import IncrementalParser
+from src.cv.detect import warm_up_models
+from src.cv.frame_diff import FrameChangeDetector
+from src.pokerlogic.best_action import best_action, warm_up_equity
+from src.pokerlogic.game_state import GameStateTracker
+from src.pokerlogic.speculative import EquityPrecomputer
 
 n_simulations = 10000
 
+# Профиль распознавания: 'fast', 'balanced' или 'accurate' (см. src/cv/profiles.py)
+PARSE_PROFILE = 'accurate'
+
+# Архив скриншотов для отладки: каждый N-й кадр сохраняется в фоне (0 - архив выключен)
+ARCHIVE_EVERY = 0
+ARCHIVE_DIR = "screenshots"
+ARCHIVE_MAX_FILES = 10
+# Если фоновая запись не успевает, лишние кадры не копятся в памяти, а пропускаются
+ARCHIVE_QUEUE_SIZE = 4
+
 
 class PokerCalculatorGUI:
     '''Класс для создания и управления графическим интерфейсом приложения'''
@@ -73,6 +88,20 @@ class PokerCalculatorGUI:
         self.result_queue = queue.Queue()
         self.last_analysis_result = None
 
+        # В авто анализе неизменившиеся кадры не разбираются заново
+        self.frame_detector = FrameChangeDetector()
+        # Детекции прошлого кадра переиспользуются, заново распознаются только изменившиеся области
+        self.frame_parser = IncrementalParser(conf=0.4, profile=PARSE_PROFILE)
+        # Состояние раздачи между кадрами: расчет только на новой раздаче, улице или ходе героя
+        self.game_tracker = GameStateTracker()
+        # Equity считается в фоне, пока соперники думают, к ходу героя результат уже в кэше
+        self.equity_precomputer = EquityPrecomputer(n_simulations)
+
+        # Фоновый архив скриншотов
+        self.frame_counter = 0
+        self.archive_queue = queue.Queue(maxsize=ARCHIVE_QUEUE_SIZE)
+        self.archive_thread = None
+
         # Установка иконки (если файл существует)
         try:
             self.root.iconbitmap('poker.ico')
@@ -166,6 +195,10 @@ class PokerCalculatorGUI:
         # Запуск проверки очереди результатов
         self.check_result_queue()
 
+        # Прогрев моделей и расчета equity, когда окно уже отрисовано и ждет пользователя
+        self.warm_up_thread = None
+        self.root.after_idle(self.start_warm_up)
+
     def show_additional_buttons(self):
         '''Показывает кнопки "Стоп", "Анализ" и "Авто анализ" справа от "Область"'''
         self.stop_button.grid(row=0, column=1, padx=(5, 5))
@@ -266,6 +299,12 @@ class PokerCalculatorGUI:
 
             self.selection_coords = (x1, y1, x2, y2)
 
+            # Новая область - прежний результат к ней не относится
+            self.frame_detector.reset()
+            self.frame_parser.reset()
+            self.game_tracker.reset()
+            self.last_analysis_result = None
+
         # Закрываем overlay и показываем дополнительные кнопки
         self.close_overlay()
         self.show_additional_buttons()
@@ -279,6 +318,7 @@ class PokerCalculatorGUI:
         self.continuous_button.config(text="Авто анализ")
 
         self.selection_coords = None
+        self.equity_precomputer.cancel()
         self.hide_additional_buttons()
         # Обновляем статус через специальное сообщение
         self.result_queue.put(('status', "Анализ остановлен"))
@@ -317,31 +357,52 @@ class PokerCalculatorGUI:
                 # Проверяем размер полученного изображения
                 img_width, img_height = screenshot.size
 
-                # Генерируем имя файла с временной меткой
-                timestamp = int(time.time())
-                filename = f"screenshot_{timestamp}.png"
-                filepath = os.path.join(os.getcwd(), filename)
+                # Номер кадра вместо файла на диске
+                self.frame_counter += 1
+                frame_name = f"frame_{self.frame_counter}"
 
-                # Сохраняем скриншот
-                screenshot.save(filepath)
+                # Каждый ARCHIVE_EVERY-й кадр сохраняем в фоне для отладки
+                if ARCHIVE_EVERY and self.frame_counter % ARCHIVE_EVERY == 0:
+                    self.archive_screenshot(screenshot)
 
-                # Очищаем старые скриншоты, оставляя только 10 последних
-                self.cleanup_old_screenshots(max_screenshots=10)
+                # В авто анализе кадр без изменений не разбираем, оставляем прошлый результат
+                frame = screenshot_to_frame(screenshot)
+                frame_changed = self.frame_detector.changed(frame)
+                if self.continuous_analysis and not frame_changed and self.last_analysis_result is not None:
+                    self.result_queue.put(('status', f"{frame_name}: без изменений. {self.last_analysis_result}"))
+                    time.sleep(2.0)
+                    continue
 
                 # Начало анализа изображения
                 start_time = time.time()
                 self.result_queue.put('--------------------------------------------------------')
 
-                status_message = f"{filename}, {img_width}x{img_height}"
+                status_message = f"{frame_name}, {img_width}x{img_height}"
                 self.result_queue.put(status_message)
 
                 message = "Анализ: ⌛️"
                 self.result_queue.put(message)
 
-                # Парсинг изображения
-                dict_image = parse_image(image_path=filepath, conf=0.4)
+                # Парсинг кадра прямо из памяти, без записи PNG
+                dict_image = self.frame_parser.parse(frame)
+                events = self.game_tracker.update(dict_image)
+
+                # Как только известны карты и количество соперников, equity начинает считаться в фоне;
+                # при смене доски или количества игроков устаревший расчет отменяется
+                if self.game_tracker.state:
+                    state = self.game_tracker.state
+                    self.equity_precomputer.submit(state['hero_cards'], state['board_cards'], state['active'])
+
+                if len(dict_image) > 0 and self.continuous_analysis and not events and self.last_analysis_result is not None:
+                    # Ни новой раздачи, ни новой улицы, ни хода героя, ни уточнения чисел на ходе героя - расчет не повторяем
+                    self.result_queue.put(('status', f"{frame_name}: без новых событий. {self.last_analysis_result}"))
+
+                elif len(dict_image) > 0:
+                    # Сглаженное по нескольким кадрам состояние раздачи
+                    dict_image = self.game_tracker.state
+                    if events:
+                        self.result_queue.put(f"События: {', '.join(events)}")
 
-                if len(dict_image) > 0:
                     text_game = f"Игра: {dict_image['street']} - {dict_image['hero_pos']} - Pot {dict_image['pot']} - Stack {dict_image['hero_stack']}"
                     if dict_image['to_call'] > 0:
                         text_game += f" - To Call {dict_image['to_call']}"
@@ -366,7 +427,8 @@ class PokerCalculatorGUI:
                                                                 bb=1,
                                                                 hero_stack=dict_image['hero_stack'],
                                                                 to_call=to_call,
-                                                                n_simulations=n_simulations)
+                                                                n_simulations=n_simulations,
+                                                                adaptive=True)
                     text_actions = "Действия: "
                     for action, value in dict_action.items():
                         action_name, action_amount = action.split('_')
@@ -377,11 +439,13 @@ class PokerCalculatorGUI:
                     self.result_queue.put(('status', text_actions))
                     # И также в общий поток результатов
                     self.result_queue.put(text_actions)
+                    self.last_analysis_result = text_actions
 
                 else:
                     error_msg = "Ошибка: это не покерная сессия"
                     self.result_queue.put(('status', error_msg))
                     self.result_queue.put(error_msg)
+                    self.last_analysis_result = error_msg
 
                 end_time = time.time()
                 self.result_queue.put(f"Время: {end_time - start_time:.3f} секунд")
@@ -437,8 +501,11 @@ class PokerCalculatorGUI:
         if self.overlay_window:
             self.overlay_window.destroy()
 
-        # Очищаем все скриншоты при выходе
-        self.cleanup_old_screenshots(max_screenshots=0)
+        # Дожидаемся записи архива скриншотов
+        self.stop_archive()
+
+        # Останавливаем фоновый расчет equity
+        self.equity_precomputer.shutdown()
 
         self.root.quit()
         self.root.destroy()
@@ -481,11 +548,51 @@ class PokerCalculatorGUI:
         # Планируем следующую проверку
         self.root.after(100, self.check_result_queue)
 
+    def archive_screenshot(self, screenshot):
+        '''
+        Ставит скриншот в очередь фоновой записи, при первом вызове запускает поток записи.
+        Если очередь заполнена, кадр пропускается, анализ не ждет диск.
+        :param screenshot: изображение PIL
+        '''
+        if self.archive_thread is None:
+            self.archive_thread = threading.Thread(target=self.archive_worker, daemon=True)
+            self.archive_thread.start()
+
+        try:
+            self.archive_queue.put_nowait((self.frame_counter, screenshot))
+        except queue.Full:
+            logger.warning("Архив скриншотов не успевает, кадр %s пропущен", self.frame_counter)
+
+    def archive_worker(self):
+        '''Фоновая запись скриншотов в ARCHIVE_DIR, храним только ARCHIVE_MAX_FILES последних'''
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        while True:
+            item = self.archive_queue.get()
+            if item is None:
+                break
+
+            frame_number, screenshot = item
+            filename = f"screenshot_{int(time.time())}_{frame_number}.png"
+            try:
+                screenshot.save(os.path.join(ARCHIVE_DIR, filename))
+            except OSError as e:
+                logger.error("Ошибка сохранения скриншота %s: %s", filename, e)
+
+            self.cleanup_old_screenshots(max_screenshots=ARCHIVE_MAX_FILES)
+
+    def stop_archive(self):
+        '''Останавливает поток записи архива, дописав уже поставленные в очередь кадры'''
+        if self.archive_thread is None:
+            return
+        self.archive_queue.put(None)
+        self.archive_thread.join(timeout=5)
+        self.archive_thread = None
+
     def cleanup_old_screenshots(self, max_screenshots=10):
-        '''Удаляет старые скриншоты, оставляя только указанное количество последних'''
+        '''Удаляет старые скриншоты архива, оставляя только указанное количество последних'''
         try:
-            # Ищем все файлы скриншотов по паттерну
-            screenshot_pattern = "*.png"
+            # Ищем файлы скриншотов только в папке архива
+            screenshot_pattern = os.path.join(ARCHIVE_DIR, "screenshot_*.png")
             screenshot_files = glob.glob(screenshot_pattern)
 
             # Если max_screenshots = 0, удаляем все файлы
@@ -512,6 +619,22 @@ class PokerCalculatorGUI:
         except Exception as e:
             logger.error("Ошибка очистки скриншотов: %s", e)
 
+    def start_warm_up(self):
+        '''Запускает прогрев в фоновом потоке, чтобы окно не зависало'''
+        self.warm_up_thread = threading.Thread(target=self.warm_up_worker, daemon=True)
+        self.warm_up_thread.start()
+
+    def warm_up_worker(self):
+        '''Загружает модели и готовит расчет equity до первого анализа'''
+        start_time = time.time()
+        try:
+            warm_up_models()
+            warm_up_equity()
+            logger.info("Прогрев завершен за %.3f секунд", time.time() - start_time)
+        except Exception as e:
+            # При ошибке прогрева модели загрузятся при первом анализе
+            logger.error("Ошибка прогрева: %s", e)
+
     def log_system_info(self):
         '''Выводит информацию о системе'''
         logger.info("Операционная система: %s", os.name)
@@ -1,148 +1,469 @@
+import atexit
 import hashlib
-import pickle
-import os
 import sys
 import logging
+import threading
+from contextlib import contextmanager
 from functools import lru_cache
 from math import comb
+from statistics import NormalDist
 import numpy as np
 from pathlib import Path
 
-from treys import Evaluator, Deck, Card
-import random
+from treys import Evaluator, Card
 
 # Настройка логгера для этого модуля
 logger = logging.getLogger(__name__)
 
 try:
     from .available_actions import get_available_actions
+    from .equity_engine import (cards_to_indices, index_to_card, remaining_deck, make_rng, deal_chunks, get_rank_table,
+                                simulate_equity_counts, enumerate_equity_counts, EquityStats)
+    from .preflop_table import lookup_preflop_counts
+    from .canonical import canonicalize, pack_key
+    from .equity_cache import MemoryCache, SQLiteCache
+    from .parallel import simulate_equity_parallel
+    from .ranges import range_to_weights, simulate_range_equity_counts
 except ImportError:
     from available_actions import get_available_actions
+    from equity_engine import (cards_to_indices, index_to_card, remaining_deck, make_rng, deal_chunks, get_rank_table,
+                               simulate_equity_counts, enumerate_equity_counts, EquityStats)
+    from preflop_table import lookup_preflop_counts
+    from canonical import canonicalize, pack_key
+    from equity_cache import MemoryCache, SQLiteCache
+    from parallel import simulate_equity_parallel
+    from ranges import range_to_weights, simulate_range_equity_counts
 
 # Глобальный evaluator для переиспользования
 EVALUATOR = Evaluator()
 
-# Кэш для equity расчетов
-EQUITY_CACHE = {}
+# Максимальное количество раздач, при котором equity считается точным перебором вместо Монте-Карло
+EXACT_ENUMERATION_BUDGET = 500_000
+
+# Минимальное количество симуляций, которое досчитывается за один раз
+MIN_SIMULATION_BATCH = 500
+
+# Уровень доверия и первый блок симуляций для адаптивной остановки
+ADAPTIVE_CONFIDENCE = 0.95
+ADAPTIVE_FIRST_CHUNK = 500
+
+# Количество процессов для симуляций equity (1 - считать в текущем процессе)
+EQUITY_WORKERS = 1
+
+# Бит пространства ключей расчетов против диапазона: pack_key занимает младшие 46 бит и его не ставит
+RANGE_KEY_TAG = 1 << 62
+
+# Бэкенд кэша equity: 'sqlite' - с сохранением в файл, 'memory' - только в памяти
+EQUITY_CACHE_BACKEND = 'sqlite'
 
 def get_cache_file_path():
     """Получает путь к файлу кэша в зависимости от способа запуска"""
     if getattr(sys, 'frozen', False):
         # Запуск из .exe файла
         exe_dir = Path(sys.executable).parent
-        return str(exe_dir / "equity_cache.pickle")
+        return str(exe_dir / "equity_cache.sqlite3")
     else:
         # Обычный запуск
-        return "equity_cache.pickle"
+        return "equity_cache.sqlite3"
 
 CACHE_FILE = get_cache_file_path()
 
+def create_equity_cache(backend: str = EQUITY_CACHE_BACKEND, path: str = CACHE_FILE):
+    """
+    Создает кэш equity. Файл не читается при создании, записи подгружаются по мере обращения
+    :param backend: 'sqlite' или 'memory'
+    :param path: путь к файлу кэша (для 'sqlite')
+    :return: объект кэша
+    """
+    if backend == 'sqlite':
+        return SQLiteCache(path)
+    if backend == 'memory':
+        return MemoryCache()
+    raise ValueError(f"неизвестный backend кэша equity: {backend}")
+
+# Кэш для equity расчетов
+EQUITY_CACHE = create_equity_cache()
+
+# Блокировки ключей, которые сейчас досчитываются: [блокировка, количество ожидающих потоков]
+_KEY_LOCKS = {}
+_KEY_LOCKS_GUARD = threading.Lock()
+
+@contextmanager
+def computing_key(cache_key):
+    """
+    Один ключ кэша досчитывается одним потоком: если ключ уже считает фоновый расчет,
+    best_action ждет окончания его блока и берет накопленные симуляции из кэша, а не считает их заново
+    :param cache_key: ключ кэша equity
+    """
+    with _KEY_LOCKS_GUARD:
+        entry = _KEY_LOCKS.setdefault(cache_key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _KEY_LOCKS_GUARD:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _KEY_LOCKS[cache_key]
+
 def load_equity_cache():
-    """Загружает кэш equity из файла"""
-    global EQUITY_CACHE
-
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, 'rb') as f:
-                EQUITY_CACHE = pickle.load(f)
-            logger.info("Кэш equity загружен: %s записей", len(EQUITY_CACHE))
-        except Exception as e:
-            logger.error("Ошибка загрузки кэша: %s", e)
-            EQUITY_CACHE = {}
-    else:
-        logger.info("Файл кэша не найден, создается новый кэш")
+    """Открывает файл кэша заранее, чтобы не платить за это при первом расчете"""
+    if isinstance(EQUITY_CACHE, SQLiteCache):
+        logger.info("Кэш equity загружен: %s записей в файле", EQUITY_CACHE.disk_size())
 
 def save_equity_cache():
-    """Сохраняет кэш equity в файл"""
-    try:
-        with open(CACHE_FILE, 'wb') as f:
-            pickle.dump(EQUITY_CACHE, f)
-        logger.info("Кэш equity сохранен: %s записей", len(EQUITY_CACHE))
-    except Exception as e:
-        logger.error("Ошибка сохранения кэша: %s", e)
+    """Записывает в файл накопленные записи кэша equity"""
+    EQUITY_CACHE.flush()
+    logger.info("Кэш equity сохранен, статистика: %s", EQUITY_CACHE.stats())
+
+# Записываем накопленные записи при завершении программы
+atexit.register(save_equity_cache)
 
-def get_cache_key(hero_cards: list, board_cards: list, active: int) -> str:
+def warm_up_equity():
     """
-    Создает ключ для кэширования equity. Сортируем руку и доску для консистентности
-    :param hero_cards: рука игрока
-    :param board: доска
+    Прогрев расчета equity: строит таблицу рангов и открывает файл кэша.
+    Вызывается в свободное время (например, из фонового потока GUI), чтобы не платить за это при первом расчете
+    """
+    get_rank_table()
+    load_equity_cache()
+    logger.info("Расчет equity прогрет")
+
+def get_cache_key(hero_cards: np.ndarray, board_cards: np.ndarray, active: int) -> int:
+    """
+    Создает ключ для кэширования equity. Рука и доска приводятся к представителю
+    класса изоморфизма мастей, поэтому руки, отличающиеся только мастями, делят одну запись
+    :param hero_cards: индексы карт руки игрока
+    :param board_cards: индексы карт доски
+    :param active: количество активных игроков
+    :return: ключ для кэширования equity (целое число)
+    """
+    canonical_hero, canonical_board = canonicalize(hero_cards, board_cards)
+
+    return pack_key(canonical_hero, canonical_board, active)
+
+def get_range_cache_key(hero_cards: np.ndarray, board_cards: np.ndarray, active: int, weights: np.ndarray) -> int:
+    """
+    Создает ключ кэша для расчета против диапазона. Диапазон может быть несимметричным по мастям,
+    поэтому карты не канонизируются, а ключ - 62-битный хэш карт и весов диапазона с битом RANGE_KEY_TAG,
+    чтобы он не совпал с ключом get_cache_key
+    :param hero_cards: индексы карт руки игрока
+    :param board_cards: индексы карт доски
     :param active: количество активных игроков
-    :return: ключ для кэширования equity
+    :param weights: веса 1326 комбинаций диапазона
+    :return: ключ для кэширования equity (целое число)
     """
-    sorted_hand = sorted(hero_cards)
-    sorted_board = sorted(board_cards)
-    key_data = f"{sorted_hand}_{sorted_board}_{active}"
+    packed = pack_key(tuple(sorted(hero_cards.tolist())), tuple(sorted(board_cards.tolist())), active)
+    digest = hashlib.blake2b(packed.to_bytes(8, 'little') + weights.tobytes(), digest_size=8).digest()
 
-    return hashlib.md5(key_data.encode()).hexdigest()
+    return RANGE_KEY_TAG | (int.from_bytes(digest, 'little') >> 2)
 
-def calculate_equity_fast(hero_cards: list, board_cards: list, active: int, n_simulations: int) -> float:
+def count_exact_deals(n_remaining: int, cards_missing: int, n_villains: int) -> int:
     """
-    Быстрый расчет equity с оптимизацией кеша
+    Считает количество раздач для точного перебора: варианты доски и наборы рук противников
+    :param n_remaining: количество неизвестных карт в колоде
+    :param cards_missing: сколько карт не хватает до полной доски
+    :param n_villains: количество противников
+    :return: количество раздач
+    """
+    deals = comb(n_remaining, cards_missing)
+    cards_left = n_remaining - cards_missing
+    for i in range(n_villains):
+        deals *= comb(cards_left - 2 * i, 2)
+
+    # Порядок противников не важен
+    for i in range(2, n_villains + 1):
+        deals //= i
+
+    return deals
+
+def simulate_equity_treys(hero_cards: list,
+                          board_cards: list,
+                          active: int,
+                          n_simulations: int,
+                          rng: np.random.Generator | int | None = None) -> tuple[int, int]:
+    """
+    Эталонная симуляция на treys: одна итерация цикла на симуляцию.
+    Оставлена для сравнения результатов с векторизованным движком: раздачи берутся
+    из того же генератора, что и в движке NumPy, поэтому при одном зерне счетчики совпадают точно.
     :param hero_cards: рука игрока
     :param board_cards: доска
     :param active: количество активных игроков
     :param n_simulations: количество симуляций
-    :return: equity
+    :param rng: генератор или зерно случайных чисел (None - случайное зерно)
+    :return: (wins, ties)
     """
-    # Проверяем кэш
-    list_hero_cards = [str(c) for c in hero_cards]
-    list_board_cards = [str(c) for c in board_cards]
-    cache_key = get_cache_key(list_hero_cards, list_board_cards, active)
-    if cache_key in EQUITY_CACHE:
-        return EQUITY_CACHE[cache_key]
-
-    # Создаем одну колоду и убираем известные карты
-    remaining_cards = []
-    deck = Deck()
-    used_cards = set(hero_cards + board_cards)
-    remaining_cards = [c for c in deck.cards if c not in used_cards]
+    rng = make_rng(rng)
+
+    # Убираем известные карты, колода упорядочена так же, как в движке NumPy
+    remaining = remaining_deck(cards_to_indices(hero_cards), cards_to_indices(board_cards))
+    remaining_cards = [index_to_card(c) for c in remaining.tolist()]
+    cards_needed = 2 * (active - 1) + 5 - len(board_cards)
 
     wins = ties = losses = 0
 
     # Цикл симуляций
-    for _ in range(n_simulations):
-        # Перемешиваем оставшиеся карты
-        random.shuffle(remaining_cards)
-
-        # Раздаем карты противникам
-        card_index = 0
-        villains = []
-        for _ in range(active - 1):
-            villain = remaining_cards[card_index:card_index + 2]
-            villains.append(villain)
-            card_index += 2
-
-        # Добираем доску до 5 карт, если у нас не Ривер
-        sim_board = board_cards[:]
-        cards_needed = 5 - len(sim_board)
-        if cards_needed > 0:
-            sim_board.extend(remaining_cards[card_index:card_index + cards_needed])
-
-        # Оценка рук
-        hero_score = EVALUATOR.evaluate(sim_board, hero_cards)
-
-        # Находим лучшего противника
-        best_villain_score = float('inf')
-        for villain in villains:
-            villain_score = EVALUATOR.evaluate(sim_board, villain)
-            if villain_score < best_villain_score:
-                best_villain_score = villain_score
-
-        # Подсчет результатов (в treys меньше = лучше)
-        if hero_score < best_villain_score:
-            wins += 1
-        elif hero_score == best_villain_score:
-            ties += 1
-        else:
-            losses += 1
-
-    equity = (wins + 0.3 * ties) / n_simulations
-
-    # Кэшируем результат
-    EQUITY_CACHE[cache_key] = equity
-
-    return equity
+    for chunk in deal_chunks(len(remaining_cards), cards_needed, n_simulations, rng):
+        for order in chunk.tolist():
+            dealt = [remaining_cards[i] for i in order]
+
+            # Раздаем карты противникам
+            card_index = 0
+            villains = []
+            for _ in range(active - 1):
+                villain = dealt[card_index:card_index + 2]
+                villains.append(villain)
+                card_index += 2
+
+            # Добираем доску до 5 карт, если у нас не Ривер
+            sim_board = board_cards + dealt[card_index:]
+
+            # Оценка рук
+            hero_score = EVALUATOR.evaluate(sim_board, hero_cards)
+
+            # Находим лучшего противника
+            best_villain_score = float('inf')
+            for villain in villains:
+                villain_score = EVALUATOR.evaluate(sim_board, villain)
+                if villain_score < best_villain_score:
+                    best_villain_score = villain_score
+
+            # Подсчет результатов (в treys меньше = лучше)
+            if hero_score < best_villain_score:
+                wins += 1
+            elif hero_score == best_villain_score:
+                ties += 1
+            else:
+                losses += 1
+
+    return wins, ties
+
+def run_equity_simulations(hero_cards: list,
+                           board_cards: list,
+                           active: int,
+                           n_simulations: int,
+                           backend: str = 'numpy',
+                           workers: int = EQUITY_WORKERS,
+                           range_weights: np.ndarray | None = None,
+                           rng: np.random.Generator | int | None = None) -> EquityStats:
+    """
+    Запускает серию симуляций выбранным движком
+    :param hero_cards: рука игрока
+    :param board_cards: доска
+    :param active: количество активных игроков
+    :param n_simulations: количество симуляций
+    :param backend: 'numpy' - векторизованный движок, 'treys' - эталонный цикл на treys
+    :param workers: количество процессов для движка 'numpy' (1 - в текущем процессе)
+    :param range_weights: веса диапазона противников (None - случайные руки), только для 'numpy'
+    :param rng: генератор или зерно случайных чисел (None - случайное зерно)
+    :return: счетчики серии
+    """
+    if backend != 'numpy' and range_weights is not None:
+        raise ValueError(f"backend {backend} не поддерживает диапазоны противников")
+
+    if backend == 'numpy' and workers > 1:
+        wins, ties = simulate_equity_parallel(cards_to_indices(hero_cards),
+                                              cards_to_indices(board_cards),
+                                              active,
+                                              n_simulations,
+                                              workers,
+                                              range_weights,
+                                              rng)
+    elif backend == 'numpy' and range_weights is not None:
+        wins, ties = simulate_range_equity_counts(cards_to_indices(hero_cards),
+                                                  cards_to_indices(board_cards),
+                                                  active,
+                                                  n_simulations,
+                                                  range_weights,
+                                                  rng)
+    elif backend == 'numpy':
+        wins, ties = simulate_equity_counts(cards_to_indices(hero_cards),
+                                            cards_to_indices(board_cards),
+                                            active,
+                                            n_simulations,
+                                            rng)
+    elif backend == 'treys':
+        wins, ties = simulate_equity_treys(hero_cards, board_cards, active, n_simulations, rng)
+    else:
+        raise ValueError(f"неизвестный backend расчета equity: {backend}")
+
+    return EquityStats(wins, ties, n_simulations)
+
+def calculate_equity_fast(hero_cards: list,
+                          board_cards: list,
+                          active: int,
+                          n_simulations: int,
+                          backend: str = 'numpy',
+                          exact_budget: int = EXACT_ENUMERATION_BUDGET,
+                          target_std_error: float | None = None,
+                          workers: int = EQUITY_WORKERS,
+                          range_weights: np.ndarray | None = None,
+                          rng: np.random.Generator | int | None = None) -> tuple[float, float]:
+    """
+    Быстрый расчет equity с оптимизацией кеша.
+    На префлопе equity берется из заранее посчитанной таблицы (если она есть).
+    Если количество возможных раздач не больше exact_budget, equity считается точным перебором.
+    В кэше хранятся счетчики раздач: если их меньше, чем нужно, досчитываются только недостающие
+    симуляции и объединяются с уже накопленными.
+    Против диапазона (range_weights) таблица префлопа и точный перебор не используются.
+    :param hero_cards: рука игрока
+    :param board_cards: доска
+    :param active: количество активных игроков
+    :param n_simulations: количество симуляций (с target_std_error - максимальное количество)
+    :param backend: 'numpy' - векторизованный движок, 'treys' - эталонный цикл на treys
+    :param exact_budget: лимит раздач для точного перебора (0 - всегда Монте-Карло)
+    :param target_std_error: требуемая стандартная ошибка equity (None - ровно n_simulations)
+    :param workers: количество процессов для симуляций (1 - в текущем процессе)
+    :param range_weights: веса 1326 комбинаций диапазона противников (None - случайные руки)
+    :param rng: генератор или зерно случайных чисел (None - случайное зерно)
+    :return: (equity, стандартная ошибка equity)
+    """
+    rng = make_rng(rng)
+    hero_indices = cards_to_indices(hero_cards)
+    board_indices = cards_to_indices(board_cards)
+
+    # без соперников (active 0 или 1) герой забирает банк, у обоих значений одна запись кэша
+    active = max(active, 1)
 
+    # Префлоп - одно обращение к таблице
+    if backend == 'numpy' and len(board_cards) == 0 and range_weights is None:
+        preflop_counts = lookup_preflop_counts(hero_indices, active)
+        if preflop_counts is not None:
+            stats = EquityStats(*preflop_counts)
+            return stats.equity, stats.std_error
+
+    # Проверяем кэш
+    if range_weights is None:
+        cache_key = get_cache_key(hero_indices, board_indices, active)
+    else:
+        cache_key = get_range_cache_key(hero_indices, board_indices, active, range_weights)
+    # один ключ досчитывается одним потоком: пока ждали блокировку, другой поток мог его досчитать
+    with computing_key(cache_key):
+        stats = EQUITY_CACHE.get(cache_key, EquityStats(0, 0, 0))
+        if stats.exact:
+            return stats.equity, stats.std_error
+
+        n_remaining = 52 - len(hero_cards) - len(board_cards)
+        exact_deals = count_exact_deals(n_remaining, 5 - len(board_cards), active - 1)
+
+        if backend == 'numpy' and range_weights is None and exact_deals <= exact_budget:
+            wins, ties, total = enumerate_equity_counts(hero_indices, board_indices, active)
+            stats = EquityStats(wins, ties, total, exact=True)
+            EQUITY_CACHE.put(cache_key, stats)
+            return stats.equity, stats.std_error
+
+        # Досчитываем недостающие симуляции
+        while stats.samples < n_simulations:
+            if target_std_error is not None and stats.std_error <= target_std_error:
+                break
+
+            required = n_simulations
+            if target_std_error is not None:
+                required = min(n_simulations, stats.required_samples(target_std_error))
+            missing = max(required - stats.samples, MIN_SIMULATION_BATCH)
+            missing = min(missing, n_simulations - stats.samples)
+
+            # объединение с записью кэша атомарно, каждый блок сразу виден другим потокам
+            stats = EQUITY_CACHE.merge(cache_key, run_equity_simulations(hero_cards, board_cards, active, missing,
+                                                                         backend, workers, range_weights, rng))
+
+    return stats.equity, stats.std_error
+
+
+def calculate_action_ev(action: str, equity: float, pot: float, fold_equity: float) -> float:
+    """
+    Считает EV одного действия (без округления)
+    :param action: действие в формате 'name_amount', например 'call_2'
+    :param equity: equity игрока
+    :param pot: банк
+    :param fold_equity: вероятность фолда оппонента
+    :return: EV действия
+    """
+    action_name, action_amount = action.split('_')
+    action_amount = float(action_amount)
+
+    if action_name == 'fold':
+        # EV = 0
+        return 0
+
+    elif action_name == 'check':
+        # EV = E × Y
+        return equity * pot
+
+    elif action_name == 'call':
+        # EV = E × (Y + X) – (1 – E) × X
+        X = action_amount  # наша ставка
+        Y = pot           # текущий банк
+        E = equity        # наша equity
+        return E * (Y + X) - (1 - E) * X
+
+    elif action_name in ['bet', 'raise', 'all-in']:
+        # EV = FE × Y + (1 – FE) × (E × (Y + X) – (1 – E) × X)
+        X = action_amount  # наша ставка
+        Y = pot           # текущий банк
+        E = equity        # наша equity
+        FE = fold_equity  # вероятность фолда оппонента
+        return FE * Y + (1 - FE) * (E * (Y + X) - (1 - E) * X)
+
+    raise ValueError(f"неизвестное действие: {action}")
+
+def rank_actions(actions: list[str], equity: float, pot: float, fold_equity: float) -> list[str]:
+    """
+    Сортирует действия по убыванию EV
+    :param actions: список действий
+    :param equity: equity игрока
+    :param pot: банк
+    :param fold_equity: вероятность фолда оппонента
+    :return: действия от лучшего к худшему
+    """
+    return sorted(actions, key=lambda action: calculate_action_ev(action, equity, pot, fold_equity), reverse=True)
+
+def calculate_equity_adaptive(hero_cards: list,
+                              board_cards: list,
+                              active: int,
+                              n_simulations: int,
+                              actions: list[str],
+                              pot: float,
+                              fold_equity: float,
+                              confidence: float = ADAPTIVE_CONFIDENCE,
+                              range_weights: np.ndarray | None = None,
+                              rng: np.random.Generator | int | None = None) -> tuple[float, float]:
+    """
+    Последовательный расчет equity: симуляции идут блоками (каждый следующий вдвое больше),
+    расчет останавливается, когда порядок действий по EV одинаков на обеих границах
+    доверительного интервала equity. EV каждого действия линейно по equity, поэтому
+    при одинаковом порядке на границах он не меняется и внутри интервала.
+    :param hero_cards: рука игрока
+    :param board_cards: доска
+    :param active: количество активных игроков
+    :param n_simulations: максимальное количество симуляций
+    :param actions: доступные действия
+    :param pot: банк
+    :param fold_equity: вероятность фолда оппонента
+    :param confidence: уровень доверия интервала equity
+    :param range_weights: веса 1326 комбинаций диапазона противников (None - случайные руки)
+    :param rng: генератор или зерно случайных чисел (None - случайное зерно)
+    :return: (equity, стандартная ошибка equity)
+    """
+    rng = make_rng(rng)
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    samples = min(ADAPTIVE_FIRST_CHUNK, n_simulations)
+
+    while True:
+        # накопленные в кэше симуляции переиспользуются, досчитываются только новые
+        equity, std_error = calculate_equity_fast(hero_cards, board_cards, active, samples,
+                                                  range_weights=range_weights, rng=rng)
+
+        lower = max(equity - z * std_error, 0.0)
+        upper = min(equity + z * std_error, 1.0)
+        if rank_actions(actions, lower, pot, fold_equity) == rank_actions(actions, upper, pot, fold_equity):
+            break
+
+        if samples >= n_simulations:
+            break
+        samples = min(samples * 2, n_simulations)
+
+    return equity, std_error
 
 # Основная функция расчета оптимального действия в покере
 def best_action(size: int,
@@ -156,7 +477,10 @@ def best_action(size: int,
                 to_call: float = 0,
                 bb: float = 1,
                 n_simulations: int = 10000,
-                fold_equity: float = 0.5) -> dict[str,float]:
+                fold_equity: float = 0.5,
+                adaptive: bool = False,
+                confidence: float = ADAPTIVE_CONFIDENCE,
+                seed: int | None = None) -> dict[str,float]:
   '''
   Функция расчета оптимального действия в покере.
   Возвращает все возможные действия для конкретной позиции, с их EV.
@@ -164,14 +488,18 @@ def best_action(size: int,
   :active: int - количество участвующих (те кто еще не сбросил, с кем делим банк)
   :hero_pos: str - позиция игрока
   :hero_cards: list - рука игрока
-  :range_hands: list - диапазон рук противников (может быть пустым)
+  :range_hands: list - диапазон рук противников: строка вида "22+, A2s+, KTo+", список элементов
+                 или вектор весов 1326 комбинаций (может быть пустым, тогда руки противников случайные)
   :board_cards: list - доска (может быть пустой, тогда это прифлоп)
   :pot: float - банк
   :bb: float - размер большого блейнда
   :hero_stack: float - количество фишек у игрока
   :to_call: float - необходимая ставка для продолжения
-  :n_simulations: int - количество симуляций (по умолчанию 10000)
+  :n_simulations: int - количество симуляций (по умолчанию 10000, в adaptive режиме - максимум)
   :fold_equity: float - вероятность фолда оппонента (по умолчанию 0.5)
+  :adaptive: bool - останавливать симуляции, когда порядок действий по EV уже не может измениться
+  :confidence: float - уровень доверия для adaptive режима (по умолчанию 0.95)
+  :seed: int - зерно случайных чисел; при том же зерне и том же состоянии кэша результат повторяется
   :return: dict[str,float] - словарь, ключ - возможные действия, значение - EV
   '''
   # Проверяем количесвто карт
@@ -185,45 +513,30 @@ def best_action(size: int,
   hero_cards = [Card.new(c) for c in hero_cards]
   board_cards = [Card.new(c) for c in board_cards]
 
-  # Быстрый расчет equity
-  equity = calculate_equity_fast(hero_cards, board_cards, active, n_simulations)
+  # Диапазон противников в виде весов комбинаций
+  range_weights = range_to_weights(range_hands)
+
+  # Один поток случайных чисел на весь расчет
+  rng = make_rng(seed)
 
   # формируем возможные действия игрока
   available_actions = get_available_actions(pot, to_call, hero_stack, bb)
 
+  # Быстрый расчет equity
+  if adaptive:
+      equity, _ = calculate_equity_adaptive(hero_cards, board_cards, active, n_simulations,
+                                            list(available_actions), pot, fold_equity, confidence,
+                                            range_weights, rng)
+  else:
+      equity, _ = calculate_equity_fast(hero_cards, board_cards, active, n_simulations,
+                                        range_weights=range_weights, rng=rng)
+
   # рассчитываем EV для каждого действия
   for action, _ in available_actions.items():
-      action_name, action_amount = action.split('_')
-      action_amount = float(action_amount)
-
-      if action_name == 'fold':
-          # EV = 0
-          available_actions[action] = 0
-
-      elif action_name == 'check':
-          # EV = E × Y
-          available_actions[action] = round(equity * pot, 1)
-
-      elif action_name == 'call':
-          # EV = E × (Y + X) – (1 – E) × X
-          X = action_amount  # наша ставка
-          Y = pot           # текущий банк
-          E = equity        # наша equity
-          available_actions[action] = round(E * (Y + X) - (1 - E) * X, 1)
-
-      elif action_name in ['bet', 'raise', 'all-in']:
-          # EV = FE × Y + (1 – FE) × (E × (Y + X) – (1 – E) × X)
-          X = action_amount  # наша ставка
-          Y = pot           # текущий банк
-          E = equity        # наша equity
-          FE = fold_equity  # вероятность фолда оппонента
-          available_actions[action] = round(FE * Y + (1 - FE) * (E * (Y + X) - (1 - E) * X), 1)
+      available_actions[action] = round(calculate_action_ev(action, equity, pot, fold_equity), 1)
 
   return available_actions
 
-# Загружаем кэш при импорте модуля
-load_equity_cache()
-
 # ... existing code ...
 
 # if __name__ == "__main__":
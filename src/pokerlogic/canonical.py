@@ -0,0 +1,50 @@
+# канонизация рук по изоморфизму мастей: руки, отличающиеся только перестановкой мастей,
+# имеют одинаковую equity и должны получать один и тот же ключ кэша
+
+from itertools import permutations
+
+import numpy as np
+
+# Все 24 перестановки мастей
+SUIT_PERMUTATIONS = list(permutations(range(4)))
+
+# Количество бит на одну карту в ключе (0 - пустой слот, 1..52 - индекс карты + 1)
+BITS_PER_CARD = 6
+
+
+def canonicalize(hero: np.ndarray, board: np.ndarray) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    '''
+    Функция приводит руку и доску к представителю класса изоморфизма мастей:
+    перебирает все перестановки мастей и берет лексикографически минимальный вариант
+    :param hero: индексы карт героя (ранг * 4 + масть)
+    :param board: индексы карт доски
+    :return: (hero, board) - отсортированные индексы карт канонического представителя
+    '''
+    hero = [int(c) for c in hero]
+    board = [int(c) for c in board]
+
+    best = None
+    for perm in SUIT_PERMUTATIONS:
+        candidate = (tuple(sorted(c - c % 4 + perm[c % 4] for c in board)),
+                     tuple(sorted(c - c % 4 + perm[c % 4] for c in hero)))
+        if best is None or candidate < best:
+            best = candidate
+
+    board, hero = best
+    return hero, board
+
+def pack_key(hero: tuple[int, ...], board: tuple[int, ...], active: int) -> int:
+    '''
+    Функция упаковывает карты и количество игроков в одно целое число:
+    2 карты героя и 5 слотов доски по BITS_PER_CARD бит, затем 4 бита на active
+    :param hero: индексы карт героя
+    :param board: индексы карт доски
+    :param active: количество активных игроков
+    :return: целочисленный ключ
+    '''
+    key = 0
+    for card in hero:
+        key = (key << BITS_PER_CARD) | (card + 1)
+    for i in range(5):
+        key = (key << BITS_PER_CARD) | (board[i] + 1 if i < len(board) else 0)
+    return (key << 4) | active
@@ -0,0 +1,279 @@
+# бэкенды кэша equity: ограниченный LRU в памяти и LRU с инкрементальной записью в SQLite
+# значения кэша - счетчики EquityStats (wins, ties, samples), а не готовая equity
+
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+try:
+    from .equity_engine import EquityStats
+except ImportError:
+    from equity_engine import EquityStats
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+# Максимальное количество записей в памяти
+MAX_MEMORY_ENTRIES = 100_000
+
+# Максимальное количество записей в файле
+MAX_DISK_ENTRIES = 1_000_000
+
+# Сколько новых записей копится в памяти перед записью на диск
+FLUSH_EVERY = 32
+
+
+class MemoryCache:
+    '''Кэш equity в памяти с ограничением размера и вытеснением давно не использованных записей (LRU)'''
+
+    def __init__(self, max_entries: int = MAX_MEMORY_ENTRIES):
+        '''
+        :param max_entries: максимальное количество записей
+        '''
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        '''
+        Возвращает значение по ключу и отмечает запись как недавно использованную
+        :param key: ключ
+        :param default: значение, если ключа нет
+        :return: значение или default
+        '''
+        with self.lock:
+            return self._get(key, default)
+
+    def _get(self, key, default=None):
+        '''Чтение записи с подгрузкой из хранилища (вызывается под self.lock, чтобы не затереть более новый put)'''
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+        value = self._load(key)
+        if value is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._store(key, value)
+        return value
+
+    def put(self, key, value):
+        '''
+        Добавляет или обновляет запись
+        :param key: ключ
+        :param value: значение
+        '''
+        with self.lock:
+            self._put(key, value)
+        self._after_write()
+
+    def merge(self, key, value):
+        '''
+        Атомарно объединяет значение с записью (value.merge), чтобы параллельные расчеты одного ключа
+        не теряли симуляции друг друга
+        :param key: ключ
+        :param value: новые счетчики
+        :return: объединенное значение
+        '''
+        with self.lock:
+            current = self._get(key)
+            merged = value if current is None else current.merge(value)
+            self._put(key, merged)
+        self._after_write()
+        return merged
+
+    def _put(self, key, value):
+        '''Запись значения (вызывается под self.lock)'''
+        self._store(key, value)
+
+    def _after_write(self):
+        '''Действия после записи вне блокировки (в памяти ничего не нужно)'''
+
+    def _store(self, key, value):
+        '''Кладет запись в память и вытесняет лишние (вызывается под self.lock)'''
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, key):
+        '''Загружает запись из постоянного хранилища (в памяти его нет)'''
+        return None
+
+    def flush(self):
+        '''Записывает накопленные изменения (в памяти нечего записывать)'''
+
+    def stats(self) -> dict[str, int]:
+        '''
+        Счетчики работы кэша
+        :return: словарь hits, misses, evictions, size
+        '''
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self)}
+
+    def __contains__(self, key) -> bool:
+        # проверка наличия не считается обращением: счетчики и порядок LRU не меняются
+        with self.lock:
+            return key in self.entries or self._load(key) is not None
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class SQLiteCache(MemoryCache):
+    '''
+    LRU-кэш в памяти поверх файла SQLite.
+    Файл открывается при первом обращении, записи читаются с диска по одной при промахе в памяти,
+    новые записи пишутся на диск пачками по flush_every штук.
+    Файл тоже вытесняет давно не использованные записи: при каждом сбросе прочитанные с тех пор ключи
+    получают новую отметку used, и при переполнении удаляются записи с самой старой отметкой.
+    '''
+
+    def __init__(self,
+                 path: str,
+                 max_entries: int = MAX_MEMORY_ENTRIES,
+                 max_disk_entries: int = MAX_DISK_ENTRIES,
+                 flush_every: int = FLUSH_EVERY):
+        '''
+        :param path: путь к файлу SQLite
+        :param max_entries: максимальное количество записей в памяти
+        :param max_disk_entries: максимальное количество записей в файле
+        :param flush_every: через сколько новых записей сбрасывать их на диск
+        '''
+        super().__init__(max_entries)
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.flush_every = flush_every
+        self.pending = {}
+        self.touched = set()
+        self.clock = 0
+        self.connection = None
+        self.db_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        '''Открывает файл кэша при первом обращении (вызывается под self.db_lock)'''
+        if self.connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            # key не делаем PRIMARY KEY: тогда rowid остается отдельным и растет с каждой записью
+            self.connection.execute("CREATE TABLE IF NOT EXISTS equity_stats ("
+                                    "key INTEGER NOT NULL UNIQUE, "
+                                    "wins INTEGER NOT NULL, "
+                                    "ties INTEGER NOT NULL, "
+                                    "samples INTEGER NOT NULL, "
+                                    "exact INTEGER NOT NULL, "
+                                    "used INTEGER NOT NULL DEFAULT 0)")
+            # в файлах прежней версии нет отметки использования: их записи вытесняются первыми в порядке записи
+            columns = [row[1] for row in self.connection.execute("PRAGMA table_info(equity_stats)")]
+            if 'used' not in columns:
+                self.connection.execute("ALTER TABLE equity_stats ADD COLUMN used INTEGER NOT NULL DEFAULT 0")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS equity_stats_used ON equity_stats (used)")
+            self.connection.commit()
+            self.clock = self.connection.execute("SELECT COALESCE(MAX(used), 0) FROM equity_stats").fetchone()[0]
+            logger.info("Кэш equity открыт: %s", self.path)
+        return self.connection
+
+    def _load(self, key):
+        if not isinstance(key, int):
+            return None
+        with self.db_lock:
+            if key in self.pending:
+                return self.pending[key]
+            try:
+                row = self._connect().execute("SELECT wins, ties, samples, exact FROM equity_stats WHERE key = ?",
+                                              (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.error("Ошибка чтения кэша: %s", e)
+                return None
+        if row is None:
+            return None
+        wins, ties, samples, exact = row
+        return EquityStats(wins, ties, samples, bool(exact))
+
+    def _get(self, key, default=None):
+        # прочитанный ключ получит новую отметку used при следующем сбросе (в том числе при попадании в память)
+        value = super()._get(key, default)
+        if value is not default:
+            self.touched.add(key)
+        return value
+
+    def _put(self, key, value):
+        self._store(key, value)
+        with self.db_lock:
+            self.pending[key] = value
+
+    def _after_write(self):
+        # запись на диск - вне self.lock, чтобы чтение из памяти не ждало диск
+        with self.db_lock:
+            need_flush = len(self.pending) >= self.flush_every
+        if need_flush:
+            self.flush()
+
+    def flush(self):
+        '''
+        Записывает накопленные записи в файл, обновляет отметку used у прочитанных записей
+        и обрезает файл до max_disk_entries, удаляя давно не использованные
+        '''
+        # прочитанные ключи забираем под self.lock (порядок блокировок: self.lock, затем db_lock)
+        with self.lock:
+            touched, self.touched = self.touched, set()
+        with self.db_lock:
+            if not self.pending and not touched:
+                return
+            try:
+                connection = self._connect()
+                used = self.clock + 1
+                connection.executemany("INSERT OR REPLACE INTO equity_stats (key, wins, ties, samples, exact, used) "
+                                       "VALUES (?, ?, ?, ?, ?, ?)",
+                                       [(key, stats.wins, stats.ties, stats.samples, int(stats.exact), used)
+                                        for key, stats in self.pending.items()])
+                connection.executemany("UPDATE equity_stats SET used = ? WHERE key = ?",
+                                       [(used, key) for key in touched
+                                        if isinstance(key, int) and key not in self.pending])
+                overflow = connection.execute("SELECT COUNT(*) FROM equity_stats").fetchone()[0] - self.max_disk_entries
+                if overflow > 0:
+                    # внутри одной отметки used раньше удаляются записи, записанные раньше (меньший rowid)
+                    connection.execute("DELETE FROM equity_stats WHERE key IN "
+                                       "(SELECT key FROM equity_stats ORDER BY used, rowid LIMIT ?)", (overflow,))
+                    self.evictions += overflow
+                connection.commit()
+                self.clock = used
+                logger.info("Кэш equity записан: %s новых записей", len(self.pending))
+                self.pending.clear()
+            except sqlite3.Error as e:
+                logger.error("Ошибка записи кэша: %s", e)
+
+    def disk_size(self) -> int:
+        '''
+        Количество записей в файле (накопленные записи предварительно сбрасываются на диск)
+        :return: количество записей
+        '''
+        self.flush()
+        with self.db_lock:
+            return self._connect().execute("SELECT COUNT(*) FROM equity_stats").fetchone()[0]
+
+    def close(self):
+        '''Записывает изменения и закрывает файл'''
+        self.flush()
+        with self.db_lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
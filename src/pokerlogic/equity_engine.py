@@ -0,0 +1,399 @@
+# векторизованный расчет equity: раздаем все симуляции сразу массивами индексов NumPy
+# и оцениваем руки через заранее построенную таблицу рангов 5-карточных комбинаций
+
+import logging
+import os
+import sys
+import threading
+from itertools import chain, combinations, islice
+from math import ceil, comb, inf, sqrt
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+from treys import Card
+from treys.lookup import LookupTable
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+# Количество карт в колоде
+DECK_SIZE = 52
+
+# Все 21 способ выбрать 5 карт из 7 (индексы внутри отсортированной руки)
+COMBOS_7_5 = np.array(list(combinations(range(7), 5)), dtype=np.intp)
+
+# Биномиальные коэффициенты BINOM[n, k] для номера комбинации в комбинаторной системе счисления
+BINOM = np.array([[comb(n, k) for k in range(6)] for n in range(DECK_SIZE)], dtype=np.int32)
+
+def get_rank_table_file_path():
+    """Получает путь к файлу таблицы рангов в зависимости от способа запуска"""
+    if getattr(sys, 'frozen', False):
+        # Запуск из .exe файла
+        base_path = Path(sys._MEIPASS)
+        return str(base_path / "data" / "rank_table.npy")
+    else:
+        # Обычный запуск
+        return "data/rank_table.npy"
+
+RANK_TABLE_FILE = get_rank_table_file_path()
+
+# Таблица рангов строится при первом обращении, один раз за процесс, даже если обращаются из нескольких потоков
+_RANK_TABLE = None
+_RANK_TABLE_LOCK = threading.Lock()
+
+# Количество комбинаций в блоке при построении таблицы рангов
+RANK_TABLE_CHUNK = 1 << 16
+
+# Ранг, который хуже любой реальной руки (в treys меньше = лучше)
+WORST_RANK = LookupTable.MAX_HIGH_CARD + 1
+
+# Битовые маски карт для быстрой проверки пересечений
+CARD_BITS = np.left_shift(np.uint64(1), np.arange(DECK_SIZE, dtype=np.uint64))
+
+# Размер блока симуляций, ограничивает потребление памяти
+CHUNK_SIZE = 4096
+
+# Вес ничьей при расчете equity
+TIE_WEIGHT = 0.3
+
+
+class EquityStats(NamedTuple):
+    '''Счетчики результатов раздач, из которых считаются equity и ее стандартная ошибка'''
+    wins: int
+    ties: int
+    samples: int
+    exact: bool = False
+
+    @property
+    def equity(self) -> float:
+        '''Equity: выигрыш = 1, ничья = TIE_WEIGHT, проигрыш = 0'''
+        if self.samples == 0:
+            return 0.0
+        return (self.wins + TIE_WEIGHT * self.ties) / self.samples
+
+    @property
+    def variance(self) -> float:
+        '''Дисперсия результата одной раздачи'''
+        if self.samples == 0:
+            # верхняя граница дисперсии величины из [0, 1]
+            return 0.25
+        second_moment = (self.wins + TIE_WEIGHT ** 2 * self.ties) / self.samples
+        return max(second_moment - self.equity ** 2, 0.0)
+
+    @property
+    def std_error(self) -> float:
+        '''Стандартная ошибка equity (0 для точного перебора)'''
+        if self.exact:
+            return 0.0
+        if self.samples == 0:
+            return inf
+        return sqrt(self.variance / self.samples)
+
+    def merge(self, other: 'EquityStats') -> 'EquityStats':
+        '''
+        Объединяет счетчики двух независимых серий симуляций одной ситуации
+        :param other: другие счетчики
+        :return: объединенные счетчики (точный результат не смешивается с симуляциями)
+        '''
+        if self.exact:
+            return self
+        if other.exact:
+            return other
+        return EquityStats(self.wins + other.wins, self.ties + other.ties, self.samples + other.samples)
+
+    def required_samples(self, target_std_error: float) -> int:
+        '''
+        Оценивает, сколько всего раздач нужно для заданной стандартной ошибки
+        :param target_std_error: требуемая стандартная ошибка
+        :return: количество раздач
+        '''
+        if self.exact:
+            return self.samples
+        return ceil(self.variance / target_std_error ** 2)
+
+
+def card_to_index(card: int) -> int:
+    '''
+    Функция переводит карту treys в индекс 0..51
+    :param card: карта в формате treys
+    :return: индекс карты (ранг * 4 + масть)
+    '''
+    rank = Card.get_rank_int(card)
+    suit = Card.get_suit_int(card).bit_length() - 1
+    return rank * 4 + suit
+
+def index_to_card(index: int) -> int:
+    '''
+    Функция переводит индекс 0..51 в карту treys
+    :param index: индекс карты (ранг * 4 + масть)
+    :return: карта в формате treys
+    '''
+    return Card.new(Card.STR_RANKS[index // 4] + 'shdc'[index % 4])
+
+def cards_to_indices(cards: list) -> np.ndarray:
+    '''
+    Функция переводит список карт treys в массив индексов
+    :param cards: список карт в формате treys
+    :return: массив индексов карт
+    '''
+    return np.array([card_to_index(c) for c in cards], dtype=np.intp)
+
+def get_rank_table() -> np.ndarray:
+    '''
+    Возвращает таблицу рангов, при первом обращении открывает ее из файла,
+    а если файла нет - строит (около секунды)
+    :return: массив рангов (меньше = лучше)
+    '''
+    global _RANK_TABLE
+
+    if _RANK_TABLE is None:
+        with _RANK_TABLE_LOCK:
+            if _RANK_TABLE is None:
+                table = load_rank_table()
+                _RANK_TABLE = table if table is not None else build_rank_table()
+    return _RANK_TABLE
+
+def load_rank_table(path: str = RANK_TABLE_FILE) -> np.ndarray | None:
+    '''
+    Открывает таблицу рангов через memory-map: процессы пула делят одни и те же страницы файла
+    вместо своей копии таблицы
+    :param path: путь к файлу
+    :return: таблица рангов или None, если файла нет или он некорректный
+    '''
+    if not os.path.exists(path):
+        logger.info("Таблица рангов не найдена: %s", path)
+        return None
+
+    try:
+        table = np.load(path, mmap_mode='r')
+    except Exception as e:
+        logger.error("Ошибка загрузки таблицы рангов: %s", e)
+        return None
+
+    if table.shape != (comb(DECK_SIZE, 5),) or table.dtype != np.int16:
+        logger.error("Некорректная таблица рангов: %s %s", table.shape, table.dtype)
+        return None
+
+    logger.info("Таблица рангов загружена: %s", path)
+    # обычный массив поверх тех же страниц: индексирование без накладных расходов memmap
+    return np.asarray(table)
+
+def save_rank_table(table: np.ndarray, path: str = RANK_TABLE_FILE):
+    '''
+    Сохраняет таблицу рангов в бинарный файл .npy
+    :param table: таблица рангов
+    :param path: путь к файлу
+    '''
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    np.save(path, table)
+    logger.info("Таблица рангов сохранена: %s", path)
+
+def build_rank_table(chunk_size: int = RANK_TABLE_CHUNK) -> np.ndarray:
+    '''
+    Строит таблицу рангов treys для всех C(52, 5) комбинаций из 5 карт.
+    Номер комбинации - сумма BINOM[c_i, i + 1] по отсортированным картам.
+    Комбинации обрабатываются блоками в узких типах, поэтому пик памяти - несколько МБ сверх самой таблицы
+    :param chunk_size: количество комбинаций в блоке
+    :return: массив рангов (меньше = лучше)
+    '''
+    n_combos = comb(DECK_SIZE, 5)
+
+    # Таблицы treys: произведение простых чисел рангов -> ранг руки, отдельно для флешей
+    lookup = LookupTable()
+    tables = []
+    for table in (lookup.flush_lookup, lookup.unsuited_lookup):
+        keys = np.array(sorted(table), dtype=np.int32)
+        tables.append((keys, np.array([table[k] for k in keys.tolist()], dtype=np.int16)))
+    primes_by_rank = np.array(Card.PRIMES, dtype=np.int32)
+    positions = np.arange(1, 6)
+
+    rank_table = np.empty(n_combos, dtype=np.int16)
+    cards = chain.from_iterable(combinations(range(DECK_SIZE), 5))
+    for start in range(0, n_combos, chunk_size):
+        n = min(chunk_size, n_combos - start)
+        combos = np.fromiter(islice(cards, n * 5), dtype=np.uint8, count=n * 5).reshape(n, 5)
+
+        # Произведение простых чисел рангов (не больше 41^5) помещается в int32
+        prime_products = primes_by_rank[combos >> 2].prod(axis=1, dtype=np.int32)
+        suits = combos & 3
+        is_flush = (suits == suits[:, :1]).all(axis=1)
+
+        hand_ranks = np.empty(n, dtype=np.int16)
+        for mask, (keys, values) in zip((is_flush, ~is_flush), tables):
+            hand_ranks[mask] = values[np.searchsorted(keys, prime_products[mask])]
+
+        # Раскладываем ранги по номерам комбинаций
+        rank_table[BINOM[combos, positions].sum(axis=1, dtype=np.int32)] = hand_ranks
+
+    logger.info("Таблица рангов построена: %s комбинаций", n_combos)
+    return rank_table
+
+def evaluate_seven(cards: np.ndarray) -> np.ndarray:
+    '''
+    Векторная оценка рук из 7 карт: лучший ранг среди 21 комбинации из 5 карт
+    :param cards: массив индексов карт формы (..., 7)
+    :return: массив рангов формы (...), в treys меньше = лучше
+    '''
+    cards = np.sort(cards, axis=-1)
+    combo_index = BINOM[cards[..., COMBOS_7_5], np.arange(1, 6)].sum(axis=-1)
+    return get_rank_table()[combo_index].min(axis=-1)
+
+def count_showdowns(hero: np.ndarray, boards: np.ndarray, villains: np.ndarray) -> tuple[int, int]:
+    '''
+    Подсчитывает выигрыши и ничьи героя в наборе готовых раздач
+    :param hero: индексы карт героя, форма (2,)
+    :param boards: полные доски, форма (n, 5)
+    :param villains: руки противников, форма (n, v, 2)
+    :return: (wins, ties)
+    '''
+    n, n_villains = villains.shape[:2]
+    hero_cards = np.concatenate([np.broadcast_to(hero, (n, 2)), boards], axis=1)
+    hero_rank = evaluate_seven(hero_cards)
+
+    if n_villains > 0:
+        villain_cards = np.concatenate([villains, np.broadcast_to(boards[:, None, :], (n, n_villains, 5))], axis=2)
+        best_villain_rank = evaluate_seven(villain_cards).min(axis=1)
+    else:
+        best_villain_rank = np.full(n, WORST_RANK)
+
+    wins = int(np.count_nonzero(hero_rank < best_villain_rank))
+    ties = int(np.count_nonzero(hero_rank == best_villain_rank))
+    return wins, ties
+
+def remaining_deck(hero: np.ndarray, board: np.ndarray) -> np.ndarray:
+    '''
+    Функция возвращает индексы карт, оставшихся в колоде
+    :param hero: индексы карт героя
+    :param board: индексы карт доски
+    :return: массив индексов оставшихся карт
+    '''
+    used = set(np.asarray(hero).tolist()) | set(np.asarray(board).tolist())
+    return np.array([c for c in range(DECK_SIZE) if c not in used], dtype=np.intp)
+
+def make_rng(seed=None) -> np.random.Generator:
+    '''
+    Создает генератор случайных чисел на счетчиковом Philox: его потоки независимы
+    и делятся между процессами через spawn без пересечений
+    :param seed: число, SeedSequence, готовый Generator (возвращается как есть) или None - случайное зерно
+    :return: генератор NumPy
+    '''
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.Generator(np.random.Philox(seed))
+
+def deal_chunks(n_remaining: int, cards_needed: int, n_simulations: int, rng: np.random.Generator):
+    '''
+    Раздает симуляции блоками по CHUNK_SIZE: для каждой симуляции случайная перестановка
+    оставшихся карт, из которой берутся первые cards_needed.
+    Эталонный движок на treys использует те же блоки, поэтому при одном зерне раздачи совпадают
+    :param n_remaining: количество оставшихся карт
+    :param cards_needed: сколько карт раздается в одной симуляции
+    :param n_simulations: количество симуляций
+    :param rng: генератор случайных чисел NumPy
+    :return: генератор массивов позиций в колоде формы (n, cards_needed)
+    '''
+    done = 0
+    while done < n_simulations:
+        n = min(CHUNK_SIZE, n_simulations - done)
+        yield rng.random((n, n_remaining)).argsort(axis=1)[:, :cards_needed]
+        done += n
+
+def simulate_equity_counts(hero: np.ndarray,
+                           board: np.ndarray,
+                           active: int,
+                           n_simulations: int,
+                           rng: np.random.Generator | None = None) -> tuple[int, int]:
+    '''
+    Монте-Карло симуляция блоками: все раздачи блока формируются одним массивом
+    :param hero: индексы карт героя
+    :param board: индексы карт доски (0, 3, 4 или 5 карт)
+    :param active: количество активных игроков (вместе с героем)
+    :param n_simulations: количество симуляций
+    :param rng: генератор случайных чисел NumPy (None - случайное зерно)
+    :return: (wins, ties)
+    '''
+    rng = make_rng(rng)
+
+    hero = np.asarray(hero, dtype=np.intp)
+    board = np.asarray(board, dtype=np.intp)
+    remaining = remaining_deck(hero, board)
+
+    # active = 0 (детектор не нашел карт соперников) считается как отсутствие соперников
+    n_villains = max(active - 1, 0)
+    villain_cards = 2 * n_villains
+    cards_needed = villain_cards + 5 - len(board)
+
+    wins = ties = 0
+    for order in deal_chunks(len(remaining), cards_needed, n_simulations, rng):
+        n = len(order)
+        dealt = remaining[order]
+
+        villains = dealt[:, :villain_cards].reshape(n, n_villains, 2)
+        boards = np.concatenate([np.broadcast_to(board, (n, len(board))), dealt[:, villain_cards:]], axis=1)
+
+        chunk_wins, chunk_ties = count_showdowns(hero, boards, villains)
+        wins += chunk_wins
+        ties += chunk_ties
+
+    return wins, ties
+
+def enumerate_equity_counts(hero: np.ndarray, board: np.ndarray, active: int) -> tuple[int, int, int]:
+    '''
+    Точный перебор всех вариантов доски и всех рук противников (без повторов перестановок).
+    Руки противников оцениваются один раз на каждую доску, затем наборы рук собираются из готовых рангов.
+    :param hero: индексы карт героя
+    :param board: индексы карт доски
+    :param active: количество активных игроков (вместе с героем)
+    :return: (wins, ties, total) - total равен количеству перебранных раздач
+    '''
+    hero = np.asarray(hero, dtype=np.intp)
+    board = np.asarray(board, dtype=np.intp)
+    remaining = remaining_deck(hero, board)
+    cards_missing = 5 - len(board)
+
+    # Все варианты добора доски
+    runouts = list(combinations(remaining.tolist(), cards_missing))
+    runouts = np.array(runouts, dtype=np.intp).reshape(len(runouts), cards_missing)
+    boards = np.concatenate([np.broadcast_to(board, (len(runouts), len(board))), runouts], axis=1)
+    runout_masks = np.bitwise_or.reduce(CARD_BITS[runouts], axis=1)
+
+    # Ранг героя на каждой доске
+    hero_rank = evaluate_seven(np.concatenate([np.broadcast_to(hero, (len(boards), 2)), boards], axis=1))
+
+    # Все возможные руки противника и их ранги на каждой доске
+    pairs = np.array(list(combinations(remaining.tolist(), 2)), dtype=np.intp)
+    pair_masks = CARD_BITS[pairs[:, 0]] | CARD_BITS[pairs[:, 1]]
+    # Оцениваем только руки, не пересекающиеся с доской
+    board_idx, pair_idx = np.nonzero((runout_masks[:, None] & pair_masks[None, :]) == 0)
+    pair_rank = np.full((len(boards), len(pairs)), WORST_RANK, dtype=np.int16)
+    for start in range(0, len(board_idx), CHUNK_SIZE):
+        b = board_idx[start:start + CHUNK_SIZE]
+        p = pair_idx[start:start + CHUNK_SIZE]
+        pair_rank[b, p] = evaluate_seven(np.concatenate([pairs[p], boards[b]], axis=1))
+
+    # Наращиваем наборы рук противников: каждая следующая рука имеет больший номер пары,
+    # чтобы один и тот же набор не учитывался в разных порядках
+    board_id = np.arange(len(boards))
+    used_masks = runout_masks
+    last_pair = np.full(len(boards), -1)
+    best_villain_rank = np.full(len(boards), WORST_RANK, dtype=np.int16)
+    pair_id = np.arange(len(pairs))
+    for _ in range(active - 1):
+        allowed = ((used_masks[:, None] & pair_masks[None, :]) == 0) & (pair_id[None, :] > last_pair[:, None])
+        rows, cols = np.nonzero(allowed)
+        board_id = board_id[rows]
+        used_masks = used_masks[rows] | pair_masks[cols]
+        last_pair = cols
+        best_villain_rank = np.minimum(best_villain_rank[rows], pair_rank[board_id, cols])
+
+    hero_rank = hero_rank[board_id]
+    wins = int(np.count_nonzero(hero_rank < best_villain_rank))
+    ties = int(np.count_nonzero(hero_rank == best_villain_rank))
+    return wins, ties, len(board_id)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    save_rank_table(build_rank_table())
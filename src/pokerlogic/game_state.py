@@ -0,0 +1,146 @@
+# состояние раздачи по последовательным кадрам: parse_image на каждом кадре возвращает независимый
+# словарь, трекер склеивает их, сглаживает мерцающие значения OCR и сообщает о событиях раздачи -
+# новая раздача, новая улица, ход героя, уточнение сглаженных чисел во время хода героя.
+# Equity нужно пересчитывать только на этих событиях
+
+import logging
+import threading
+from collections import Counter, deque
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+# События
+EVENT_NEW_HAND = 'new_hand'
+EVENT_STREET = 'street'
+EVENT_HERO_TO_ACT = 'hero_to_act'
+# во время хода героя сглаженные банк, ставка или стек изменились (например, исправилось ошибочное чтение)
+EVENT_DECISION_CHANGED = 'decision_changed'
+
+# Сколько последних чтений OCR учитывается при сглаживании
+SMOOTHING_WINDOW = 3
+
+# Числа OCR, которые сглаживаются по окну
+SMOOTHED_FIELDS = ('pot', 'hero_stack', 'to_call')
+
+# Для этих полей 0 - это нераспознанный текст, а не значение
+NONZERO_FIELDS = ('pot', 'hero_stack')
+
+# Ставка читается с кнопки Call, поэтому ее чтения имеют смысл только во время хода героя
+TURN_FIELDS = ('to_call',)
+
+# Допустимое количество карт на доске
+BOARD_SIZES = (0, 3, 4, 5)
+
+
+def stable_value(values) -> float:
+    '''
+    Самое частое значение окна, при равенстве - самое свежее
+    :param values: чтения по порядку, последнее - самое свежее
+    :return: сглаженное значение
+    '''
+    counts = Counter(values)
+    best = max(counts.values())
+    for value in reversed(values):
+        if counts[value] == best:
+            return value
+
+
+def street_name(board_cards: list) -> str:
+    '''
+    Название улицы по количеству карт на доске
+    :param board_cards: карты доски
+    :return: 'Preflop', 'Flop', 'Turn' или 'River'
+    '''
+    return {0: 'Preflop', 3: 'Flop', 4: 'Turn', 5: 'River'}.get(len(board_cards), 'None')
+
+
+class GameStateTracker:
+    '''
+    Склеивает результаты parse_image последовательных кадров одного стола.
+    Карты принимаются сразу, если их количество допустимо (иначе это пропуск детектора и остается прошлое),
+    числа OCR - по большинству за последние SMOOTHING_WINDOW чтений текущей улицы
+    (ставка - текущего хода героя). Сглаживание продолжается и во время хода героя:
+    если сглаженное значение изменилось, трекер сообщает EVENT_DECISION_CHANGED.
+    '''
+
+    def __init__(self, window: int = SMOOTHING_WINDOW):
+        '''
+        :param window: размер окна сглаживания
+        '''
+        self.window = window
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        '''Забывает раздачу (например, после выбора новой области экрана)'''
+        self.state = {}
+        self.hand_number = 0
+        self.readings = {field: deque(maxlen=self.window) for field in SMOOTHED_FIELDS}
+
+    def update(self, parsed: dict) -> list[str]:
+        '''
+        Добавляет результат разбора очередного кадра
+        :param parsed: словарь parse_image (пустой словарь - кадр не разобран, состояние не меняется)
+        :return: список событий этого кадра (EVENT_NEW_HAND, EVENT_STREET, EVENT_HERO_TO_ACT, EVENT_DECISION_CHANGED)
+        '''
+        if not parsed:
+            return []
+
+        with self.lock:
+            prev = self.state
+            state = dict(parsed)
+            events = []
+
+            # карты: неполное чтение - пропуск детектора, оставляем прошлые карты
+            hero_cards = sorted(parsed.get('hero_cards', []))
+            if len(hero_cards) != 2:
+                hero_cards = prev.get('hero_cards', [])
+            board_cards = sorted(parsed.get('board_cards', []))
+            if len(board_cards) not in BOARD_SIZES:
+                board_cards = prev.get('board_cards', [])
+
+            new_hand = len(hero_cards) == 2 and hero_cards != prev.get('hero_cards')
+            if not new_hand and len(board_cards) < len(prev.get('board_cards', [])):
+                # при тех же картах героя доска не уменьшается - это пропуск детектора
+                board_cards = prev['board_cards']
+
+            state['hero_cards'] = hero_cards
+            state['board_cards'] = board_cards
+            state['street'] = street_name(board_cards)
+
+            if new_hand:
+                self.hand_number += 1
+                events.append(EVENT_NEW_HAND)
+            elif prev and state['street'] != prev.get('street'):
+                events.append(EVENT_STREET)
+
+            new_street = bool(events)
+            hero_to_act = bool(parsed.get('action_buttons'))
+            new_turn = hero_to_act and (new_street or not prev.get('action_buttons'))
+            if new_turn:
+                events.append(EVENT_HERO_TO_ACT)
+
+            # числа OCR: на новой улице старые чтения не годятся, ставка читается заново на каждом ходе героя
+            for field, readings in self.readings.items():
+                if new_street or (field in TURN_FIELDS and (new_turn or not hero_to_act)):
+                    readings.clear()
+                if field in TURN_FIELDS and not hero_to_act:
+                    state[field] = 0
+                    continue
+                value = parsed.get(field, 0) or 0
+                if value or field not in NONZERO_FIELDS:
+                    readings.append(value)
+                state[field] = stable_value(readings) if readings else prev.get(field, 0)
+
+            # ход героя продолжается, но сглаженные числа уточнились - решение нужно пересчитать
+            if hero_to_act and not new_turn and any(state[field] != prev.get(field) for field in SMOOTHED_FIELDS):
+                events.append(EVENT_DECISION_CHANGED)
+
+            state['hand_number'] = self.hand_number
+            self.state = state
+
+        if events:
+            logger.info("Раздача %s: %s", self.hand_number, ', '.join(events))
+        return events
+
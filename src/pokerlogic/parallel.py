@@ -0,0 +1,117 @@
+# параллельный расчет equity: бюджет симуляций делится между процессами постоянного пула,
+# каждый процесс получает свой независимый поток случайных чисел, счетчики складываются.
+# Потоки процессов выделяются из одного генератора, поэтому при заданном зерне и числе процессов
+# результат воспроизводится
+
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from .equity_engine import get_rank_table, make_rng, simulate_equity_counts
+    from .ranges import simulate_range_equity_counts
+except ImportError:
+    from equity_engine import get_rank_table, make_rng, simulate_equity_counts
+    from ranges import simulate_range_equity_counts
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+# Меньше этого количества симуляций на процесс накладные расходы пула не окупаются
+MIN_SIMULATIONS_PER_WORKER = 2000
+
+# Пул процессов создается один раз и живет до завершения программы
+_EXECUTOR = None
+_EXECUTOR_WORKERS = 0
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _init_worker():
+    '''Прогрев процесса пула: таблица рангов открывается из файла (общие страницы памяти) до первой задачи'''
+    get_rank_table()
+
+def _simulate_worker(hero: np.ndarray,
+                     board: np.ndarray,
+                     active: int,
+                     n_simulations: int,
+                     rng: np.random.Generator,
+                     weights: np.ndarray | None = None) -> tuple[int, int]:
+    '''Задача процесса пула: серия симуляций со своим генератором'''
+    if weights is not None:
+        return simulate_range_equity_counts(hero, board, active, n_simulations, weights, rng=rng)
+    return simulate_equity_counts(hero, board, active, n_simulations, rng=rng)
+
+def get_executor(workers: int | None = None) -> ProcessPoolExecutor:
+    '''
+    Возвращает постоянный пул процессов, при первом вызове создает его
+    :param workers: количество процессов (по умолчанию - количество ядер)
+    :return: пул процессов
+    '''
+    global _EXECUTOR, _EXECUTOR_WORKERS
+
+    workers = workers or os.cpu_count() or 1
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None or _EXECUTOR_WORKERS < workers:
+            if _EXECUTOR is not None:
+                _EXECUTOR.shutdown(wait=False)
+            _EXECUTOR = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+            _EXECUTOR_WORKERS = workers
+            logger.info("Пул процессов для equity создан: %s процессов", workers)
+        return _EXECUTOR
+
+def shutdown_executor():
+    '''Останавливает пул процессов'''
+    global _EXECUTOR, _EXECUTOR_WORKERS
+
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown(wait=True, cancel_futures=True)
+            _EXECUTOR = None
+            _EXECUTOR_WORKERS = 0
+
+atexit.register(shutdown_executor)
+
+def simulate_equity_parallel(hero: np.ndarray,
+                             board: np.ndarray,
+                             active: int,
+                             n_simulations: int,
+                             workers: int | None = None,
+                             weights: np.ndarray | None = None,
+                             rng: np.random.Generator | int | None = None) -> tuple[int, int]:
+    '''
+    Делит симуляции между процессами пула и складывает их счетчики.
+    Если симуляций мало, считает в текущем процессе.
+    :param hero: индексы карт героя
+    :param board: индексы карт доски
+    :param active: количество активных игроков (вместе с героем)
+    :param n_simulations: количество симуляций
+    :param workers: количество процессов (по умолчанию - количество ядер)
+    :param weights: веса диапазона противников (None - случайные руки)
+    :param rng: генератор или зерно, из которого выделяются потоки процессов (None - случайное зерно)
+    :return: (wins, ties)
+    '''
+    rng = make_rng(rng)
+    workers = workers or os.cpu_count() or 1
+    n_parts = min(workers, n_simulations // MIN_SIMULATIONS_PER_WORKER)
+    if n_parts <= 1:
+        return _simulate_worker(hero, board, active, n_simulations, rng, weights)
+
+    # Независимые потоки случайных чисел для каждой части
+    streams = rng.spawn(n_parts)
+    parts = [n_simulations // n_parts + (1 if i < n_simulations % n_parts else 0) for i in range(n_parts)]
+
+    executor = get_executor(workers)
+    futures = [executor.submit(_simulate_worker, hero, board, active, part, stream, weights)
+               for part, stream in zip(parts, streams)]
+
+    wins = ties = 0
+    for future in futures:
+        part_wins, part_ties = future.result()
+        wins += part_wins
+        ties += part_ties
+
+    return wins, ties
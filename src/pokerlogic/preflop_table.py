@@ -0,0 +1,164 @@
+# таблица equity на префлопе: 169 классов стартовых рук × количество активных игроков
+# генерируется офлайн (python -m src.pokerlogic.preflop_table) и открывается через memory-map
+
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from .equity_engine import DECK_SIZE, evaluate_seven
+except ImportError:
+    from equity_engine import DECK_SIZE, evaluate_seven
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+# Количество классов стартовых рук (13 пар, 78 одномастных, 78 разномастных)
+N_HAND_CLASSES = 169
+
+# Максимальное количество игроков за столом
+MAX_PLAYERS = 9
+
+# Количество симуляций на класс руки при генерации таблицы
+PREFLOP_TABLE_SIMULATIONS = 200_000
+
+def get_table_file_path():
+    """Получает путь к файлу таблицы в зависимости от способа запуска"""
+    if getattr(sys, 'frozen', False):
+        # Запуск из .exe файла
+        base_path = Path(sys._MEIPASS)
+        return str(base_path / "data" / "preflop_equity.npy")
+    else:
+        # Обычный запуск
+        return "data/preflop_equity.npy"
+
+TABLE_FILE = get_table_file_path()
+
+
+def hand_class_index(hero: np.ndarray) -> int:
+    '''
+    Функция возвращает номер класса стартовой руки в сетке 13×13:
+    пары на диагонали, одномастные руки над диагональю, разномастные - под ней
+    :param hero: индексы двух карт героя (ранг * 4 + масть)
+    :return: номер класса 0..168
+    '''
+    first, second = int(hero[0]), int(hero[1])
+    high, low = max(first // 4, second // 4), min(first // 4, second // 4)
+    if first % 4 == second % 4:
+        return high * 13 + low
+    return low * 13 + high
+
+def representative_hand(class_index: int) -> np.ndarray:
+    '''
+    Функция возвращает одну конкретную руку для класса стартовой руки
+    :param class_index: номер класса 0..168
+    :return: индексы двух карт
+    '''
+    row, col = divmod(class_index, 13)
+    if row > col:
+        # одномастная рука
+        return np.array([row * 4, col * 4], dtype=np.intp)
+    # пара или разномастная рука
+    return np.array([col * 4, row * 4 + 1], dtype=np.intp)
+
+def build_preflop_table(n_simulations: int = PREFLOP_TABLE_SIMULATIONS, seed: int = 0) -> np.ndarray:
+    '''
+    Строит таблицу счетчиков для всех классов рук и всех размеров стола.
+    Для каждого класса раздаются сразу MAX_PLAYERS - 1 противников, результат для active игроков
+    берется по первым active - 1 из них, поэтому одна симуляция заполняет всю строку таблицы.
+    :param n_simulations: количество симуляций на класс руки
+    :param seed: зерно генератора случайных чисел
+    :return: массив uint32 формы (169, MAX_PLAYERS - 1, 3) - wins, ties, samples для active = 2..MAX_PLAYERS
+    '''
+    rng = np.random.default_rng(seed)
+    n_villains = MAX_PLAYERS - 1
+    table = np.zeros((N_HAND_CLASSES, n_villains, 3), dtype=np.uint32)
+    chunk_size = 4096
+
+    for class_index in range(N_HAND_CLASSES):
+        hero = representative_hand(class_index)
+        remaining = np.array([c for c in range(DECK_SIZE) if c not in hero], dtype=np.intp)
+
+        done = 0
+        while done < n_simulations:
+            n = min(chunk_size, n_simulations - done)
+            order = rng.random((n, len(remaining))).argsort(axis=1)[:, :2 * n_villains + 5]
+            dealt = remaining[order]
+            boards = dealt[:, 2 * n_villains:]
+            villains = dealt[:, :2 * n_villains].reshape(n, n_villains, 2)
+
+            hero_rank = evaluate_seven(np.concatenate([np.broadcast_to(hero, (n, 2)), boards], axis=1))
+            villain_cards = np.concatenate([villains, np.broadcast_to(boards[:, None, :], (n, n_villains, 5))], axis=2)
+            # лучший ранг среди первых k противников
+            best_villain_rank = np.minimum.accumulate(evaluate_seven(villain_cards), axis=1)
+
+            table[class_index, :, 0] += np.count_nonzero(hero_rank[:, None] < best_villain_rank, axis=0).astype(np.uint32)
+            table[class_index, :, 1] += np.count_nonzero(hero_rank[:, None] == best_villain_rank, axis=0).astype(np.uint32)
+            table[class_index, :, 2] += n
+            done += n
+
+        logger.info("Класс руки %s/%s готов", class_index + 1, N_HAND_CLASSES)
+
+    return table
+
+def save_preflop_table(table: np.ndarray, path: str = TABLE_FILE):
+    '''
+    Сохраняет таблицу в бинарный файл .npy
+    :param table: таблица счетчиков
+    :param path: путь к файлу
+    '''
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    np.save(path, table)
+    logger.info("Таблица префлопа сохранена: %s", path)
+
+def load_preflop_table(path: str = TABLE_FILE) -> np.ndarray | None:
+    '''
+    Открывает таблицу через memory-map, данные читаются с диска только при обращении
+    :param path: путь к файлу
+    :return: таблица счетчиков или None, если файла нет
+    '''
+    if not os.path.exists(path):
+        logger.info("Таблица префлопа не найдена: %s", path)
+        return None
+
+    try:
+        table = np.load(path, mmap_mode='r')
+    except Exception as e:
+        logger.error("Ошибка загрузки таблицы префлопа: %s", e)
+        return None
+
+    if table.shape != (N_HAND_CLASSES, MAX_PLAYERS - 1, 3):
+        logger.error("Некорректный размер таблицы префлопа: %s", table.shape)
+        return None
+
+    logger.info("Таблица префлопа загружена: %s", path)
+    return table
+
+# Открываем таблицу при импорте модуля
+PREFLOP_TABLE = load_preflop_table()
+
+def lookup_preflop_counts(hero: np.ndarray, active: int) -> tuple[int, int, int] | None:
+    '''
+    Ищет счетчики префлопа в таблице
+    :param hero: индексы двух карт героя
+    :param active: количество активных игроков
+    :return: (wins, ties, samples) или None, если таблицы нет или active вне диапазона
+    '''
+    if PREFLOP_TABLE is None or not 2 <= active <= MAX_PLAYERS:
+        return None
+
+    wins, ties, samples = PREFLOP_TABLE[hand_class_index(hero), active - 2]
+    return int(wins), int(ties), int(samples)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    start = time.time()
+    preflop_table = build_preflop_table()
+    save_preflop_table(preflop_table)
+    logger.info("Время генерации: %.1f секунд", time.time() - start)
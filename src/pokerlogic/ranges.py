@@ -0,0 +1,256 @@
+# диапазоны рук противников: разбор строк вида "22+, A2s+, KTo+" в вектор весов 1326 комбинаций,
+# выборка рук по alias-таблицам и симуляция equity против диапазона
+
+import logging
+import re
+from itertools import combinations
+
+import numpy as np
+
+try:
+    from .equity_engine import CARD_BITS, CHUNK_SIZE, DECK_SIZE, count_showdowns, make_rng
+except ImportError:
+    from equity_engine import CARD_BITS, CHUNK_SIZE, DECK_SIZE, count_showdowns, make_rng
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+# Ранги от младшего к старшему, индекс ранга совпадает с rank в индексе карты (ранг * 4 + масть)
+RANKS = '23456789TJQKA'
+SUITS = 'shdc'
+
+# Все 1326 стартовых комбинаций: индексы карт и битовые маски
+COMBOS = np.array(list(combinations(range(DECK_SIZE), 2)), dtype=np.intp)
+N_COMBOS = len(COMBOS)
+COMBO_MASKS = CARD_BITS[COMBOS[:, 0]] | CARD_BITS[COMBOS[:, 1]]
+
+# Номер комбинации по двум картам (в любом порядке)
+COMBO_INDEX = np.full((DECK_SIZE, DECK_SIZE), -1, dtype=np.intp)
+COMBO_INDEX[COMBOS[:, 0], COMBOS[:, 1]] = np.arange(N_COMBOS)
+COMBO_INDEX[COMBOS[:, 1], COMBOS[:, 0]] = np.arange(N_COMBOS)
+
+# Сколько раз подряд можно перевыбрать руки противников, пересекающиеся между собой
+MAX_RESAMPLE_ROUNDS = 1000
+
+# Формат одного элемента диапазона: AsKd, QQ, QQ+, 77-99, A2s+, KTo+, AK, A5s-A2s, с весом :0.5
+_COMBO_RE = re.compile(r'^([2-9TJQKA])([shdc])([2-9TJQKA])([shdc])$')
+_HAND_RE = re.compile(r'^([2-9TJQKA])([2-9TJQKA])([so]?)(\+?)$')
+_SPAN_RE = re.compile(r'^([2-9TJQKA])([2-9TJQKA])([so]?)-([2-9TJQKA])([2-9TJQKA])\3$')
+
+
+def _hand_combos(high: int, low: int, kind: str) -> list[int]:
+    '''
+    Возвращает номера комбинаций для руки вида AKs / AKo / AK / QQ
+    :param high: ранг первой карты
+    :param low: ранг второй карты
+    :param kind: 's' - одномастные, 'o' - разномастные, '' - все
+    :return: список номеров комбинаций
+    '''
+    result = []
+    for suit_high in range(4):
+        for suit_low in range(4):
+            first, second = high * 4 + suit_high, low * 4 + suit_low
+            if first == second:
+                continue
+            if high == low and first > second:
+                continue
+            if kind == 's' and suit_high != suit_low:
+                continue
+            if kind == 'o' and suit_high == suit_low:
+                continue
+            result.append(COMBO_INDEX[first, second])
+    return result
+
+def _token_combos(token: str) -> list[int]:
+    '''
+    Разбирает один элемент диапазона
+    :param token: элемент без веса, например 'A2s+'
+    :return: список номеров комбинаций
+    '''
+    match = _COMBO_RE.match(token)
+    if match:
+        first = RANKS.index(match.group(1)) * 4 + SUITS.index(match.group(2))
+        second = RANKS.index(match.group(3)) * 4 + SUITS.index(match.group(4))
+        if first == second:
+            raise ValueError(f"некорректная комбинация в диапазоне: {token}")
+        return [COMBO_INDEX[first, second]]
+
+    match = _HAND_RE.match(token)
+    if match:
+        high, low = RANKS.index(match.group(1)), RANKS.index(match.group(2))
+        kind, plus = match.group(3), match.group(4)
+        high, low = max(high, low), min(high, low)
+        if high == low:
+            if kind:
+                raise ValueError(f"пара не может быть одномастной или разномастной: {token}")
+            # QQ+ - все пары от QQ до AA
+            ranks = range(high, 13) if plus else [high]
+            return [c for rank in ranks for c in _hand_combos(rank, rank, '')]
+        # A2s+ - старшая карта фиксирована, младшая растет до старшей - 1
+        kickers = range(low, high) if plus else [low]
+        return [c for kicker in kickers for c in _hand_combos(high, kicker, kind)]
+
+    match = _SPAN_RE.match(token)
+    if match:
+        first_high, first_low = RANKS.index(match.group(1)), RANKS.index(match.group(2))
+        kind = match.group(3)
+        last_high, last_low = RANKS.index(match.group(4)), RANKS.index(match.group(5))
+        if first_high == first_low and last_high == last_low:
+            # 77-99 - пары между двумя парами
+            low, high = sorted((first_high, last_high))
+            return [c for rank in range(low, high + 1) for c in _hand_combos(rank, rank, '')]
+        if first_high == last_high and first_high not in (first_low, last_low):
+            # A5s-A2s - старшая карта одна, младшая в заданных пределах
+            low, high = sorted((first_low, last_low))
+            return [c for kicker in range(low, high + 1) for c in _hand_combos(first_high, kicker, kind)]
+
+    raise ValueError(f"не удалось разобрать элемент диапазона: {token}")
+
+def parse_range(text: str) -> np.ndarray:
+    '''
+    Разбирает строку диапазона в вектор весов 1326 комбинаций.
+    Элементы разделяются запятыми или пробелами, вес задается через двоеточие: "AKs, QQ+:0.5"
+    :param text: строка диапазона
+    :return: массив весов формы (1326,)
+    '''
+    weights = np.zeros(N_COMBOS, dtype=np.float64)
+    for token in re.split(r'[,\s]+', text.strip()):
+        if not token:
+            continue
+        token, _, weight = token.partition(':')
+        weights[_token_combos(token)] = float(weight) if weight else 1.0
+    return weights
+
+def range_to_weights(range_hands) -> np.ndarray | None:
+    '''
+    Приводит диапазон к вектору весов 1326 комбинаций
+    :param range_hands: строка диапазона, список элементов диапазона или вектор весов (1326,)
+    :return: массив весов или None, если диапазон пустой (все руки равновероятны)
+    '''
+    if range_hands is None:
+        return None
+
+    if isinstance(range_hands, np.ndarray):
+        if range_hands.shape != (N_COMBOS,):
+            raise ValueError(f"вектор весов диапазона должен иметь размер {N_COMBOS}")
+        weights = range_hands.astype(np.float64)
+    elif isinstance(range_hands, str):
+        weights = parse_range(range_hands)
+    elif len(range_hands) == 0:
+        return None
+    else:
+        weights = parse_range(', '.join(range_hands))
+
+    if (weights < 0).any() or weights.sum() == 0:
+        raise ValueError("веса диапазона должны быть неотрицательными и не все нулевыми")
+    return weights
+
+def build_alias_table(weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Строит alias-таблицу (метод Vose) для выборки за O(1) на одну руку
+    :param weights: неотрицательные веса
+    :return: (prob, alias) - вероятность остаться в ячейке и номер ячейки-замены
+    '''
+    n = len(weights)
+    scaled = weights * n / weights.sum()
+    prob = np.ones(n, dtype=np.float64)
+    alias = np.arange(n, dtype=np.intp)
+
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        if scaled[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+
+    return prob, alias
+
+def sample_alias(prob: np.ndarray, alias: np.ndarray, size, rng: np.random.Generator) -> np.ndarray:
+    '''
+    Выборка номеров по alias-таблице
+    :param prob: вероятности alias-таблицы
+    :param alias: замены alias-таблицы
+    :param size: форма результата
+    :param rng: генератор случайных чисел
+    :return: массив номеров
+    '''
+    cells = rng.integers(0, len(prob), size=size)
+    keep = rng.random(size) < prob[cells]
+    return np.where(keep, cells, alias[cells])
+
+def _villain_conflicts(masks: np.ndarray) -> np.ndarray:
+    '''Находит строки, где руки противников делят хотя бы одну карту'''
+    used = np.zeros(len(masks), dtype=np.uint64)
+    conflict = np.zeros(len(masks), dtype=bool)
+    for j in range(masks.shape[1]):
+        conflict |= (used & masks[:, j]) != 0
+        used |= masks[:, j]
+    return conflict
+
+def simulate_range_equity_counts(hero: np.ndarray,
+                                 board: np.ndarray,
+                                 active: int,
+                                 n_simulations: int,
+                                 weights: np.ndarray,
+                                 rng: np.random.Generator | None = None) -> tuple[int, int]:
+    '''
+    Монте-Карло против взвешенного диапазона: руки противников выбираются по alias-таблице
+    из комбинаций, не пересекающихся с картами героя и доски, затем добирается доска
+    :param hero: индексы карт героя
+    :param board: индексы карт доски
+    :param active: количество активных игроков (вместе с героем)
+    :param n_simulations: количество симуляций
+    :param weights: веса 1326 комбинаций (один диапазон для всех противников)
+    :param rng: генератор случайных чисел NumPy (None - случайное зерно)
+    :return: (wins, ties)
+    '''
+    rng = make_rng(rng)
+
+    hero = np.asarray(hero, dtype=np.intp)
+    board = np.asarray(board, dtype=np.intp)
+    n_villains = max(active - 1, 0)
+    cards_missing = 5 - len(board)
+
+    # Убираем комбинации, конфликтующие с известными картами
+    known_mask = np.bitwise_or.reduce(CARD_BITS[np.concatenate([hero, board])])
+    weights = np.where((COMBO_MASKS & known_mask) == 0, weights, 0.0)
+    if weights.sum() == 0:
+        raise ValueError("в диапазоне не осталось рук после удаления известных карт")
+    prob, alias = build_alias_table(weights)
+
+    wins = ties = 0
+    done = 0
+    while done < n_simulations:
+        n = min(CHUNK_SIZE, n_simulations - done)
+
+        # Руки противников; строки, где руки пересекаются, перевыбираются целиком
+        villain_idx = sample_alias(prob, alias, (n, n_villains), rng)
+        conflict = _villain_conflicts(COMBO_MASKS[villain_idx])
+        rounds = 0
+        while conflict.any():
+            rounds += 1
+            if rounds > MAX_RESAMPLE_ROUNDS:
+                raise ValueError("не удалось раздать непересекающиеся руки противников из диапазона")
+            rows = np.nonzero(conflict)[0]
+            villain_idx[rows] = sample_alias(prob, alias, (len(rows), n_villains), rng)
+            conflict[rows] = _villain_conflicts(COMBO_MASKS[villain_idx[rows]])
+        villains = COMBOS[villain_idx]
+
+        # Добираем доску из карт, которые не у героя, не на доске и не у противников
+        keys = rng.random((n, DECK_SIZE))
+        keys[:, np.concatenate([hero, board])] = 2.0
+        np.put_along_axis(keys, villains.reshape(n, 2 * n_villains), 2.0, axis=1)
+        runouts = keys.argsort(axis=1)[:, :cards_missing]
+        boards = np.concatenate([np.broadcast_to(board, (n, len(board))), runouts], axis=1)
+
+        chunk_wins, chunk_ties = count_showdowns(hero, boards, villains)
+        wins += chunk_wins
+        ties += chunk_ties
+        done += n
+
+    return wins, ties
@@ -0,0 +1,122 @@
+# упреждающий расчет equity: карты героя, доска и количество соперников известны раньше,
+# чем появляются кнопки действий, поэтому симуляции запускаются в фоне, пока соперники думают.
+# Результаты копятся в EQUITY_CACHE, и best_action к ходу героя обычно берет equity из кэша.
+# Если ход героя наступил во время расчета той же ситуации, best_action ждет текущий блок
+# (computing_key в calculate_equity_fast) и досчитывает только недостающие симуляции
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from treys import Card
+
+try:
+    from .best_action import calculate_equity_fast, ADAPTIVE_FIRST_CHUNK
+except ImportError:
+    from best_action import calculate_equity_fast, ADAPTIVE_FIRST_CHUNK
+
+# Настройка логгера для этого модуля
+logger = logging.getLogger(__name__)
+
+# Допустимое количество карт на доске
+BOARD_SIZES = (0, 3, 4, 5)
+
+
+class EquityPrecomputer:
+    '''
+    Фоновый расчет equity для текущей ситуации за столом.
+    Одновременно считается одна ситуация: новая ситуация (другая доска, руки или количество игроков)
+    отменяет устаревший расчет. Симуляции идут блоками, отмена проверяется между блоками.
+    '''
+
+    def __init__(self, n_simulations: int, first_chunk: int = ADAPTIVE_FIRST_CHUNK):
+        '''
+        :param n_simulations: сколько симуляций накопить в кэше (столько же, сколько использует best_action)
+        :param first_chunk: размер первого блока симуляций, следующие вдвое больше
+        '''
+        self.n_simulations = n_simulations
+        self.first_chunk = first_chunk
+        self.lock = threading.Lock()
+        self.executor = None
+        self.current_key = None
+        self.current_cancel = None
+        self.started = 0
+        self.cancelled = 0
+        self.completed = 0
+
+    def submit(self, hero_cards: list[str], board_cards: list[str], active: int) -> bool:
+        '''
+        Запускает расчет для ситуации, если она еще не считается; устаревший расчет отменяется
+        :param hero_cards: карты героя, например ['As', 'Kd']
+        :param board_cards: карты доски
+        :param active: количество активных игроков, как для best_action
+        :return: True, если запущен новый расчет
+        '''
+        if len(hero_cards) != 2 or len(board_cards) not in BOARD_SIZES or active < 1:
+            return False
+
+        key = (tuple(sorted(hero_cards)), tuple(sorted(board_cards)), active)
+        with self.lock:
+            if key == self.current_key:
+                return False
+            self._cancel_current()
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='equity')
+            cancel = threading.Event()
+            self.current_key, self.current_cancel = key, cancel
+            self.started += 1
+            self.executor.submit(self._run, key, cancel)
+        return True
+
+    def cancel(self):
+        '''Отменяет текущий расчет (например, после остановки анализа)'''
+        with self.lock:
+            self._cancel_current()
+
+    def _cancel_current(self):
+        '''Отмечает текущий расчет отмененным (вызывается под self.lock)'''
+        if self.current_cancel is not None and not self.current_cancel.is_set():
+            self.current_cancel.set()
+            self.cancelled += 1
+        self.current_key, self.current_cancel = None, None
+
+    def _run(self, key: tuple, cancel: threading.Event):
+        '''Симуляции блоками до n_simulations или до отмены'''
+        if cancel.is_set():
+            return
+
+        hero_cards, board_cards, active = key
+        try:
+            hero_cards = [Card.new(c) for c in hero_cards]
+            board_cards = [Card.new(c) for c in board_cards]
+
+            samples = min(self.first_chunk, self.n_simulations)
+            while not cancel.is_set():
+                # кэш досчитывает только недостающие симуляции, префлоп и точный перебор возвращаются сразу
+                calculate_equity_fast(hero_cards, board_cards, active, samples)
+                if samples >= self.n_simulations:
+                    with self.lock:
+                        # готовый расчет больше не считается отмененным при смене ситуации
+                        cancel.set()
+                        self.completed += 1
+                    logger.info("Упреждающий расчет equity готов: %s", key)
+                    return
+                samples = min(samples * 2, self.n_simulations)
+        except Exception as e:
+            logger.error("Ошибка упреждающего расчета equity %s: %s", key, e)
+
+    def stats(self) -> dict[str, int]:
+        '''
+        Счетчики работы
+        :return: словарь started, cancelled, completed
+        '''
+        with self.lock:
+            return {'started': self.started, 'cancelled': self.cancelled, 'completed': self.completed}
+
+    def shutdown(self):
+        '''Отменяет расчет и останавливает фоновый поток'''
+        with self.lock:
+            self._cancel_current()
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,56 @@
+import sys
+import os
+from statistics import NormalDist
+from treys import Card
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pokerlogic import best_action as ba
+from src.pokerlogic.equity_cache import MemoryCache
+
+
+def test_rank_actions_by_ev():
+    """Действия сортируются по EV, порядок меняется вместе с equity"""
+    actions = ['call_10', 'raise_20', 'raise_30']
+    assert ba.rank_actions(actions, 0.9, 10, 0.5) == ['raise_30', 'raise_20', 'call_10']
+    assert ba.rank_actions(actions, 0.1, 10, 0.5) == ['raise_20', 'raise_30', 'call_10']
+
+
+def test_adaptive_stops_early_in_clear_spot(monkeypatch):
+    """В очевидной ситуации расчет останавливается после первого блока симуляций"""
+    monkeypatch.setattr(ba, 'EQUITY_CACHE', MemoryCache())
+    hero = [Card.new('Ah'), Card.new('Ad')]
+    board = [Card.new(c) for c in ['As', 'Ac', '2h']]
+    actions = list(ba.get_available_actions(10, 5, 100, 1))
+
+    equity, std_error = ba.calculate_equity_adaptive(hero, board, 4, 10000, actions, 10, 0.5, rng=7)
+    key = ba.get_cache_key(ba.cards_to_indices(hero), ba.cards_to_indices(board), 4)
+    assert ba.EQUITY_CACHE.get(key).samples == ba.ADAPTIVE_FIRST_CHUNK
+
+    # остановка по правилу: порядок действий одинаков на обеих границах доверительного интервала
+    z = NormalDist().inv_cdf((1 + ba.ADAPTIVE_CONFIDENCE) / 2)
+    lower, upper = max(equity - z * std_error, 0.0), min(equity + z * std_error, 1.0)
+    assert ba.rank_actions(actions, lower, 10, 0.5) == ba.rank_actions(actions, upper, 10, 0.5)
+
+
+def test_adaptive_matches_full_run(monkeypatch):
+    """Рекомендованное действие совпадает с полным расчетом"""
+    args = {
+        'size': 6,
+        'active': 3,
+        'hero_pos': 'BB',
+        'hero_cards': ['Kh', 'Qd'],
+        'range_hands': [],
+        'board_cards': ['Ks', '9c', '2h'],
+        'pot': 20,
+        'hero_stack': 100,
+        'to_call': 5,
+        'n_simulations': 20000,
+        'seed': 11,
+    }
+    monkeypatch.setattr(ba, 'EQUITY_CACHE', MemoryCache())
+    adaptive = ba.best_action(**args, adaptive=True)
+    monkeypatch.setattr(ba, 'EQUITY_CACHE', MemoryCache())
+    full = ba.best_action(**args)
+
+    assert max(adaptive, key=adaptive.get) == max(full, key=full.get)
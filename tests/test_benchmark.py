@@ -0,0 +1,83 @@
+import sys
+import os
+import importlib.util
+import pytest
+import numpy as np
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cv.benchmark import box_iou, match_detections, detection_f1, parse_agreement
+from src.cv.profiles import PROFILES, get_profile
+
+
+def test_box_iou():
+    """IoU одинаковых, соседних и наполовину перекрытых боксов"""
+    assert box_iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert box_iou((0, 0, 10, 10), (10, 0, 20, 10)) == 0.0
+    assert abs(box_iou((0, 0, 10, 10), (5, 0, 15, 10)) - 1 / 3) < 1e-9
+
+
+def test_match_detections():
+    """Совпадают только боксы одного класса с IoU не меньше порога"""
+    reference = [{'name': 'As', 'bbox': [0, 0, 10, 10], 'conf': 0.9},
+                 {'name': 'Kd', 'bbox': [20, 0, 30, 10], 'conf': 0.9}]
+    detections = [{'name': 'As', 'bbox': [1, 0, 11, 10], 'conf': 0.8},
+                  {'name': 'Qd', 'bbox': [20, 0, 30, 10], 'conf': 0.7},
+                  {'name': 'pot_box', 'bbox': [50, 50, 60, 60], 'conf': 0.5}]
+    assert match_detections(detections, reference) == (1, 2, 1)
+    assert detection_f1(1, 2, 1) == 2 / 5
+    assert detection_f1(0, 0, 0) == 1.0
+
+
+def test_parse_agreement():
+    """Карты сравниваются без учета порядка, пустые результаты согласованы"""
+    reference = {'size': 6, 'active': 2, 'pot': 10, 'to_call': 2, 'hero_pos': 'BTN', 'hero_stack': 100,
+                 'hero_cards': ['As', 'Kd'], 'board_cards': ['2c', '7h', '9s'], 'street': 'Flop'}
+    result = dict(reference, hero_cards=['Kd', 'As'], pot=12)
+    assert parse_agreement(result, reference) == 8 / 9
+    assert parse_agreement({}, {}) == 1.0
+    assert parse_agreement({}, reference) == 0.0
+
+
+def test_profiles():
+    """Профили отличаются размером входа, по умолчанию - исходные настройки"""
+    assert get_profile()['imgsz'] == 768
+    assert PROFILES['fast']['imgsz'] < PROFILES['balanced']['imgsz'] < PROFILES['accurate']['imgsz']
+    assert get_profile({'imgsz': 640})['psm_configs'] == PROFILES['accurate']['psm_configs']
+
+
+@pytest.mark.skipif(importlib.util.find_spec("cv2") is None, reason="нужен opencv")
+def test_run_profile_follows_parse_path(monkeypatch):
+    """Карты детектируются только при областях карт, у профиля своя статистика OCR, общая не меняется"""
+    from src.cv import benchmark, detect, ocr, parser
+    from src.cv.ocr_strategy import OcrStrategy
+
+    table = [{'name': 'player_panel', 'bbox': [0, 0, 10, 10], 'conf': 0.9}]
+    cards = [{'name': 'As', 'bbox': [20, 20, 30, 30], 'conf': 0.9}]
+    card_calls, strategies = [], []
+
+    def fake_detect_all_cards(frame, conf, imgsz):
+        card_calls.append(imgsz)
+        return cards
+
+    def fake_parse_image(frame, detections, card_detections, profile):
+        strategies.append(ocr.OCR_STRATEGY)
+        return {'card_detections': card_detections}
+
+    monkeypatch.setattr(detect, 'detect_all_cards', fake_detect_all_cards)
+    monkeypatch.setattr(parser, 'parse_image', fake_parse_image)
+    shared = ocr.OCR_STRATEGY
+    strategy = OcrStrategy(path=None)
+    frame = np.zeros((40, 40, 3), dtype=np.uint8)
+
+    monkeypatch.setattr(detect, 'detect_image', lambda frame, conf, imgsz: table)
+    assert benchmark.run_profile(frame, 'fast', strategy)[:2] == (table, {'card_detections': []})
+    assert card_calls == []
+
+    board = table + [{'name': 'board_card', 'bbox': [15, 15, 35, 35], 'conf': 0.9}]
+    monkeypatch.setattr(detect, 'detect_image', lambda frame, conf, imgsz: board)
+    assert benchmark.run_profile(frame, 'fast', strategy)[:2] == (board + cards, {'card_detections': cards})
+    assert card_calls == [PROFILES['fast']['imgsz']]
+
+    assert strategies == [strategy, strategy]
+    assert ocr.OCR_STRATEGY is shared
@@ -0,0 +1,49 @@
+import sys
+import os
+from treys import Card
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pokerlogic.equity_engine import cards_to_indices
+from src.pokerlogic.best_action import get_cache_key, get_range_cache_key, RANGE_KEY_TAG
+from src.pokerlogic.ranges import range_to_weights
+
+
+def key(hero: list, board: list, active: int) -> int:
+    return get_cache_key(cards_to_indices([Card.new(c) for c in hero]),
+                         cards_to_indices([Card.new(c) for c in board]),
+                         active)
+
+
+def test_suit_isomorphic_hands_share_key():
+    """Руки, отличающиеся только перестановкой мастей, получают один ключ"""
+    assert key(['As', 'Kd'], ['2s', '7h', '9c'], 3) == key(['Ah', 'Kc'], ['2h', '7s', '9d'], 3)
+    assert key(['As', 'Kd'], ['2s', '7h', '9c'], 3) != key(['Ah', 'Ks'], ['2h', '7s', '9d'], 3)
+    assert key(['Ah', 'Kh'], ['2h', '7c', '9c', 'Td'], 2) == key(['Ac', 'Kc'], ['Th', '9d', '7d', '2c'], 2)
+    assert key(['Kd', 'As'], ['9c', '2s', '7h'], 3) == key(['As', 'Kd'], ['2s', '7h', '9c'], 3)
+
+
+def test_different_spots_have_different_keys():
+    """Разные по сути ситуации не смешиваются"""
+    assert key(['As', 'Ks'], ['2s', '7h', '9c'], 3) != key(['As', 'Kd'], ['2s', '7h', '9c'], 3)
+    assert key(['As', 'Kd'], ['2s', '7h', '9c'], 3) != key(['As', 'Kd'], ['2s', '7h', '9c'], 4)
+    assert key(['As', 'Kd'], ['2s', '7h'], 3) != key(['As', 'Kd', '2s'], ['7h'], 3)
+
+
+def test_key_is_compact_integer():
+    """Ключ - целое число, помещающееся в 64 бита"""
+    value = key(['As', 'Ad'], ['Ac', 'Ah', 'Ks', 'Kh', 'Kd'], 9)
+    assert isinstance(value, int)
+    assert 0 < value < 2 ** 63
+
+
+def test_range_keys_do_not_overlap_canonical_keys():
+    """Ключи расчетов против диапазона лежат в своем пространстве и не совпадают с обычными ключами"""
+    largest = key(['Ac', 'Ad'], ['Ah', 'As', 'Kc', 'Kd', 'Kh'], 15)
+    assert largest < RANGE_KEY_TAG
+
+    range_key = get_range_cache_key(cards_to_indices([Card.new('As'), Card.new('Kd')]),
+                                    cards_to_indices([Card.new(c) for c in ['2s', '7h', '9c']]),
+                                    3, range_to_weights("22+, AKs"))
+    assert range_key & RANGE_KEY_TAG
+    assert 0 < range_key < 2 ** 63
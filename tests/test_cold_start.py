@@ -0,0 +1,53 @@
+import sys
+import os
+import subprocess
+import importlib.util
+import pytest
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Допустимое время холодного импорта логики (секунды), с запасом на медленные машины
+COLD_START_BUDGET = 3.0
+
+
+def measure_cold_import(statement: str) -> tuple[float, str]:
+    '''
+    Выполняет импорт в чистом процессе и измеряет его время
+    :param statement: код импорта
+    :return: (время импорта в секундах, вывод проверок после импорта)
+    '''
+    code = ("import time\n"
+            "start = time.perf_counter()\n"
+            f"{statement}\n"
+            "print(time.perf_counter() - start)\n")
+    output = subprocess.run([sys.executable, "-c", code],
+                            cwd=ROOT_DIR,
+                            capture_output=True,
+                            text=True,
+                            check=True).stdout.split()
+    return float(output[-1]), ' '.join(output[:-1])
+
+
+def test_best_action_cold_start():
+    """Импорт логики не строит таблицу рангов и не открывает файл кэша"""
+    seconds, checks = measure_cold_import(
+        "import src.pokerlogic.best_action as ba\n"
+        "from src.pokerlogic import equity_engine\n"
+        "print(equity_engine._RANK_TABLE is None, getattr(ba.EQUITY_CACHE, 'connection', None) is None)")
+    print(f"Холодный импорт best_action: {seconds:.3f} секунд")
+    assert checks == "True True"
+    assert seconds < COLD_START_BUDGET
+
+
+@pytest.mark.skipif(importlib.util.find_spec("cv2") is None, reason="нужен opencv")
+def test_detect_cold_start():
+    """Импорт детектора не загружает ultralytics и модели"""
+    seconds, checks = measure_cold_import(
+        "import src.cv.detect as detect\n"
+        "import sys\n"
+        "print('ultralytics' in sys.modules, len(detect._MODELS))")
+    print(f"Холодный импорт detect: {seconds:.3f} секунд")
+    assert checks == "False 0"
+    assert seconds < COLD_START_BUDGET
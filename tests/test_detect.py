@@ -0,0 +1,116 @@
+import sys
+import os
+import types
+import inspect
+import importlib.util
+import pytest
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytestmark = pytest.mark.skipif(importlib.util.find_spec("cv2") is None, reason="нужен opencv")
+
+
+class FakeYOLO:
+    """Модель ultralytics без torch: запоминает загрузки и экспорты"""
+    loaded = []
+    exports = []
+    export_error = None
+
+    def __init__(self, path, task=None, verbose=False):
+        self.path = path
+        FakeYOLO.loaded.append(path)
+
+    def export(self, format, **options):
+        if FakeYOLO.export_error is not None:
+            raise FakeYOLO.export_error
+        FakeYOLO.exports.append((format, options))
+        result = os.path.splitext(self.path)[0] + '.onnx'
+        with open(result, 'w') as f:
+            f.write(format)
+        return result
+
+
+@pytest.fixture
+def detect(monkeypatch):
+    """Модуль detect с поддельным ultralytics и пустым набором загруженных моделей"""
+    from src.cv import detect
+
+    monkeypatch.setitem(sys.modules, 'ultralytics', types.SimpleNamespace(YOLO=FakeYOLO))
+    monkeypatch.setattr(detect, '_MODELS', {})
+    FakeYOLO.loaded, FakeYOLO.exports, FakeYOLO.export_error = [], [], None
+    return detect
+
+
+def test_exported_path_per_size(detect, monkeypatch):
+    """Каждый размер входа экспортируется в свой файл, INT8 отмечается в имени"""
+    assert detect.get_exported_path('models/a.pt', 'pytorch', 512) == 'models/a.pt'
+    assert detect.get_exported_path('models/a.pt', 'onnx', 512) == 'models/a_512.onnx'
+    assert detect.get_exported_path('models/a.pt', 'openvino', 640) == 'models/a_640_openvino_model'
+    monkeypatch.setattr(detect, 'EXPORT_INT8', True)
+    assert detect.get_exported_path('models/a.pt', 'openvino', 768) == 'models/a_768_int8_openvino_model'
+    with pytest.raises(ValueError):
+        detect.get_exported_path('models/a.pt', 'tensorrt')
+
+
+def test_export_moves_result_and_reuses_it(detect, tmp_path):
+    """Экспорт идет под размер профиля, результат переносится под имя с размером и не повторяется"""
+    model_path = str(tmp_path / 'a.pt')
+
+    assert detect.export_model(model_path, 'onnx', 512) == str(tmp_path / 'a_512.onnx')
+    assert detect.export_model(model_path, 'onnx', 512) == str(tmp_path / 'a_512.onnx')
+    assert detect.export_model(model_path, 'onnx', 640) == str(tmp_path / 'a_640.onnx')
+    assert FakeYOLO.exports == [('onnx', {'imgsz': 512, 'dynamic': True}), ('onnx', {'imgsz': 640, 'dynamic': True})]
+    assert sorted(os.listdir(tmp_path)) == ['a_512.onnx', 'a_640.onnx']
+
+
+def test_int8_requires_calibration_data(detect, tmp_path, monkeypatch):
+    """INT8 калибруется только на своих данных, без них экспорт не запускается"""
+    monkeypatch.setattr(detect, 'EXPORT_INT8', True)
+    monkeypatch.setattr(detect, 'CALIBRATION_DATA', str(tmp_path / 'calibration.yaml'))
+    with pytest.raises(FileNotFoundError):
+        detect.export_model(str(tmp_path / 'a.pt'), 'openvino', 512)
+    assert FakeYOLO.exports == []
+
+    (tmp_path / 'calibration.yaml').write_text('path: tables')
+    detect.export_model(str(tmp_path / 'a.pt'), 'openvino', 512)
+    assert FakeYOLO.exports == [('openvino', {'imgsz': 512, 'dynamic': True, 'int8': True,
+                                              'data': str(tmp_path / 'calibration.yaml')})]
+
+
+def test_falls_back_to_pytorch_when_export_unavailable(detect, tmp_path, monkeypatch):
+    """Если движок экспорта не установлен, загружается исходная модель и экспорт не повторяется"""
+    monkeypatch.setattr(detect, 'INFERENCE_BACKEND', 'onnx')
+    FakeYOLO.export_error = ImportError("onnx не установлен")
+    model_path = str(tmp_path / 'a.pt')
+
+    model = detect.load_model(model_path, 640)
+    assert model.path == model_path
+    assert detect.load_model(model_path, 640) is model
+    assert FakeYOLO.loaded == [model_path, model_path]   # для попытки экспорта и для инференса
+
+    FakeYOLO.export_error = None
+    assert detect.load_model(model_path, 512).path == str(tmp_path / 'a_512.onnx')
+
+
+def test_cards_in_bbox_edges():
+    """Карта относится к области, если пересекает или касается ее края; соседняя область ее не получает"""
+    from src.cv.detect import cards_in_bbox
+
+    hero, board = [100, 100, 200, 150], [220, 100, 400, 150]
+    cards = [{'name': 'As', 'bbox': [100, 100, 150, 150], 'conf': 0.9},   # совпадает с левым краем героя
+             {'name': 'Kd', 'bbox': [190, 105, 215, 150], 'conf': 0.9},   # выходит за правый край героя
+             {'name': '2c', 'bbox': [201, 100, 219, 150], 'conf': 0.9},   # в зазоре между областями
+             {'name': '7h', 'bbox': [205, 100, 220, 150], 'conf': 0.9},   # касается левого края доски
+             {'name': 'Td', 'bbox': [400, 151, 440, 190], 'conf': 0.9}]   # на пиксель ниже угла доски
+
+    assert cards_in_bbox(cards, hero) == ['As', 'Kd']
+    assert cards_in_bbox(cards, board) == ['7h']
+    assert cards_in_bbox([], board) == []
+
+
+def test_public_functions_keep_image_path_keyword():
+    """Публичные функции детекции принимают изображение по прежнему ключевому слову image_path"""
+    from src.cv import detect
+
+    for function in (detect.detect_image, detect.detect_all_cards, detect.detect_cards):
+        assert list(inspect.signature(function).parameters)[0] == 'image_path'
@@ -1,12 +1,148 @@
-import pickle
+import sys
 import os
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-if os.path.exists('src/pokerlogic/equity_cache.pickle'):
-    with open('src/pokerlogic/equity_cache.pickle', 'rb') as f:
-        cache = pickle.load(f)
-    print(f'Размер кэша: {len(cache)} записей')
-    for i, (key, value) in enumerate(list(cache.items())):
-        print(f'{i+1}. {key[:10]}... = {value:.3f}')
+from src.pokerlogic.equity_cache import MemoryCache, SQLiteCache
+from src.pokerlogic.equity_engine import EquityStats
+from src.pokerlogic import best_action as ba
+from treys import Card
 
-else:
-    print('Файл кэша не найден')
+
+def test_memory_cache_evicts_least_recently_used():
+    """При превышении лимита вытесняется давно не использованная запись"""
+    cache = MemoryCache(max_entries=2)
+    cache.put(1, 0.1)
+    cache.put(2, 0.2)
+    assert cache.get(1) == 0.1
+    cache.put(3, 0.3)
+
+    assert cache.get(2) is None
+    assert cache.get(1) == 0.1
+    assert cache.get(3) == 0.3
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'evictions': 1, 'size': 2}
+
+    # проверка наличия не меняет счетчики
+    assert 1 in cache and 2 not in cache
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'evictions': 1, 'size': 2}
+
+
+def test_sqlite_cache_persists_incrementally(tmp_path):
+    """Записи сбрасываются на диск пачками и читаются новым экземпляром по одной"""
+    path = str(tmp_path / "equity_cache.sqlite3")
+    cache = SQLiteCache(path, flush_every=2)
+    cache.put(10, EquityStats(5, 1, 10))
+    assert not os.path.exists(path)
+    cache.put(11, EquityStats(6, 0, 10))
+    assert cache.disk_size() == 2
+    cache.put(12, EquityStats(7, 2, 45, exact=True))
+    cache.close()
+
+    reopened = SQLiteCache(path)
+    assert len(reopened) == 0
+    assert reopened.get(12) == EquityStats(7, 2, 45, exact=True)
+    assert reopened.get(13) is None
+    assert reopened.stats()['hits'] == 1
+    assert reopened.stats()['misses'] == 1
+
+
+def test_sqlite_cache_caps_file_size(tmp_path):
+    """В файле остаются только последние записанные max_disk_entries записей"""
+    cache = SQLiteCache(str(tmp_path / "equity_cache.sqlite3"), max_entries=1, max_disk_entries=3, flush_every=1)
+    for key in range(5):
+        cache.put(key, EquityStats(key, 0, 10))
+    cache.put(0, EquityStats(9, 0, 10))
+
+    assert cache.disk_size() == 3
+    assert cache.get(0) == EquityStats(9, 0, 10)
+    assert cache.get(1) is None
+    assert cache.get(4) == EquityStats(4, 0, 10)
+
+
+def test_sqlite_cache_evicts_least_recently_used_on_disk(tmp_path):
+    """Из файла вытесняются давно не использованные записи: чтение (с диска или из памяти) продлевает запись"""
+    path = str(tmp_path / "equity_cache.sqlite3")
+    cache = SQLiteCache(path, max_entries=1, max_disk_entries=3, flush_every=1)
+    for key in range(3):
+        cache.put(key, EquityStats(key, 0, 10))
+    assert cache.get(0) == EquityStats(0, 0, 10)   # чтение с диска
+    cache.put(3, EquityStats(3, 0, 10))
+    assert cache.get(3) == EquityStats(3, 0, 10)   # попадание в память
+    cache.put(4, EquityStats(4, 0, 10))
+    cache.close()
+
+    reopened = SQLiteCache(path)
+    assert reopened.disk_size() == 3
+    assert [key for key in range(5) if key in reopened] == [0, 3, 4]
+
+
+def test_sqlite_cache_opens_file_without_used_column(tmp_path):
+    """Файл прежней версии без отметки used читается, его записи вытесняются первыми в порядке записи"""
+    import sqlite3
+
+    path = str(tmp_path / "equity_cache.sqlite3")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE equity_stats (key INTEGER NOT NULL UNIQUE, wins INTEGER NOT NULL, "
+                       "ties INTEGER NOT NULL, samples INTEGER NOT NULL, exact INTEGER NOT NULL)")
+    connection.executemany("INSERT INTO equity_stats VALUES (?, ?, ?, ?, 0)", [(key, key, 0, 10) for key in range(3)])
+    connection.commit()
+    connection.close()
+
+    cache = SQLiteCache(path, max_entries=1, max_disk_entries=3, flush_every=1)
+    assert cache.get(1) == EquityStats(1, 0, 10)
+    cache.put(5, EquityStats(5, 0, 10))
+    assert [key for key in range(6) if key in cache] == [1, 2, 5]
+    cache.close()
+
+
+def test_equity_stats_merge_and_std_error():
+    """Серии симуляций складываются, точный результат имеет нулевую ошибку"""
+    stats = EquityStats(60, 10, 100).merge(EquityStats(40, 10, 100))
+    assert stats == EquityStats(100, 20, 200)
+    assert stats.equity == (100 + 0.3 * 20) / 200
+    assert 0 < stats.std_error < EquityStats(60, 10, 100).std_error
+
+    exact = EquityStats(500, 10, 990, exact=True)
+    assert exact.std_error == 0
+    assert stats.merge(exact) == exact
+
+
+def test_cached_entry_is_refined(monkeypatch):
+    """Повторный запрос с большим числом симуляций досчитывает только недостающие"""
+    monkeypatch.setattr(ba, 'EQUITY_CACHE', MemoryCache())
+    hero = [Card.new('Kh'), Card.new('Qd')]
+    board = [Card.new(c) for c in ['Ks', '9c', '2h']]
+
+    _, std_error_small = ba.calculate_equity_fast(hero, board, 3, 3000)
+    _, std_error_large = ba.calculate_equity_fast(hero, board, 3, 10000)
+    key = ba.get_cache_key(ba.cards_to_indices(hero), ba.cards_to_indices(board), 3)
+    assert ba.EQUITY_CACHE.get(key).samples == 10000
+    assert std_error_large < std_error_small
+
+    _, std_error = ba.calculate_equity_fast(hero, board, 3, 100000, target_std_error=0.004)
+    assert std_error <= 0.004
+    assert ba.EQUITY_CACHE.get(key).samples < 100000
+
+
+def test_concurrent_merges_keep_all_samples(tmp_path):
+    """Параллельные объединения одного ключа не теряют симуляции, в том числе подгруженные с диска"""
+    import threading
+
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = SQLiteCache(path, max_entries=1, flush_every=7)
+    cache.put(1, EquityStats(0, 0, 0))
+    cache.flush()
+
+    def worker(other):
+        for _ in range(200):
+            cache.merge(1, EquityStats(1, 0, 2))
+            # вытесняем ключ из памяти, чтобы следующее объединение читало его с диска
+            cache.put(other, EquityStats(0, 0, 1))
+
+    threads = [threading.Thread(target=worker, args=(other,)) for other in (2, 3, 4, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.get(1) == EquityStats(800, 0, 1600)
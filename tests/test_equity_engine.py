@@ -0,0 +1,120 @@
+import sys
+import os
+import random
+import numpy as np
+from treys import Card, Deck, Evaluator
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pokerlogic.equity_engine import (cards_to_indices, evaluate_seven, simulate_equity_counts, enumerate_equity_counts,
+                                          build_rank_table, get_rank_table, load_rank_table, save_rank_table)
+from src.pokerlogic.best_action import simulate_equity_treys, count_exact_deals
+from src.pokerlogic.preflop_table import hand_class_index, representative_hand
+
+
+def test_evaluate_seven_matches_treys():
+    """Ранги таблицы совпадают с treys на случайных руках"""
+    evaluator = Evaluator()
+    rnd = random.Random(7)
+    hands = [rnd.sample(Deck.GetFullDeck(), 7) for _ in range(2000)]
+
+    expected = [evaluator.evaluate(hand[:5], hand[5:]) for hand in hands]
+    indices = np.array([cards_to_indices(hand) for hand in hands])
+
+    assert evaluate_seven(indices).tolist() == expected
+
+
+def test_numpy_backend_close_to_treys():
+    """Векторизованный движок дает ту же equity, что и эталонный цикл treys"""
+    hero = [Card.new('Kh'), Card.new('Qd')]
+    board = [Card.new('Ks'), Card.new('9c'), Card.new('2h')]
+    n_simulations = 20000
+
+    wins, ties = simulate_equity_counts(cards_to_indices(hero), cards_to_indices(board), 3, n_simulations,
+                                        rng=np.random.default_rng(1))
+    equity_numpy = (wins + 0.3 * ties) / n_simulations
+
+    wins, ties = simulate_equity_treys(hero, board, 3, n_simulations)
+    equity_treys = (wins + 0.3 * ties) / n_simulations
+
+    assert abs(equity_numpy - equity_treys) < 0.02
+
+
+def test_exact_enumeration_on_river():
+    """Точный перебор на ривере совпадает с полным перебором рук противника на treys"""
+    evaluator = Evaluator()
+    hero = [Card.new('Kh'), Card.new('Qd')]
+    board = [Card.new(c) for c in ['Ks', '9c', '2h', '7d', '3s']]
+    remaining = [c for c in Deck.GetFullDeck() if c not in hero + board]
+
+    hero_score = evaluator.evaluate(board, hero)
+    wins = ties = total = 0
+    for i, first in enumerate(remaining):
+        for second in remaining[i + 1:]:
+            villain_score = evaluator.evaluate(board, [first, second])
+            wins += hero_score < villain_score
+            ties += hero_score == villain_score
+            total += 1
+
+    assert enumerate_equity_counts(cards_to_indices(hero), cards_to_indices(board), 2) == (wins, ties, total)
+
+
+def test_exact_deal_count():
+    """Количество перебранных раздач совпадает с формулой через comb"""
+    hero = [Card.new('Kh'), Card.new('Qd')]
+    board = [Card.new(c) for c in ['Ks', '9c', '2h', '7d']]
+
+    _, _, total = enumerate_equity_counts(cards_to_indices(hero), cards_to_indices(board), 2)
+    assert total == count_exact_deals(46, 1, 1)
+
+    board.append(Card.new('3s'))
+    _, _, total = enumerate_equity_counts(cards_to_indices(hero), cards_to_indices(board), 3)
+    assert total == count_exact_deals(45, 0, 2)
+
+
+def test_preflop_hand_classes():
+    """Все 1326 стартовых рук раскладываются ровно по 169 классам, изоморфные руки попадают в один класс"""
+    classes = {}
+    for first in range(52):
+        for second in range(first + 1, 52):
+            index = hand_class_index(np.array([first, second]))
+            classes[index] = classes.get(index, 0) + 1
+
+    assert len(classes) == 169
+    assert sorted(set(classes.values())) == [4, 6, 12]
+    assert all(hand_class_index(representative_hand(i)) == i for i in range(169))
+
+
+def test_no_opponents_on_every_street(monkeypatch):
+    """Без соперников (active 0 или 1) equity героя 1.0 на любой улице, расчет не падает"""
+    from src.pokerlogic import best_action as ba
+    from src.pokerlogic.equity_cache import MemoryCache
+
+    monkeypatch.setattr(ba, 'EQUITY_CACHE', MemoryCache())
+    hero = cards_to_indices([Card.new('Kh'), Card.new('Qd')])
+    for board in ([], ['2c', '7h', 'Td'], ['2c', '7h', 'Td', '3s'], ['2c', '7h', 'Td', '3s', '4d']):
+        for active in (0, 1):
+            assert simulate_equity_counts(hero, cards_to_indices([Card.new(c) for c in board]), active, 1000, 1) == (1000, 0)
+            assert ba.calculate_equity_fast([Card.new(c) for c in ['Kh', 'Qd']], [Card.new(c) for c in board],
+                                            active, 1000, rng=1) == (1.0, 0.0)
+            result = ba.best_action(6, active, 'BTN', ['Kh', 'Qd'], [], board, pot=10, hero_stack=100, to_call=2, seed=1)
+            assert set(result) == {'call_2', 'raise_4', 'raise_6'}
+
+
+def test_rank_table_chunks():
+    """Таблица рангов не зависит от размера блока, в том числе когда блоки не делят C(52, 5) нацело"""
+    assert np.array_equal(build_rank_table(chunk_size=100_003), get_rank_table())
+
+
+def test_rank_table_file_is_memory_mapped(tmp_path):
+    """Таблица рангов открывается из файла через memory-map, некорректный файл не используется"""
+    path = str(tmp_path / 'rank_table.npy')
+    assert load_rank_table(path) is None
+
+    save_rank_table(get_rank_table(), path)
+    table = load_rank_table(path)
+    assert isinstance(table.base, np.memmap)
+    assert np.array_equal(table, get_rank_table())
+
+    np.save(path, np.zeros(10, dtype=np.int16))
+    assert load_rank_table(path) is None
@@ -0,0 +1,69 @@
+import sys
+import os
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import importlib.util
+import pytest
+import numpy as np
+
+from src.cv.frame_diff import FrameChangeDetector, changed_mask, frames_differ
+
+
+def make_frame(seed=0):
+    """Случайный кадр BGR 640x480"""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+
+
+def test_small_change_detected():
+    """Изменение нескольких цифр стека (блок 8x12 пикселей) замечается, одиночные пиксели - нет"""
+    frame = make_frame()
+    changed = frame.copy()
+    changed[100:112, 200:208] = 255 - changed[100:112, 200:208]
+    assert not frames_differ(frame, frame.copy())
+    assert frames_differ(frame, changed)
+    assert frames_differ(None, frame)
+    assert frames_differ(frame, frame[:200])
+
+    noise = frame.copy()
+    noise[5, 5] = 255 - noise[5, 5]
+    assert int(np.count_nonzero(changed_mask(frame, noise))) == 1
+    assert not frames_differ(frame, noise)
+
+
+@pytest.mark.skipif(importlib.util.find_spec("cv2") is None, reason="нужен opencv")
+@pytest.mark.parametrize('size', [(800, 600), (1920, 1080), (2560, 1440)])
+@pytest.mark.parametrize('before, after', [('125.5', '126.5'), ('1250', '1850'), ('12.5', '12.0')])
+def test_text_change_detected_at_capture_size(size, before, after):
+    """Смена цифр банка или стека замечается на любом размере снимка"""
+    import cv2
+
+    def render(text):
+        width, height = size
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = (40, 110, 45)
+        cv2.putText(frame, text, (width // 2 - 40, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        return frame
+
+    detector = FrameChangeDetector()
+    assert detector.changed(render(before))
+    assert not detector.changed(render(before))
+    assert detector.changed(render(after))
+
+
+def test_detector_skips_identical_frames():
+    """Одинаковые кадры пропускаются, после изменения или сброса кадр анализируется"""
+    detector = FrameChangeDetector()
+    frame = make_frame()
+
+    assert detector.changed(frame)
+    assert not detector.changed(frame.copy())
+    assert not detector.changed(frame.copy())
+    assert detector.skipped == 2
+
+    assert detector.changed(make_frame(seed=1))
+    assert detector.skipped == 0
+
+    detector.reset()
+    assert detector.changed(make_frame(seed=1))
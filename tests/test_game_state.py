@@ -0,0 +1,77 @@
+import sys
+import os
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pokerlogic.game_state import (GameStateTracker, stable_value,
+                                       EVENT_NEW_HAND, EVENT_STREET, EVENT_HERO_TO_ACT, EVENT_DECISION_CHANGED)
+
+
+def make_parse(hero=('As', 'Kd'), board=(), pot=3.0, stack=100.0, to_call=0.0, buttons=False):
+    """Минимальный результат parse_image"""
+    return {'size': 6, 'active': 2, 'pot': pot, 'to_call': to_call,
+            'action_buttons': {'Call': [0, 0, 10, 10]} if buttons else {},
+            'hero_cards': list(hero), 'board_cards': list(board),
+            'hero_pos': 'BTN', 'hero_stack': stack, 'player_panels': []}
+
+
+def test_stable_value():
+    """Самое частое значение, при равенстве - самое свежее"""
+    assert stable_value([10, 10, 14]) == 10
+    assert stable_value([10, 14]) == 14
+    assert stable_value([10, 1.0, 10]) == 10
+
+
+def test_events():
+    """Новая раздача, улица и ход героя срабатывают один раз"""
+    tracker = GameStateTracker()
+    assert tracker.update(make_parse()) == [EVENT_NEW_HAND]
+    assert tracker.update(make_parse()) == []
+    assert tracker.update(make_parse(buttons=True, to_call=2)) == [EVENT_HERO_TO_ACT]
+    assert tracker.update(make_parse(buttons=True, to_call=2)) == []
+    assert tracker.update(make_parse(board=('2c', '7h', 'Td'))) == [EVENT_STREET]
+    assert tracker.state['street'] == 'Flop'
+    assert tracker.update(make_parse(hero=('Qs', 'Qh'))) == [EVENT_NEW_HAND]
+    assert tracker.state['street'] == 'Preflop'
+    assert tracker.hand_number == 2
+    assert tracker.update({}) == []
+
+
+def test_smoothing():
+    """Одиночные ошибки OCR и пропуски карт не меняют состояние"""
+    tracker = GameStateTracker()
+    board = ('2c', '7h', 'Td')
+    tracker.update(make_parse(board=board, pot=12))
+    tracker.update(make_parse(board=board, pot=12))
+    assert tracker.update(make_parse(board=board, pot=1.2, stack=0)) == []
+    assert tracker.state['pot'] == 12
+    assert tracker.state['hero_stack'] == 100
+
+    # детектор потерял карту доски и одну карту героя
+    assert tracker.update(make_parse(hero=('As',), board=('2c', '7h'))) == []
+    assert tracker.update(make_parse(board=())) == []
+    assert tracker.state['board_cards'] == sorted(board)
+    assert tracker.state['hero_cards'] == ['As', 'Kd']
+
+
+def test_misread_on_turn_start_is_corrected():
+    """Ошибка OCR на кадре начала хода исправляется следующими кадрами, и решение пересчитывается"""
+    tracker = GameStateTracker()
+    board = ('2c', '7h', 'Td')
+    tracker.update(make_parse(board=board, pot=12))
+    tracker.update(make_parse(board=board, pot=12))
+
+    # кнопки появились, но банк и ставка прочитаны с ошибкой
+    assert tracker.update(make_parse(board=board, pot=120, to_call=50, buttons=True)) == [EVENT_HERO_TO_ACT]
+    assert tracker.state['pot'] == 12
+    assert tracker.state['to_call'] == 50
+
+    assert tracker.update(make_parse(board=board, pot=12, to_call=5, buttons=True)) == [EVENT_DECISION_CHANGED]
+    assert tracker.state['to_call'] == 5
+    assert tracker.update(make_parse(board=board, pot=12, to_call=5, buttons=True)) == []
+    assert tracker.state['pot'] == 12
+    assert tracker.state['to_call'] == 5
+
+    # ход закончился - ставка сбрасывается
+    tracker.update(make_parse(board=board, pot=17))
+    assert tracker.state['to_call'] == 0
@@ -0,0 +1,53 @@
+import sys
+import os
+import importlib.util
+import pytest
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+pytestmark = pytest.mark.skipif(importlib.util.find_spec("cv2") is None, reason="нужен opencv")
+
+DETECTIONS = [
+    {'name': 'player_panel', 'bbox': [10, 10, 110, 60], 'conf': 0.9},
+    {'name': 'hero_card', 'bbox': [30, 20, 70, 50], 'conf': 0.9},
+    {'name': 'pot_box', 'bbox': [200, 100, 260, 120], 'conf': 0.9},
+]
+
+
+def changed_frames(y1, y2, x1, x2):
+    """Пара кадров 240x320, различающихся в одном прямоугольнике"""
+    prev = np.zeros((240, 320, 3), dtype=np.uint8)
+    frame = prev.copy()
+    frame[y1:y2, x1:x2] = 255
+    return prev, frame
+
+
+def test_text_region_change_keeps_layout():
+    """Изменение стека меняет только область панели, раскладка остается"""
+    from src.cv.incremental import changed_mask, bbox_changed, layout_changed
+
+    mask = changed_mask(*changed_frames(52, 58, 80, 100))
+    assert bbox_changed(mask, DETECTIONS[0]['bbox'])
+    assert not bbox_changed(mask, DETECTIONS[2]['bbox'])
+    assert not layout_changed(mask, DETECTIONS)
+
+
+def test_change_in_ocr_margin_invalidates_region():
+    """Изменение в отступе вокруг области, который читает OCR, тоже требует нового распознавания"""
+    from src.cv.incremental import changed_mask, bbox_changed
+
+    # цифры стека вышли на несколько пикселей за нижний край рамки панели
+    mask = changed_mask(*changed_frames(62, 65, 80, 100))
+    assert bbox_changed(mask, DETECTIONS[0]['bbox'])
+    assert not bbox_changed(mask, DETECTIONS[0]['bbox'], margin=0)
+    assert not bbox_changed(changed_mask(*changed_frames(75, 80, 80, 100)), DETECTIONS[0]['bbox'])
+
+
+def test_layout_change_detected():
+    """Новые карты внутри панели и объекты вне известных областей требуют полной детекции"""
+    from src.cv.incremental import changed_mask, layout_changed
+
+    assert layout_changed(changed_mask(*changed_frames(25, 45, 35, 65)), DETECTIONS)
+    assert layout_changed(changed_mask(*changed_frames(150, 200, 150, 200)), DETECTIONS)
@@ -0,0 +1,60 @@
+import sys
+import os
+import importlib.util
+import pytest
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cv.layout import LayoutCache, seat_layout, match_seats
+
+
+def make_panel(x, y):
+    """Панель игрока 100x40 с центром в (x, y)"""
+    return {'bbox': [x - 50, y - 20, x + 50, y + 20], 'center': (x, y), 'angle': 0, 'stack': 0}
+
+
+def test_seat_layout_dedupes_and_sorts():
+    """Дубли убираются, места идут по возрастанию угла от центра кадра"""
+    panels = [make_panel(400, 550), make_panel(100, 300), make_panel(405, 555), make_panel(400, 50)]
+    seats = seat_layout(panels, (400, 300))
+    assert [seat['center'] for seat in seats] == [(400, 50), (400, 550), (100, 300)]
+    assert [seat['angle'] for seat in seats] == sorted(seat['angle'] for seat in seats)
+
+
+def test_match_seats_snaps_to_cache():
+    """Панели привязываются к запомненным местам, чужая панель означает новую раскладку"""
+    cache = LayoutCache()
+    key = (800, 600, '32-96-32')
+    cache.store(key, seat_layout([make_panel(400, 550), make_panel(100, 300), make_panel(400, 50)], (400, 300)))
+    seats = cache.get(key)
+
+    # панели чуть сдвинуты и идут в другом порядке, одно место свободно
+    matched = match_seats(seats, [make_panel(103, 298), make_panel(398, 52)])
+    assert [panel['center'] for panel in matched] == [(400, 50), (100, 300)]
+    assert matched[1]['bbox'] == [50, 280, 150, 320]
+
+    assert match_seats(seats, [make_panel(700, 300)]) is None
+    cache.forget(key)
+    assert cache.get(key) is None
+
+
+@pytest.mark.skipif(importlib.util.find_spec("cv2") is None, reason="нужен opencv")
+def test_layout_reused_across_streets(monkeypatch):
+    """Карты доски не меняют ключ раскладки: на следующей улице панели привязываются к запомненным местам"""
+    from src.cv import parser
+    from tests.test_table_skin import make_table
+
+    monkeypatch.setattr(parser, 'ocr_regions', lambda image, regions, skin='default': ['100'] * len(regions))
+    cache = LayoutCache()
+
+    def detections(shift):
+        return [{'name': 'player_panel', 'bbox': [400 + shift, 500, 500 + shift, 540], 'conf': 0.9},
+                {'name': 'player_panel', 'bbox': [50, 280 + shift, 150, 320 + shift], 'conf': 0.9},
+                {'name': 'player_panel', 'bbox': [400, 40, 500, 80], 'conf': 0.9}]
+
+    parser.parse_image(make_table(0), detections=detections(0), card_detections=[], layout_cache=cache)
+    result = parser.parse_image(make_table(3), detections=detections(5), card_detections=[], layout_cache=cache)
+
+    assert len(cache.layouts) == 1
+    assert sorted(panel['bbox'] for panel in result['player_panels']) == \
+        sorted(det['bbox'] for det in detections(0))
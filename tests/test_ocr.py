@@ -0,0 +1,102 @@
+import sys
+import os
+import time
+import importlib.util
+import pytest
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+pytestmark = pytest.mark.skipif(importlib.util.find_spec("cv2") is None, reason="нужен opencv")
+
+
+def slow_first_match(image, bbox, attempts, accept, region=None, skin='default'):
+    """OCR области без Tesseract: первые области распознаются дольше последних"""
+    time.sleep(0.02 * (5 - bbox[0]))
+    return f"region {bbox[0]}"
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_ocr_regions_keep_input_order(workers, monkeypatch):
+    """Тексты возвращаются в порядке областей и при параллельном, и при последовательном OCR"""
+    from src.cv import ocr
+
+    monkeypatch.setattr(ocr, 'ocr_first_match', slow_first_match)
+    monkeypatch.setattr(ocr, 'OCR_WORKERS', workers)
+    monkeypatch.setattr(ocr, '_EXECUTOR', None)
+
+    regions = [([i, 0, i + 10, 10], [], bool, None) for i in range(5)]
+    assert ocr.ocr_regions(np.zeros((20, 20, 3), dtype=np.uint8), regions) == [f"region {i}" for i in range(5)]
+    if ocr._EXECUTOR is not None:
+        ocr._EXECUTOR.shutdown()
+
+
+def test_image_to_string_parses_psm(monkeypatch):
+    """Режим сегментации для tesserocr берется из --psm в конфигурации, без него - режим 3"""
+    from src.cv import ocr
+
+    class FakeApi:
+        def SetImage(self, image):
+            self.size = image.size
+
+        def GetUTF8Text(self):
+            return "25\n"
+
+    apis = []
+
+    def fake_get_tess_api(lang, psm):
+        apis.append((lang, psm))
+        return FakeApi()
+
+    monkeypatch.setattr(ocr, 'OCR_ENGINE', 'tesserocr')
+    monkeypatch.setattr(ocr, 'get_tess_api', fake_get_tess_api)
+
+    img = np.zeros((10, 30), dtype=np.uint8)
+    assert ocr.image_to_string(img, 'eng', "--psm 7") == "25\n"
+    ocr.image_to_string(img, 'rus', "--oem 1 --psm  13")
+    ocr.image_to_string(np.zeros((10, 30, 3), dtype=np.uint8), 'eng', "")
+    assert apis == [('eng', 7), ('rus', 13), ('eng', 3)]
+
+
+def test_frame_in_memory_is_not_written_to_disk(tmp_path, monkeypatch):
+    """ocr_text и parse_image работают с кадром в памяти: ничего не пишется и не читается с диска"""
+    import cv2
+    from src.cv import ocr, parser
+    from src.cv.ocr_strategy import OcrStrategy
+    from tests.test_table_skin import make_table
+
+    def no_disk(*args, **kwargs):
+        raise AssertionError("обращение к диску")
+
+    seen = []
+
+    def fake_image_to_string(img, lang, config):
+        seen.append(img.shape)
+        return "100"
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cv2, 'imwrite', no_disk)
+    monkeypatch.setattr(cv2, 'imread', no_disk)
+    monkeypatch.setattr(ocr, 'image_to_string', fake_image_to_string)
+    monkeypatch.setattr(ocr, 'OCR_WORKERS', 1)
+    monkeypatch.setattr(ocr, 'OCR_STRATEGY', OcrStrategy(path=None))
+
+    frame = make_table(0)
+    # прежнее имя аргумента image_path сохраняется для вызовов по ключевому слову
+    assert ocr.ocr_text(image_path=frame, bbox=[400, 215, 500, 235], scale=1) == "100"
+    assert seen == [(40, 120)]
+
+    detections = [{'name': 'player_panel', 'bbox': [400, 500, 500, 540], 'conf': 0.9},
+                  {'name': 'pot_box', 'bbox': [400, 215, 500, 235], 'conf': 0.9}]
+    detected = []
+
+    def fake_detect_image(image_path, conf, save_img, imgsz):
+        detected.append(image_path)
+        return detections
+
+    monkeypatch.setattr(parser, 'detect_image', fake_detect_image)
+    result = parser.parse_image(image_path=frame)
+    assert len(detected) == 1 and detected[0] is frame
+    assert result['pot'] == 100 and result['player_panels'][0]['stack'] == 100
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,40 @@
+import sys
+import os
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cv.ocr_strategy import OcrStrategy
+
+ATTEMPTS = [{'lang': lang, 'config': psm} for psm in ("--psm 6", "--psm 7", "--psm 8") for lang in ('eng', 'rus')]
+
+
+def test_successful_attempt_goes_first():
+    """После успеха настройки пробуются первыми, среднее число вызовов на область падает"""
+    strategy = OcrStrategy(path=None)
+    assert strategy.order_attempts('button', 'skin', ATTEMPTS) == ATTEMPTS
+
+    # первая область: сработала только пятая попытка
+    strategy.record('button', 'skin', [(a, a == ATTEMPTS[4]) for a in ATTEMPTS[:5]])
+    assert strategy.order_attempts('button', 'skin', ATTEMPTS)[0] == ATTEMPTS[4]
+
+    # дальше эта настройка срабатывает сразу
+    for _ in range(9):
+        first = strategy.order_attempts('button', 'skin', ATTEMPTS)[0]
+        strategy.record('button', 'skin', [(first, True)])
+    assert strategy.calls_per_region('button', 'skin') == (5 + 9) / 10
+
+    # другой скин и другой тип области не затронуты
+    assert strategy.order_attempts('button', 'other', ATTEMPTS) == ATTEMPTS
+    assert strategy.order_attempts('pot', 'skin', ATTEMPTS) == ATTEMPTS
+
+
+def test_strategy_is_saved(tmp_path):
+    """Статистика переживает перезапуск"""
+    path = str(tmp_path / "ocr_strategy.json")
+    strategy = OcrStrategy(path=path)
+    strategy.record('stack', 'skin', [(ATTEMPTS[0], False), (ATTEMPTS[3], True)])
+    strategy.save()
+
+    restored = OcrStrategy(path=path)
+    assert restored.order_attempts('stack', 'skin', ATTEMPTS)[0] == ATTEMPTS[3]
+    assert restored.stats()['stack/skin']['regions'] == 1
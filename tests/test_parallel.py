@@ -0,0 +1,24 @@
+import sys
+import os
+import numpy as np
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pokerlogic.equity_engine import EquityStats, enumerate_equity_counts
+from src.pokerlogic.parallel import simulate_equity_parallel, shutdown_executor
+
+
+def test_parallel_simulation_matches_exact():
+    """Счетчики процессов складываются в оценку, согласованную с точным перебором"""
+    hero = np.array([45, 42])          # Kh Qd
+    board = np.array([46, 31, 1, 21])  # Kd 9c 2h 7h
+    wins, ties, total = enumerate_equity_counts(hero, board, 2)
+    exact = EquityStats(wins, ties, total, exact=True)
+
+    try:
+        wins, ties = simulate_equity_parallel(hero, board, 2, 8000, workers=2)
+    finally:
+        shutdown_executor()
+    stats = EquityStats(wins, ties, 8000)
+
+    assert abs(stats.equity - exact.equity) < 4 * stats.std_error
@@ -0,0 +1,63 @@
+import sys
+import os
+import importlib.util
+import pytest
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytestmark = pytest.mark.skipif(importlib.util.find_spec("cv2") is None, reason="нужен opencv")
+
+PANELS = [{'name': 'player_panel', 'bbox': [400, 500, 500, 540], 'conf': 0.9},
+          {'name': 'player_panel', 'bbox': [50, 280, 150, 320], 'conf': 0.9},
+          {'name': 'pot_box', 'bbox': [400, 215, 500, 235], 'conf': 0.9}]
+
+# детекции стола и карт для каждого кадра: с картами героя и доски и без областей карт
+TABLE_DETECTIONS = [
+    PANELS + [{'name': 'hero_card', 'bbox': [420, 440, 480, 495], 'conf': 0.9},
+              {'name': 'board_card', 'bbox': [300, 250, 480, 330], 'conf': 0.9},
+              {'name': 'back_card', 'bbox': [60, 240, 90, 275], 'conf': 0.9}],
+    PANELS,
+]
+CARD_DETECTIONS = [
+    [{'name': 'As', 'bbox': [422, 442, 448, 490], 'conf': 0.9},
+     {'name': 'Kd', 'bbox': [450, 442, 478, 490], 'conf': 0.9},
+     {'name': '2c', 'bbox': [310, 250, 360, 330], 'conf': 0.9},
+     {'name': '7h', 'bbox': [368, 250, 418, 330], 'conf': 0.9},
+     {'name': 'Td', 'bbox': [426, 250, 476, 330], 'conf': 0.9}],
+    [],
+]
+
+
+def test_batched_parse_matches_single_frames(monkeypatch):
+    """Пакетный разбор дает те же результаты, что и разбор каждого кадра, модели вызываются по разу"""
+    from src.cv import parser
+    from tests.test_table_skin import make_table
+
+    frames = [make_table(3, seed=1), make_table(0, seed=2)]
+
+    def index(frame):
+        return next(i for i, known in enumerate(frames) if known is frame)
+
+    batches = []
+
+    def fake_detect_images(images, conf, imgsz):
+        batches.append(('table', len(images)))
+        return [TABLE_DETECTIONS[index(frame)] for frame in images]
+
+    def fake_detect_all_cards_batch(images, conf, imgsz):
+        batches.append(('cards', len(images)))
+        return [CARD_DETECTIONS[index(frame)] for frame in images]
+
+    monkeypatch.setattr(parser, 'ocr_regions', lambda image, regions, skin='default': ['100'] * len(regions))
+    monkeypatch.setattr(parser, 'detect_images', fake_detect_images)
+    monkeypatch.setattr(parser, 'detect_all_cards_batch', fake_detect_all_cards_batch)
+    monkeypatch.setattr(parser, 'detect_image', lambda image_path, conf, save_img, imgsz: TABLE_DETECTIONS[index(image_path)])
+    monkeypatch.setattr(parser, 'detect_all_cards', lambda image_path, conf, save_img, imgsz: CARD_DETECTIONS[index(image_path)])
+
+    batched = parser.parse_images(frames + ['missing.png'])
+    assert batches == [('table', 2), ('cards', 1)]
+    assert batched == [parser.parse_image(frame) for frame in frames] + [{}]
+
+    assert sorted(batched[0]['hero_cards']) == ['As', 'Kd']
+    assert sorted(batched[0]['board_cards']) == ['2c', '7h', 'Td']
+    assert batched[1]['board_cards'] == [] and batched[1]['hero_cards'] == []
@@ -5,9 +5,16 @@ import os
 # Добавляем корневую директорию проекта в sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.pokerlogic import best_action as ba
 from src.pokerlogic.best_action import best_action, save_equity_cache
+from src.pokerlogic.equity_cache import MemoryCache
 
-def test_performance():
+def test_performance(monkeypatch):
+    """Тест производительности на кэше в памяти: файл кэша в рабочей папке не создается"""
+    monkeypatch.setattr(ba, 'EQUITY_CACHE', MemoryCache())
+    run_performance()
+
+def run_performance():
     """Тестирует производительность оптимизированной версии"""
 
     test_cases = [
@@ -17,15 +24,16 @@ def test_performance():
             'args': {
                 'size': 9,
                 'active': 3,
-                'pos': 'UTG',
-                'hand': ['As', 'Ad'],
-                'board': [],
+                'hero_pos': 'UTG',
+                'hero_cards': ['As', 'Ad'],
+                'board_cards': [],
                 'range_hands': [],
                 'pot': 150,
                 'bb': 50,
-                'stack': 2000,
+                'hero_stack': 2000,
                 'to_call': 100,
-                'n_simulations': 5000  # Быстрый тест
+                'n_simulations': 5000,  # Быстрый тест
+                'seed': 1
             }
         },
 
@@ -35,15 +43,16 @@ def test_performance():
             'args': {
                 'size': 6,
                 'active': 2,
-                'pos': 'BB',
-                'hand': ['3s', '5s'],
-                'board': ['Kd', '9h', '2s'],
+                'hero_pos': 'BB',
+                'hero_cards': ['3s', '5s'],
+                'board_cards': ['Kd', '9h', '2s'],
                 'range_hands': [],
                 'pot': 350,
                 'bb': 100,
-                'stack': 900,
+                'hero_stack': 900,
                 'to_call': 315,
-                'n_simulations': 5000
+                'n_simulations': 5000,
+                'seed': 2
             }
         },
 
@@ -53,15 +62,16 @@ def test_performance():
             'args': {
                 'size': 9,
                 'active': 4,
-                'pos': 'BTN',
-                'hand': ['Kh', 'Qd'],
-                'board': ['Ks', '9c', '2h', '7d'],
+                'hero_pos': 'BTN',
+                'hero_cards': ['Kh', 'Qd'],
+                'board_cards': ['Ks', '9c', '2h', '7d'],
                 'range_hands': [],
                 'pot': 800,
                 'bb': 50,
-                'stack': 1500,
+                'hero_stack': 1500,
                 'to_call': 200,
-                'n_simulations': 3000
+                'n_simulations': 3000,
+                'seed': 3
             }
         },
 
@@ -71,15 +81,16 @@ def test_performance():
             'args': {
                 'size': 9,
                 'active': 4,
-                'pos': 'BTN',
-                'hand': ['Kh', 'Qd'],
-                'board': ['Ks', '9c', '2h', '7d', '3s'],
+                'hero_pos': 'BTN',
+                'hero_cards': ['Kh', 'Qd'],
+                'board_cards': ['Ks', '9c', '2h', '7d', '3s'],
                 'range_hands': [],
                 'pot': 800,
                 'bb': 50,
-                'stack': 1500,
+                'hero_stack': 1500,
                 'to_call': 200,
-                'n_simulations': 3000
+                'n_simulations': 3000,
+                'seed': 4
             }
         }
     ]
@@ -115,10 +126,6 @@ def test_performance():
     print(f"ОБЩЕЕ ВРЕМЯ: {total_time:.3f} секунд")
     print(f"СРЕДНЕЕ ВРЕМЯ НА РАСЧЕТ: {total_time/len(test_cases):.3f} сек")
 
-    # Сохраняем кэш после тестов
-    save_equity_cache()
-    print("Кэш equity сохранен в equity_cache.pickle")
-
     # Проверяем кэш
     print(f"\nРекомендации:")
     if total_time/len(test_cases) < 0.1:
@@ -129,4 +136,7 @@ def test_performance():
         print("❌ Медленно для real-time. Нужны дополнительные оптимизации")
 
 if __name__ == "__main__":
-    test_performance()
+    run_performance()
+    # Сохраняем кэш после тестов
+    save_equity_cache()
+    print("Кэш equity сохранен в equity_cache.sqlite3")
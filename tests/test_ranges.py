@@ -0,0 +1,82 @@
+import sys
+import os
+import numpy as np
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pokerlogic.equity_engine import EquityStats, cards_to_indices, simulate_equity_counts
+from src.pokerlogic.ranges import (COMBOS, build_alias_table, parse_range, range_to_weights,
+                                   sample_alias, simulate_range_equity_counts)
+from treys import Card
+
+
+def test_parse_range_counts():
+    """Количество комбинаций для стандартных элементов диапазона"""
+    assert parse_range("22+").sum() == 78
+    assert parse_range("A2s+").sum() == 48
+    assert parse_range("KTo+").sum() == 36
+    assert parse_range("AKs").sum() == 4
+    assert parse_range("AKo").sum() == 12
+    assert parse_range("QQ").sum() == 6
+    assert parse_range("77-99").sum() == 18
+    assert parse_range("A5s-A2s").sum() == 16
+    assert parse_range("22+, A2s+, KTo+").sum() == 78 + 48 + 36
+    assert parse_range("AKs:0.5").sum() == 2
+
+
+def test_range_to_weights():
+    """Пустой диапазон - случайные руки, список и строка дают одинаковые веса"""
+    assert range_to_weights([]) is None
+    assert range_to_weights(None) is None
+    assert np.array_equal(range_to_weights(['QQ+', 'AKs']), parse_range("QQ+, AKs"))
+
+
+def test_alias_sampling_frequencies():
+    """Частоты выборки по alias-таблице пропорциональны весам"""
+    weights = np.array([1.0, 0.0, 3.0, 6.0])
+    prob, alias = build_alias_table(weights)
+    samples = sample_alias(prob, alias, 100_000, np.random.default_rng(0))
+    frequencies = np.bincount(samples, minlength=4) / len(samples)
+    assert frequencies[1] == 0
+    assert np.allclose(frequencies, weights / weights.sum(), atol=0.01)
+
+
+def test_range_equity_single_combo_on_river():
+    """Против одной комбинации на ривере исход известен заранее"""
+    hero = cards_to_indices([Card.new('As'), Card.new('Ks')])
+    board = cards_to_indices([Card.new(c) for c in ['Ah', '7d', '2c', '9s', '4h']])
+    weights = parse_range("QhQd")
+    wins, ties = simulate_range_equity_counts(hero, board, 2, 1000, weights, np.random.default_rng(0))
+    assert (wins, ties) == (1000, 0)
+
+
+def test_range_equity_respects_card_removal():
+    """Руки диапазона не пересекаются с картами героя, доски и друг с другом"""
+    hero = cards_to_indices([Card.new('As'), Card.new('Ah')])
+    board = cards_to_indices([Card.new(c) for c in ['Ad', '7d', '2c']])
+    # в диапазоне остается только AcXx: AA недоступны, AK - только с тузом треф
+    weights = parse_range("AA, AKo, AKs")
+    rng = np.random.default_rng(1)
+    wins, ties = simulate_range_equity_counts(hero, board, 2, 5000, weights, rng)
+    stats = EquityStats(wins, ties, 5000)
+    assert stats.equity > 0.9
+
+    # при двух противниках одной руки AcKx на двоих не хватает - раздача невозможна
+    weights = parse_range("AcKs")
+    try:
+        simulate_range_equity_counts(hero, board, 3, 10, weights, rng)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("ожидалась ошибка невозможной раздачи")
+
+
+def test_strong_range_lowers_equity():
+    """Против диапазона из сильных пар equity ниже, чем против случайных рук"""
+    hero = cards_to_indices([Card.new('Js'), Card.new('Td')])
+    board = cards_to_indices([Card.new(c) for c in ['8h', '5c', '2d']])
+    rng = np.random.default_rng(2)
+    random_stats = EquityStats(*simulate_equity_counts(hero, board, 2, 20000, rng), 20000)
+    range_stats = EquityStats(*simulate_range_equity_counts(hero, board, 2, 20000, parse_range("QQ+"), rng), 20000)
+    assert range_stats.equity < random_stats.equity - 0.1
+    assert len(COMBOS) == 1326
@@ -0,0 +1,69 @@
+import sys
+import os
+import numpy as np
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pokerlogic import best_action as ba
+from src.pokerlogic.equity_cache import MemoryCache
+from src.pokerlogic.equity_engine import cards_to_indices, index_to_card, simulate_equity_counts
+from src.pokerlogic.parallel import simulate_equity_parallel, shutdown_executor
+from treys import Card
+
+
+def test_index_to_card_roundtrip():
+    """Индекс карты и карта treys переводятся друг в друга без потерь"""
+    for index in range(52):
+        assert cards_to_indices([index_to_card(index)])[0] == index
+
+
+def test_numpy_matches_treys_bit_for_bit():
+    """При одном зерне векторизованный движок и эталон на treys дают одинаковые счетчики"""
+    hero = [Card.new('Kh'), Card.new('Qd')]
+    for board_cards in ([], ['Ks', '9c', '2h'], ['Ks', '9c', '2h', '7d']):
+        board = [Card.new(c) for c in board_cards]
+        for active in (2, 4):
+            expected = ba.simulate_equity_treys(hero, board, active, 600, rng=7)
+            result = simulate_equity_counts(cards_to_indices(hero), cards_to_indices(board), active, 600, rng=7)
+            assert result == expected
+
+
+def test_parallel_is_reproducible():
+    """Разбиение на процессы при заданном зерне воспроизводится"""
+    hero = np.array([45, 42])
+    board = np.array([46, 31, 1])
+    try:
+        first = simulate_equity_parallel(hero, board, 3, 8000, workers=2, rng=11)
+        second = simulate_equity_parallel(hero, board, 3, 8000, workers=2, rng=11)
+    finally:
+        shutdown_executor()
+    assert first == second
+
+
+def test_best_action_replays_with_seed(monkeypatch):
+    """Решение с тем же зерном и пустым кэшем повторяется точно"""
+    args = {
+        'size': 6,
+        'active': 3,
+        'hero_pos': 'BTN',
+        'hero_cards': ['Js', 'Td'],
+        'range_hands': [],
+        'board_cards': ['8h', '5c', '2d'],
+        'pot': 10,
+        'hero_stack': 100,
+        'to_call': 2,
+        'n_simulations': 3000,
+        'seed': 123,
+    }
+    results = []
+    for _ in range(2):
+        monkeypatch.setattr(ba, 'EQUITY_CACHE', MemoryCache())
+        results.append(ba.best_action(**args))
+    assert results[0] == results[1]
+
+    monkeypatch.setattr(ba, 'EQUITY_CACHE', MemoryCache())
+    equity = ba.calculate_equity_fast([Card.new('Js'), Card.new('Td')],
+                                      [Card.new(c) for c in ['8h', '5c', '2d']], 3, 3000, rng=123)
+    monkeypatch.setattr(ba, 'EQUITY_CACHE', MemoryCache())
+    assert ba.calculate_equity_fast([Card.new('Js'), Card.new('Td')],
+                                    [Card.new(c) for c in ['8h', '5c', '2d']], 3, 3000, rng=123) == equity
@@ -0,0 +1,76 @@
+import sys
+import os
+import time
+from treys import Card
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pokerlogic import best_action as ba
+from src.pokerlogic.equity_cache import MemoryCache
+from src.pokerlogic.speculative import EquityPrecomputer
+
+
+def wait_completed(precomputer, count, timeout=30.0):
+    """Ждет, пока фоновый расчет завершит count ситуаций"""
+    deadline = time.time() + timeout
+    while precomputer.stats()['completed'] < count and time.time() < deadline:
+        time.sleep(0.01)
+    return precomputer.stats()['completed'] >= count
+
+
+def test_precomputed_equity_is_cached(monkeypatch):
+    """Фоновый расчет накапливает все симуляции в кэше, best_action потом не досчитывает"""
+    monkeypatch.setattr(ba, 'EQUITY_CACHE', MemoryCache())
+    precomputer = EquityPrecomputer(n_simulations=4000)
+    hero, board = ['Ah', 'Kd'], ['2c', '7h', 'Td']
+
+    assert precomputer.submit(hero, board, 4)
+    assert not precomputer.submit(hero, board, 4)
+    assert wait_completed(precomputer, 1)
+
+    key = ba.get_cache_key(ba.cards_to_indices([Card.new(c) for c in hero]),
+                           ba.cards_to_indices([Card.new(c) for c in board]), 4)
+    assert ba.EQUITY_CACHE.get(key).samples == 4000
+
+    ba.best_action(6, 4, 'BTN', hero, [], board, pot=10, hero_stack=100, to_call=5,
+                   n_simulations=4000, adaptive=True)
+    assert ba.EQUITY_CACHE.get(key).samples == 4000
+    precomputer.shutdown()
+
+
+def test_stale_job_cancelled(monkeypatch):
+    """Новая доска или другое количество игроков отменяет устаревший расчет"""
+    monkeypatch.setattr(ba, 'EQUITY_CACHE', MemoryCache())
+    precomputer = EquityPrecomputer(n_simulations=4000)
+
+    precomputer.submit(['Ah', 'Kd'], ['2c', '7h', 'Td'], 4)
+    precomputer.submit(['Ah', 'Kd'], ['2c', '7h', 'Td'], 3)
+    precomputer.submit(['Ah', 'Kd'], ['2c', '7h', 'Td', 'Qs'], 3)
+    assert not precomputer.submit(['Ah'], [], 3)
+    assert precomputer.stats()['cancelled'] == 2
+    assert wait_completed(precomputer, 1)
+    precomputer.shutdown()
+
+
+def test_best_action_reuses_in_flight_job(monkeypatch):
+    """Ход героя во время фонового расчета той же ситуации не повторяет уже идущие симуляции"""
+    monkeypatch.setattr(ba, 'EQUITY_CACHE', MemoryCache())
+    simulated = []
+    real_run = ba.run_equity_simulations
+
+    def slow_run(*args):
+        simulated.append(args[3])
+        time.sleep(0.05)
+        return real_run(*args)
+
+    monkeypatch.setattr(ba, 'run_equity_simulations', slow_run)
+    precomputer = EquityPrecomputer(n_simulations=4000)
+    hero, board = ['Ah', 'Kd'], ['2c', '7h', 'Td']
+
+    assert precomputer.submit(hero, board, 4)
+    time.sleep(0.01)
+    ba.best_action(6, 4, 'BTN', hero, [], board, pot=10, hero_stack=100, to_call=5, n_simulations=4000)
+    assert wait_completed(precomputer, 1)
+
+    assert sum(simulated) == 4000
+    precomputer.shutdown()
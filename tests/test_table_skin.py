@@ -0,0 +1,32 @@
+import sys
+import os
+import importlib.util
+import pytest
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+pytestmark = pytest.mark.skipif(importlib.util.find_spec("cv2") is None, reason="нужен opencv")
+
+
+def make_table(n_board_cards=0, seed=0):
+    """Стол 900x600: зеленое сукно с шумом, в центре карты доски и надпись банка"""
+    rng = np.random.default_rng(seed)
+    frame = np.empty((600, 900, 3), dtype=np.uint8)
+    frame[:] = (40, 110, 45)
+    frame = np.clip(frame + rng.integers(-6, 7, size=frame.shape), 0, 255).astype(np.uint8)
+    for i in range(n_board_cards):
+        x = 310 + i * 58
+        frame[250:330, x:x + 50] = 245                 # карта
+        frame[260:280, x + 5:x + 20] = (30, 30, 200)   # масть
+    frame[215:235, 400:500] = 220                      # банк
+    return frame
+
+
+def test_skin_does_not_depend_on_board():
+    """Скин стола одинаковый на префлопе, флопе и ривере"""
+    from src.cv.parser import get_table_skin
+
+    skins = {get_table_skin(make_table(n, seed=n)) for n in (0, 3, 4, 5)}
+    assert skins == {'32-96-32'}
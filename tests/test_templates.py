@@ -0,0 +1,114 @@
+import sys
+import os
+import importlib.util
+import pytest
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+pytestmark = pytest.mark.skipif(importlib.util.find_spec("cv2") is None, reason="нужен opencv")
+
+
+def render(text, height=40, width=None):
+    """Белый текст фиксированным шрифтом на черном фоне, как надписи клиента"""
+    import cv2
+    width = width or 30 * len(text) + 20
+    img = np.zeros((height, width, 3), dtype=np.uint8)
+    cv2.putText(img, text, (10, height - 10), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+    return img
+
+
+@pytest.fixture
+def templates(tmp_path, monkeypatch):
+    """Шаблоны цифр и кнопки Call, обученные на синтетических вырезках и подставленные как загруженные"""
+    import cv2
+    from src.cv import templates as tpl
+
+    for char in '0123456789':
+        os.makedirs(tmp_path / 'digits' / char)
+        cv2.imwrite(str(tmp_path / 'digits' / char / 'a.png'), render(char))
+    os.makedirs(tmp_path / 'buttons' / 'Call')
+    cv2.imwrite(str(tmp_path / 'buttons' / 'Call' / 'a.png'), render('Call'))
+    os.makedirs(tmp_path / 'buttons' / 'Check_Fold')
+    cv2.imwrite(str(tmp_path / 'buttons' / 'Check_Fold' / 'a.png'), render('Chk/F'))
+
+    path = str(tmp_path / 'ocr_templates.npz')
+    tpl.save_templates(tpl.train_templates(str(tmp_path)), path)
+    loaded = tpl.load_templates(path)
+    monkeypatch.setattr(tpl, '_TEMPLATES', loaded)
+    monkeypatch.setattr(tpl, '_TEMPLATES_LOADED', True)
+    return loaded
+
+
+def test_train_save_load_round_trip(tmp_path):
+    """Шаблоны после записи и чтения совпадают с обученными, '_' в названии кнопки - это ' / '"""
+    import cv2
+    from src.cv.templates import train_templates, save_templates, load_templates
+
+    os.makedirs(tmp_path / 'digits' / '7')
+    cv2.imwrite(str(tmp_path / 'digits' / '7' / 'a.png'), render('7'))
+    os.makedirs(tmp_path / 'buttons' / 'Check_Fold')
+    cv2.imwrite(str(tmp_path / 'buttons' / 'Check_Fold' / 'a.png'), render('Chk/F'))
+
+    trained = train_templates(str(tmp_path))
+    save_templates(trained, str(tmp_path / 'templates.npz'))
+    loaded = load_templates(str(tmp_path / 'templates.npz'))
+
+    assert set(loaded['buttons']) == {'Check / Fold'}
+    assert np.array_equal(loaded['buttons']['Check / Fold'][0], trained['buttons']['Check / Fold'][0])
+    assert np.allclose(loaded['digits']['7'][0], trained['digits']['7'][0])
+    assert load_templates(str(tmp_path / 'missing.npz')) is None
+
+
+def test_read_digits(templates):
+    """Число с десятичной точкой читается уверенно"""
+    from src.cv.templates import read_digits, recognize_number, MIN_DIGIT_SCORE
+
+    text, score = read_digits(render('1234.5'), None, templates)
+    assert text == '1234.5'
+    assert score >= MIN_DIGIT_SCORE
+    assert recognize_number(render('1234.5'), [0, 0, 200, 40]) == 1234.5
+
+
+def test_two_line_panel_reads_stack_row(templates):
+    """Цифры в имени игрока не смешиваются со стеком: читается только нижняя строка"""
+    import cv2
+    from src.cv.templates import recognize_number
+
+    panel = np.zeros((80, 200, 3), dtype=np.uint8)
+    cv2.putText(panel, '777', (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+    cv2.putText(panel, '250', (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+    assert recognize_number(panel, [0, 0, 200, 80]) == 250.0
+
+
+def test_low_confidence_falls_back(templates):
+    """Текст не из цифр и незнакомая кнопка не распознаются - дальше работает OCR"""
+    from src.cv.templates import recognize_number, recognize_button
+
+    assert recognize_number(render('Vasya'), [0, 0, 170, 40]) is None
+    assert recognize_button(render('Raise'), [0, 0, 170, 40]) is None
+    assert recognize_button(render('Call 25'), [0, 0, 230, 40]) == ('Call', 25.0)
+
+
+def test_parser_sends_only_unrecognized_regions_to_ocr(templates, monkeypatch):
+    """В OCR уходят только области, которые шаблоны не прочитали"""
+    from src.cv import parser
+
+    frame = np.zeros((300, 400, 3), dtype=np.uint8)
+    frame[20:60, 20:220] = render('250', width=200)
+    frame[200:240, 20:220] = render('Vasya', width=200)
+    detections = [{'name': 'player_panel', 'bbox': [20, 20, 220, 60], 'conf': 0.9},
+                  {'name': 'player_panel', 'bbox': [20, 200, 220, 240], 'conf': 0.9}]
+
+    calls = []
+
+    def fake_ocr_regions(image, regions, skin='default'):
+        calls.extend(bbox for bbox, *_ in regions)
+        return ['Vasya 80'] * len(regions)
+
+    monkeypatch.setattr(parser, 'ocr_regions', fake_ocr_regions)
+    result = parser.parse_image(frame, detections=detections, card_detections=[])
+
+    assert calls == [[20, 200, 220, 240]]
+    assert sorted(panel['stack'] for panel in result['player_panels']) == [80.0, 250.0]